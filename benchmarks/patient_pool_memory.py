@@ -0,0 +1,65 @@
+"""Memory of the patient pool: legacy per-patient Python objects vs `PatientPool`.
+
+Usage: python benchmarks/patient_pool_memory.py [--patients 1000000] [--visits 200000]
+
+"legacy" is the original representation: `patient_refs: list[str]` plus
+`patient_weights: list[int]`. Memory is measured with tracemalloc while building each pool;
+the time of `--visits` preferential-attachment draws on the compact pool is measured
+separately (untraced).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from pharmassist_synthdata.patient_pool import PatientPool
+
+
+def _traced_bytes(build: Callable[[], Any]) -> tuple[Any, int]:
+    tracemalloc.start()
+    obj = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def _legacy(n: int) -> tuple[list[str], list[int]]:
+    return [f"pt_{i:06d}" for i in range(n)], [1] * n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--patients", type=int, default=1_000_000)
+    ap.add_argument("--visits", type=int, default=200_000)
+    args = ap.parse_args()
+
+    _, legacy_bytes = _traced_bytes(lambda: _legacy(args.patients))
+    pool, compact_bytes = _traced_bytes(lambda: PatientPool(args.patients))
+
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for _ in range(args.visits):
+        pool.visit(rng)
+    visit_us = (time.perf_counter() - started) / max(1, args.visits) * 1e6
+
+    results = {
+        "patients": args.patients,
+        "legacy_bytes": legacy_bytes,
+        "legacy_bytes_per_patient": round(legacy_bytes / args.patients, 1),
+        "compact_bytes": compact_bytes,
+        "compact_bytes_per_patient": round(compact_bytes / args.patients, 1),
+        "compact_nbytes": pool.nbytes,
+        "ratio": round(legacy_bytes / compact_bytes, 1),
+        "compact_visit_us": round(visit_us, 2),
+    }
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
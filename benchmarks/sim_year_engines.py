@@ -0,0 +1,66 @@
+"""Compare the pure-Python and NumPy sim-year engines.
+
+Usage: python benchmarks/sim_year_engines.py [--seed 42] [--pharmacy paris15] [--repeat 3]
+
+Reports the best-of-N wall time of (a) making the year's random draws only and (b) the full
+record stream (draws + record assembly, no encoding/IO), per RNG mode.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from pharmassist_synthdata.sim_year import _plan_shards, default_params, iter_pharmacy_year
+from pharmassist_synthdata.sim_year_np import draw_year, numpy_available
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return round(best, 4)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--pharmacy", default="paris15")
+    ap.add_argument("--year", type=int, default=2025)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    params = default_params(pharmacy=args.pharmacy)
+
+    def stream(rng_mode: str) -> Callable[[], object]:
+        return lambda: sum(
+            1
+            for _ in iter_pharmacy_year(
+                seed=args.seed, pharmacy=args.pharmacy, year=args.year, rng_mode=rng_mode
+            )
+        )
+
+    results: dict[str, float] = {
+        # The sharded plan pass holds all of the Python path's per-visit state draws.
+        "draws_python_s": _best(
+            lambda: _plan_shards(seed=args.seed, year=args.year, params=params), args.repeat
+        ),
+        "stream_v1_s": _best(stream("v1"), args.repeat),
+        "stream_sharded_s": _best(stream("sharded"), args.repeat),
+    }
+    if numpy_available():
+        results["draws_np1_s"] = _best(
+            lambda: draw_year(seed=args.seed, year=args.year, params=params, n_skus=200),
+            args.repeat,
+        )
+        results["stream_np1_s"] = _best(stream("np1"), args.repeat)
+        results["draws_speedup"] = round(results["draws_python_s"] / results["draws_np1_s"], 1)
+        results["stream_speedup_vs_v1"] = round(results["stream_v1_s"] / results["stream_np1_s"], 2)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Local throughput benchmarks (`pharmassist-synthdata bench`).
+
+Each benchmark runs a public generator `repeat` times and keeps the best wall time. Rates
+are reported as `<unit>_per_s` metrics; `compare` flags any of them that dropped more than
+the allowed fraction below a stored baseline. Numbers depend on the machine, so baselines
+are only meaningful on the machine (or CI runner class) that recorded them.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any
+
+from .case_bundle import generate_case_bundle
+from .constants import DEFAULT_BENCH_THRESHOLD
+from .ocr_text import apply_ocr_noise, render_intake_text
+from .prescription_pdf import generate_prescription_pdf_suite
+from .sim_year import RECORD_FILES, default_params, generate_pharmacy_year
+from .validate import validate_instance, validate_many
+
+BENCH_SCHEMA_VERSION = "0.0.0"
+DEFAULT_THRESHOLD = DEFAULT_BENCH_THRESHOLD
+
+
+@dataclass(frozen=True)
+class Regression:
+    bench: str
+    metric: str
+    baseline: float
+    value: float
+    threshold: float
+
+    @property
+    def drop(self) -> float:
+        return 1.0 - self.value / self.baseline
+
+
+def _best_of(repeat: int, fn: Callable[[], Any]) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _bench_sim_year(mode: str, *, repeat: int, quick: bool) -> dict[str, float]:
+    params = default_params(pharmacy="paris15")
+    if quick and mode == "full":
+        params = replace(params, mu_base=params.mu_base / 10)
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        def run() -> dict[str, int]:
+            return generate_pharmacy_year(
+                seed=42,
+                pharmacy="paris15",
+                year=2025,
+                out_dir=out_dir,
+                mode=mode,
+                params=params,
+                rollups=False,
+            )
+
+        seconds, rows = _best_of(repeat, run)
+        # Uncompressed JSONL bytes, so the rate does not move with the compression level.
+        size = sum(len(gzip.decompress((out_dir / n).read_bytes())) for n in RECORD_FILES.values())
+    n_rows = sum(rows.values())
+    return {
+        "seconds": seconds,
+        "rows": n_rows,
+        "rows_per_s": n_rows / seconds,
+        "mb_per_s": size / 1e6 / seconds,
+    }
+
+
+def _bench_case_bundle(*, repeat: int, quick: bool) -> dict[str, float]:
+    n = 20 if quick else 200
+    seconds, _ = _best_of(repeat, lambda: [generate_case_bundle(seed=s) for s in range(n)])
+    return {"seconds": seconds, "bundles": n, "bundles_per_s": n / seconds}
+
+
+def _bench_ocr_noise(*, repeat: int, quick: bool) -> dict[str, float]:
+    texts = [
+        render_intake_text(generate_case_bundle(seed=s), language=lang)
+        for s in range(10 if quick else 50)
+        for lang in ("fr", "en")
+    ]
+    chars = sum(len(t) for t in texts)
+    seconds, _ = _best_of(repeat, lambda: [apply_ocr_noise(t, seed=i) for i, t in enumerate(texts)])
+    return {"seconds": seconds, "chars": chars, "chars_per_s": chars / seconds}
+
+
+def _bench_rx_pdf_suite(*, repeat: int, quick: bool) -> dict[str, float]:
+    seeds = tuple(range(42, 42 + (2 if quick else 10)))
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds, manifest = _best_of(
+            repeat, lambda: generate_prescription_pdf_suite(out_dir=Path(tmp), seeds=seeds)
+        )
+    n = len(manifest["files"])
+    return {"seconds": seconds, "pdfs": n, "pdfs_per_s": n / seconds}
+
+
+def _validation_instances(quick: bool) -> list[tuple[dict[str, Any], str]]:
+    instances: list[tuple[dict[str, Any], str]] = []
+    for s in range(5 if quick else 20):
+        bundle = generate_case_bundle(seed=s)
+        instances.append((bundle["llm_context"], "llm_context"))
+        instances.append((bundle["intake_extracted"], "intake_extracted"))
+        instances.extend((p, "product") for p in bundle["products"])
+    return instances
+
+
+def _bench_validate_instance(*, repeat: int, quick: bool) -> dict[str, float]:
+    instances = _validation_instances(quick)
+
+    def run() -> int:
+        return sum(len(validate_instance(i, schema_name=name)) for i, name in instances)
+
+    seconds, issues = _best_of(repeat, run)
+    if issues:
+        raise RuntimeError(f"benchmark instances are not schema-valid ({issues} issues)")
+    n = len(instances)
+    return {"seconds": seconds, "instances": n, "instances_per_s": n / seconds}
+
+
+def _bench_validate_many(*, repeat: int, quick: bool) -> dict[str, float]:
+    by_schema: dict[str, list[dict[str, Any]]] = {}
+    for instance, name in _validation_instances(quick) * 100:
+        by_schema.setdefault(name, []).append(instance)
+
+    def run() -> int:
+        return sum(len(validate_many(batch, name).invalid) for name, batch in by_schema.items())
+
+    seconds, invalid = _best_of(repeat, run)
+    if invalid:
+        raise RuntimeError(f"benchmark instances are not schema-valid ({invalid} invalid)")
+    n = sum(len(batch) for batch in by_schema.values())
+    return {"seconds": seconds, "instances": n, "instances_per_s": n / seconds}
+
+
+def import_time(module: str = "pharmassist_synthdata.cli") -> tuple[float, list[str]]:
+    """Seconds a fresh interpreter spends importing `module` (`python -X importtime`).
+
+    Counts the package and everything it pulls in, not the interpreter's own startup. Also
+    returns the names of all the modules imported, in order.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    package = module.partition(".")[0]
+    total_us = 0
+    names: list[str] = []
+    for line in proc.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header or unrelated output
+        name = parts[2].strip()
+        names.append(name)
+        top_level = parts[2].startswith(" ") and not parts[2].startswith("  ")
+        if top_level and name.partition(".")[0] == package:
+            total_us += int(parts[1])
+    return total_us / 1e6, names
+
+
+def _bench_cli_import(*, repeat: int, quick: bool) -> dict[str, float]:
+    seconds = min(import_time()[0] for _ in range(max(1, repeat)))
+    return {"seconds": seconds, "imports_per_s": 1.0 / seconds}
+
+
+BENCHMARKS: dict[str, Callable[..., dict[str, float]]] = {
+    "sim_year_mini": lambda **kw: _bench_sim_year("mini", **kw),
+    "sim_year_full": lambda **kw: _bench_sim_year("full", **kw),
+    "case_bundle": _bench_case_bundle,
+    "ocr_noise": _bench_ocr_noise,
+    "rx_pdf_suite": _bench_rx_pdf_suite,
+    "validate_instance": _bench_validate_instance,
+    "validate_many": _bench_validate_many,
+    "cli_import": _bench_cli_import,
+}
+
+
+def run_benchmarks(
+    names: list[str] | None = None, *, repeat: int = 3, quick: bool = False
+) -> dict[str, Any]:
+    """Run the named benchmarks (default: all) and return the results document.
+
+    `quick` shrinks every workload (and the full-mode sim-year volume) for smoke runs; its
+    numbers are not comparable with a normal run's.
+    """
+    names = list(BENCHMARKS) if names is None else names
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown} (known: {sorted(BENCHMARKS)})")
+    results = {name: BENCHMARKS[name](repeat=repeat, quick=quick) for name in names}
+    return {
+        "schema_version": BENCH_SCHEMA_VERSION,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "quick": quick,
+        "repeat": repeat,
+        "results": {
+            name: {k: round(v, 4) if isinstance(v, float) else v for k, v in r.items()}
+            for name, r in results.items()
+        },
+    }
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], *, threshold: float = DEFAULT_THRESHOLD
+) -> list[Regression]:
+    """Rate metrics (`*_per_s`) that fell more than `threshold` below the baseline.
+
+    The baseline may set `thresholds: {bench: fraction}` for noisier benchmarks. Benchmarks
+    or metrics missing on either side are skipped.
+    """
+    if results.get("quick") != baseline.get("quick"):
+        raise ValueError("Cannot compare quick and normal benchmark runs")
+    overrides = baseline.get("thresholds") or {}
+    out: list[Regression] = []
+    for name, metrics in sorted(results["results"].items()):
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        allowed = float(overrides.get(name, threshold))
+        for metric, value in sorted(metrics.items()):
+            if not metric.endswith("_per_s") or not base.get(metric):
+                continue
+            if value < base[metric] * (1.0 - allowed):
+                out.append(Regression(name, metric, base[metric], value, allowed))
+    return out
+
+
+def write_results(path: Path, results: dict[str, Any]) -> None:
+    path.write_text(
+        json.dumps(results, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
@@ -5,6 +5,7 @@ from typing import Any
 from .catalog import generate_catalog
 from .ocr_text import generate_intake_text_ocr
 from .patient import generate_patient
+from .profiling import stage
 
 SCHEMA_VERSION = "0.0.0"
 
@@ -20,6 +21,7 @@ def case_ref_for_seed(seed: int) -> str:
     return _SPECIAL_CASE_REFS.get(seed, f"case_{seed:06d}")
 
 
+@stage("case_bundle.intake")
 def generate_intake_extracted_stub(seed: int) -> dict[str, Any]:
     # Minimal, schema-compliant structured intake (to be expanded later).
     if seed == 101:
@@ -63,6 +65,7 @@ def generate_intake_extracted_stub(seed: int) -> dict[str, Any]:
     }
 
 
+@stage("case_bundle.total")
 def generate_case_bundle(seed: int = 0) -> dict[str, Any]:
     bundle: dict[str, Any] = {
         "schema_version": SCHEMA_VERSION,
@@ -3,9 +3,12 @@ from __future__ import annotations
 import random
 from typing import Any
 
+from .profiling import stage
+
 SCHEMA_VERSION = "0.0.0"
 
 
+@stage("catalog.generate")
 def generate_catalog(seed: int) -> list[dict[str, Any]]:
     """Generate a small OTC/parapharmacy catalog (products list)."""
     rng = random.Random(seed + 12345)
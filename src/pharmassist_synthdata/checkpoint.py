@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO
+
+CHECKPOINT_FILENAME = "checkpoint.json"
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Progress of a chunked sim-year run, written after each completed chunk.
+
+    `run` identifies the run (seed, preset, modes, ...); resuming with a different one is an
+    error. `offsets` are the committed byte sizes of the output files: anything past them
+    was written by an unfinished chunk and is truncated on resume. `state` is whatever the
+    engine needs to continue (RNG state, counters, pool weights).
+    """
+
+    run: dict[str, Any]
+    last_chunk: int
+    offsets: dict[str, int]
+    rows: dict[str, int]
+    state: dict[str, Any]
+
+
+def load_checkpoint(out_dir: Path) -> Checkpoint | None:
+    path = out_dir / CHECKPOINT_FILENAME
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return Checkpoint(
+        run=payload["run"],
+        last_chunk=int(payload["last_chunk"]),
+        offsets={k: int(v) for k, v in payload["offsets"].items()},
+        rows={k: int(v) for k, v in payload["rows"].items()},
+        state=payload["state"],
+    )
+
+
+def write_checkpoint(out_dir: Path, checkpoint: Checkpoint) -> None:
+    payload = {
+        "schema_version": "0.0.0",
+        "run": checkpoint.run,
+        "last_chunk": checkpoint.last_chunk,
+        "offsets": checkpoint.offsets,
+        "rows": checkpoint.rows,
+        "state": checkpoint.state,
+    }
+    # Write-then-rename: a crash leaves either the previous or the new checkpoint.
+    path = out_dir / CHECKPOINT_FILENAME
+    tmp = path.with_suffix(".json.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(payload, ensure_ascii=False, sort_keys=True) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class CheckpointedOutput:
+    """Output files built from whole gzip members, committed chunk by chunk.
+
+    Each chunk (e.g. a month) is appended as complete gzip members, so a file cut at a
+    committed offset is still valid gzip and appending the remaining chunks yields the same
+    bytes as an uninterrupted run. `commit` fsyncs the files, then records their sizes in
+    the checkpoint. A fresh (non-resumed) run deletes any old checkpoint first, so a crash
+    before its first commit cannot be resumed from another run's offsets.
+    """
+
+    def __init__(
+        self, out_dir: Path, files: dict[str, str], *, run: dict[str, Any], resume: bool
+    ) -> None:
+        self.out_dir = out_dir
+        self.run = run
+        previous = load_checkpoint(out_dir) if resume else None
+        if previous is not None and previous.run != run:
+            raise ValueError(f"Checkpoint in {out_dir} was written by a different run")
+
+        self.last_chunk = -1 if previous is None else previous.last_chunk
+        self.state: dict[str, Any] | None = None if previous is None else previous.state
+        self.rows: dict[str, int] = (
+            dict.fromkeys(files, 0) if previous is None else dict(previous.rows)
+        )
+        if previous is None:
+            (out_dir / CHECKPOINT_FILENAME).unlink(missing_ok=True)
+        else:
+            for key, name in files.items():
+                size = (out_dir / name).stat().st_size
+                if size < previous.offsets[key]:
+                    raise ValueError(
+                        f"{name} is shorter ({size} bytes) than its checkpointed offset "
+                        f"({previous.offsets[key]} bytes); cannot resume"
+                    )
+        self._handles: dict[str, BinaryIO] = {}
+        for key, name in files.items():
+            path = out_dir / name
+            if previous is None:
+                self._handles[key] = path.open("wb")
+                continue
+            f = path.open("r+b")
+            f.truncate(previous.offsets[key])
+            f.seek(0, os.SEEK_END)
+            self._handles[key] = f
+
+    def append(self, key: str, member: bytes, rows: int) -> None:
+        self._handles[key].write(member)
+        self.rows[key] += rows
+
+    def commit(self, chunk: int, state: dict[str, Any]) -> None:
+        offsets: dict[str, int] = {}
+        for key, f in self._handles.items():
+            f.flush()
+            os.fsync(f.fileno())
+            offsets[key] = f.tell()
+        self.last_chunk = chunk
+        self.state = state
+        write_checkpoint(
+            self.out_dir,
+            Checkpoint(
+                run=self.run, last_chunk=chunk, offsets=offsets, rows=dict(self.rows), state=state
+            ),
+        )
+
+    def close(self) -> None:
+        for f in self._handles.values():
+            f.close()
+
+    def __enter__(self) -> CheckpointedOutput:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
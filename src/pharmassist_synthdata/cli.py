@@ -3,15 +3,42 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+from datetime import date
 from pathlib import Path
 
-from .generate import generate_case
-from .prescription_pdf import generate_prescription_pdf_suite
-from .sim_year import generate_pharmacy_year
-from .validate import validate_case_bundle
+# Command modules are imported inside the `_cmd_*` functions: they pull in jsonschema,
+# reportlab or the simulator, and a command should only pay for its own (see `constants`).
+from .constants import (
+    BENCHMARK_NAMES,
+    DEFAULT_BENCH_THRESHOLD,
+    DEFAULT_CHUNK_ROWS,
+    DEFAULT_CONFIDENCE,
+    DEFAULT_MAX_ISSUES,
+    PHARMACY_PRESETS,
+    REPLAY_FILES,
+    SECONDS_PER_DAY,
+    STOCK_FILENAME,
+)
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def _parse_size(text: str) -> int:
+    """`"512M"` -> bytes (K/M/G are binary multiples; a trailing "B"/"iB" is allowed)."""
+    raw = text.strip().upper().removesuffix("B").removesuffix("I")
+    unit = raw[-1:] if raw[-1:] in _SIZE_UNITS else ""
+    try:
+        value = float(raw[: len(raw) - len(unit)])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r} (e.g. 512M, 2G)") from None
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"size must be > 0: {text!r}")
+    return int(value * _SIZE_UNITS[unit])
 
 
 def _cmd_generate(args: argparse.Namespace) -> int:
+    from .generate import generate_case
+
     payload = generate_case(seed=args.seed)
 
     if args.pretty:
@@ -28,18 +55,126 @@ def _cmd_generate(args: argparse.Namespace) -> int:
 
 
 def _cmd_sim_year(args: argparse.Namespace) -> int:
-    generate_pharmacy_year(
+    from .sim_year import MemoryBudgetError, generate_pharmacy_year
+
+    rng_mode = args.rng_mode or ("sharded" if args.workers is not None else "v1")
+    try:
+        generate_pharmacy_year(
+            seed=args.seed,
+            pharmacy=args.pharmacy,
+            year=args.year,
+            out_dir=args.out,
+            mode=args.mode,
+            rng_mode=rng_mode,
+            workers=args.workers or 1,
+            encoder=args.encoder,
+            compresslevel=args.compresslevel,
+            pipeline=not args.no_pipeline,
+            block_size=args.block_size,
+            checkpoint=args.checkpoint,
+            resume=args.resume,
+            only=args.only.split(",") if args.only else None,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            stock=args.stock,
+            rollups=not args.no_rollups,
+            max_memory=args.max_memory,
+        )
+    except MemoryBudgetError as exc:
+        sys.stderr.write(f"{exc}\n")
+        return 1
+    sys.stdout.write(f"OK: wrote dataset to {args.out}\n")
+    return 0
+
+
+def _cmd_stock_at(args: argparse.Namespace) -> int:
+    from .stock import stock_on
+
+    stock = stock_on(args.in_dir / STOCK_FILENAME, args.date)
+    sys.stdout.write(json.dumps(stock, sort_keys=True) + "\n")
+    return 0
+
+
+def _cmd_sim_years(args: argparse.Namespace) -> int:
+    from .sim_year import YEARS_INDEX_FILENAME, generate_pharmacy_years
+
+    index = generate_pharmacy_years(
         seed=args.seed,
         pharmacy=args.pharmacy,
-        year=args.year,
+        first_year=args.first_year,
+        n_years=args.years,
         out_dir=args.out,
-        mode=args.mode,
+        encoder=args.encoder,
+        compresslevel=args.compresslevel,
+    )
+    sys.stdout.write(
+        f"OK: wrote {len(index['years'])} years + {YEARS_INDEX_FILENAME} to {args.out}\n"
     )
-    sys.stdout.write(f"OK: wrote dataset to {args.out}\n")
     return 0
 
 
+def _cmd_replay(args: argparse.Namespace) -> int:
+    from .replay import replay_dataset
+
+    report = replay_dataset(
+        args.in_dir,
+        sink=args.sink,
+        speed=args.speed,
+        files=args.files.split(","),
+        date_from=args.date_from,
+        date_to=args.date_to,
+    )
+    # stdout may be the sink itself, so the rate report goes to stderr.
+    sys.stderr.write(json.dumps(report.to_json(), sort_keys=True) + "\n")
+    return 1 if report.errors else 0
+
+
+def _cmd_fleet(args: argparse.Namespace) -> int:
+    from .fleet import INDEX_FILENAME, load_jobs, parse_job_spec, run_fleet
+
+    jobs = load_jobs(args.jobs) if args.jobs else []
+    jobs.extend(parse_job_spec(spec) for spec in args.job or [])
+    if not jobs:
+        sys.stderr.write("No jobs: pass --jobs FILE and/or --job PHARMACY:YEAR:SEED\n")
+        return 1
+
+    index = run_fleet(jobs, out_dir=args.out, workers=args.workers)
+    failed = [j for j in index["jobs"] if j.get("status") != "ok"]
+    for j in failed:
+        sys.stderr.write(f"[FAILED] {j['name']}: {j.get('error')}\n")
+    if failed:
+        return 1
+
+    sys.stdout.write(f"OK: wrote {len(jobs)} datasets + {INDEX_FILENAME} to {args.out}\n")
+    return 0
+
+
+def _cmd_bench(args: argparse.Namespace) -> int:
+    from .bench import compare, load_results, run_benchmarks, write_results
+
+    results = run_benchmarks(
+        args.only.split(",") if args.only else None, repeat=args.repeat, quick=args.quick
+    )
+    if args.out:
+        write_results(args.out, results)
+    for name, metrics in results["results"].items():
+        rates = ", ".join(f"{k}={v:,.1f}" for k, v in sorted(metrics.items()) if k.endswith("_s"))
+        sys.stdout.write(f"{name}: {rates}\n")
+    if args.baseline is None:
+        return 0
+
+    regressions = compare(results, load_results(args.baseline), threshold=args.threshold)
+    for r in regressions:
+        sys.stderr.write(
+            f"[REGRESSION] {r.bench} {r.metric}: {r.value:,.1f} vs baseline {r.baseline:,.1f} "
+            f"(-{r.drop:.0%}, allowed -{r.threshold:.0%})\n"
+        )
+    return 1 if regressions else 0
+
+
 def _cmd_validate(args: argparse.Namespace) -> int:
+    from .validate import validate_case_bundle
+
     payload = json.loads(args.in_path.read_text(encoding="utf-8"))
     if not isinstance(payload, dict):
         sys.stderr.write("Input must be a JSON object\n")
@@ -55,7 +190,45 @@ def _cmd_validate(args: argparse.Namespace) -> int:
     return 0
 
 
+def _cmd_validate_dataset(args: argparse.Namespace) -> int:
+    from .validate_dataset import validate_dataset
+
+    report = validate_dataset(
+        args.in_dir,
+        workers=args.workers,
+        chunk_rows=args.chunk_rows,
+        max_issues=args.max_issues,
+        sample=args.sample,
+        seed=args.seed,
+        confidence=args.confidence,
+    )
+    for issue in report.issues:
+        sys.stderr.write(f"[INVALID] {issue}\n")
+    if report.sample:
+        checked = sum(s.rare + s.sampled for s in report.sample)
+        sys.stdout.write(
+            f"Sampled {checked} of {sum(report.rows.values())} records: invalid rate"
+            f" <= {report.rate_upper:.4%} ({report.confidence:.0%} confidence)\n"
+        )
+    if not report.ok:
+        shown = len(report.issues)
+        sys.stderr.write(f"{report.n_issues} issues ({shown} shown)\n")
+    if args.max_invalid_rate is not None:
+        if report.rate_upper > args.max_invalid_rate:
+            sys.stderr.write(
+                f"Invalid rate {report.rate_upper:.4%} exceeds {args.max_invalid_rate:.4%}\n"
+            )
+            return 1
+    elif not report.ok:
+        return 1
+
+    sys.stdout.write(f"OK: {sum(report.rows.values())} records\n")
+    return 0
+
+
 def _cmd_gen_rx_pdf_suite(args: argparse.Namespace) -> int:
+    from .prescription_pdf import generate_prescription_pdf_suite
+
     manifest = generate_prescription_pdf_suite(
         out_dir=args.out,
         seed=args.seed,
@@ -68,6 +241,17 @@ def _cmd_gen_rx_pdf_suite(args: argparse.Namespace) -> int:
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="pharmassist-synthdata")
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="JSON",
+        help="Write per-stage timings (calls, cumulative seconds) of the command to JSON.",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile, also record per-stage peak memory (tracemalloc; much slower).",
+    )
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     gen = sub.add_parser("generate", help="Generate a deterministic synthetic case bundle (JSON).")
@@ -85,7 +269,8 @@ def build_parser() -> argparse.ArgumentParser:
         "--pharmacy",
         type=str,
         default="paris15",
-        help="Pharmacy preset (v1: paris15).",
+        choices=PHARMACY_PRESETS,
+        help="Pharmacy preset.",
     )
     sim.add_argument("--year", type=int, default=2025, help="Calendar year to simulate (YYYY).")
     sim.add_argument(
@@ -95,13 +280,265 @@ def build_parser() -> argparse.ArgumentParser:
         default="full",
         help="Dataset size preset (full=year simulation, mini=CI subset).",
     )
+    sim.add_argument(
+        "--rng-mode",
+        type=str,
+        choices=["v1", "sharded", "np1", "keyed"],
+        default=None,
+        help="Randomness layout (default: v1, or sharded with --workers; np1 needs NumPy).",
+    )
+    sim.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Render month shards in N processes (sharded mode; output is independent of N).",
+    )
+    sim.add_argument(
+        "--encoder",
+        type=str,
+        choices=["fast", "json"],
+        default="fast",
+        help="Record encoder (json = reference json.dumps path; both emit identical bytes).",
+    )
+    sim.add_argument(
+        "--compresslevel",
+        type=int,
+        choices=range(0, 10),
+        default=9,
+        metavar="{0..9}",
+        help="Gzip compression level (default 9).",
+    )
+    sim.add_argument(
+        "--no-pipeline",
+        action="store_true",
+        help="Compress inline instead of on per-file background threads.",
+    )
+    sim.add_argument(
+        "--block-size",
+        type=int,
+        default=None,
+        metavar="CHARS",
+        help="Write independent gzip blocks of ~CHARS uncompressed + a .blocks.json index.",
+    )
+    sim.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Write a checkpoint after each month so an interrupted run can be resumed.",
+    )
+    sim.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the checkpoint in --out (implies --checkpoint).",
+    )
+    sim.add_argument(
+        "--from",
+        dest="date_from",
+        type=date.fromisoformat,
+        default=None,
+        metavar="YYYY-MM-DD",
+        help="Only emit dated records (visits, events, new patients) from this day on.",
+    )
+    sim.add_argument(
+        "--to",
+        dest="date_to",
+        type=date.fromisoformat,
+        default=None,
+        metavar="YYYY-MM-DD",
+        help="Only emit dated records up to this day (inclusive); later days are not simulated.",
+    )
+    sim.add_argument(
+        "--only",
+        type=str,
+        default=None,
+        metavar="FILES",
+        help="Comma-separated files to write, e.g. events,visits (default: all four).",
+    )
+    sim.add_argument(
+        "--no-rollups",
+        action="store_true",
+        help="Do not write the rollup_*.json aggregates (visits per day/domain, intents, ...).",
+    )
+    sim.add_argument(
+        "--stock",
+        action="store_true",
+        help=f"Also write {STOCK_FILENAME} (daily OTC stock: keyframes + deltas).",
+    )
+    sim.add_argument(
+        "--max-memory",
+        type=_parse_size,
+        default=None,
+        metavar="SIZE",
+        help="Memory budget for the generator state, e.g. 256M. Lowers output-neutral "
+        "settings to fit, or fails before writing with an estimate.",
+    )
     sim.add_argument("--out", type=Path, required=True, help="Output directory.")
     sim.set_defaults(func=_cmd_sim_year)
 
+    stock = sub.add_parser("stock-at", help="Print the OTC stock of a sim-year dataset on a date.")
+    stock.add_argument(
+        "--in", dest="in_dir", type=Path, required=True, help="sim-year output directory."
+    )
+    stock.add_argument("--date", type=date.fromisoformat, required=True, metavar="YYYY-MM-DD")
+    stock.set_defaults(func=_cmd_stock_at)
+
+    years = sub.add_parser(
+        "sim-years",
+        help="Simulate consecutive years of one pharmacy from a continuing patient pool.",
+    )
+    years.add_argument("--seed", type=int, default=0, help="Deterministic seed.")
+    years.add_argument(
+        "--pharmacy",
+        type=str,
+        default="paris15",
+        choices=PHARMACY_PRESETS,
+        help="Pharmacy preset.",
+    )
+    years.add_argument("--first-year", type=int, default=2025, help="First year (YYYY).")
+    years.add_argument("--years", type=int, default=10, help="Number of consecutive years.")
+    years.add_argument(
+        "--encoder",
+        type=str,
+        choices=["fast", "json"],
+        default="fast",
+        help="Record encoder (both emit identical bytes).",
+    )
+    years.add_argument(
+        "--compresslevel",
+        type=int,
+        choices=range(0, 10),
+        default=9,
+        metavar="{0..9}",
+        help="Gzip compression level (default 9).",
+    )
+    years.add_argument(
+        "--out",
+        type=Path,
+        required=True,
+        help="Output directory (one sub-directory per year + years.json).",
+    )
+    years.set_defaults(func=_cmd_sim_years)
+
+    rep = sub.add_parser(
+        "replay",
+        help="Replay a sim-year dataset as one chronological stream, paced for load tests.",
+    )
+    rep.add_argument(
+        "--in", dest="in_dir", type=Path, required=True, help="sim-year output directory."
+    )
+    rep.add_argument(
+        "--sink",
+        type=str,
+        default="-",
+        help="'-' (stdout), file:PATH, tcp:HOST:PORT or http://HOST:PORT/PATH.",
+    )
+    rep.add_argument(
+        "--speed",
+        type=float,
+        default=float(SECONDS_PER_DAY),
+        help="Simulated seconds per wall-clock second (default 86400 = 1 day/s; 0 = unpaced).",
+    )
+    rep.add_argument(
+        "--files",
+        type=str,
+        default=",".join(REPLAY_FILES),
+        help="Comma-separated dated files to merge (default: visits,events).",
+    )
+    rep.add_argument(
+        "--from", dest="date_from", type=date.fromisoformat, default=None, metavar="YYYY-MM-DD"
+    )
+    rep.add_argument(
+        "--to", dest="date_to", type=date.fromisoformat, default=None, metavar="YYYY-MM-DD"
+    )
+    rep.set_defaults(func=_cmd_replay)
+
+    fleet = sub.add_parser(
+        "fleet",
+        help="Generate many pharmacy x year x seed sim-year datasets on a bounded worker pool.",
+    )
+    fleet.add_argument("--jobs", type=Path, help="JSON list of {pharmacy, year, seed} jobs.")
+    fleet.add_argument(
+        "--job",
+        action="append",
+        metavar="PHARMACY:YEAR:SEED",
+        help="Add one job (repeatable).",
+    )
+    fleet.add_argument("--workers", type=int, default=1, help="Max concurrent jobs.")
+    fleet.add_argument(
+        "--out",
+        type=Path,
+        required=True,
+        help="Output directory (one sub-directory per job + fleet_index.json).",
+    )
+    fleet.set_defaults(func=_cmd_fleet)
+
+    bench = sub.add_parser("bench", help="Measure generator throughput; compare to a baseline.")
+    bench.add_argument(
+        "--only",
+        type=str,
+        default=None,
+        help=f"Comma-separated benchmarks (default: all of {', '.join(BENCHMARK_NAMES)}).",
+    )
+    bench.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (best is kept).")
+    bench.add_argument("--quick", action="store_true", help="Smaller workloads (smoke runs).")
+    bench.add_argument("--out", type=Path, help="Write the results JSON to this file.")
+    bench.add_argument("--baseline", type=Path, help="Baseline results JSON to compare against.")
+    bench.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_BENCH_THRESHOLD,
+        help="Allowed fractional drop of any rate vs the baseline (default 0.25).",
+    )
+    bench.set_defaults(func=_cmd_bench)
+
     val = sub.add_parser("validate", help="Validate a case bundle JSON against vendored schemas.")
     val.add_argument("--in", dest="in_path", type=Path, required=True, help="Input JSON file.")
     val.set_defaults(func=_cmd_validate)
 
+    vds = sub.add_parser(
+        "validate-dataset",
+        help="Validate a sim-year output directory: schemas and cross-file refs.",
+    )
+    vds.add_argument(
+        "--in",
+        dest="in_dir",
+        type=Path,
+        required=True,
+        help="sim-year (or sim-years) output directory.",
+    )
+    vds.add_argument("--workers", type=int, default=1, help="Validation processes.")
+    vds.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Lines per chunk handed to a worker.",
+    )
+    vds.add_argument(
+        "--max-issues",
+        type=int,
+        default=DEFAULT_MAX_ISSUES,
+        help="Issues to print (all are counted).",
+    )
+    vds.add_argument(
+        "--sample",
+        type=int,
+        default=None,
+        help="Check only rare rows plus this many sampled rows per file, and bound the rest.",
+    )
+    vds.add_argument("--seed", type=int, default=0, help="Sampling seed.")
+    vds.add_argument(
+        "--confidence",
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+        help=f"Confidence of the invalid-rate bound (default {DEFAULT_CONFIDENCE}).",
+    )
+    vds.add_argument(
+        "--max-invalid-rate",
+        type=float,
+        default=None,
+        help="Fail only if the invalid-row rate (its upper bound with --sample) exceeds this.",
+    )
+    vds.set_defaults(func=_cmd_validate_dataset)
+
     pdf = sub.add_parser(
         "gen-rx-pdf-suite",
         help="Generate deterministic synthetic prescription PDFs (text-layer) + manifest.",
@@ -126,7 +563,15 @@ def build_parser() -> argparse.ArgumentParser:
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
-    return int(args.func(args))
+    if args.profile is None:
+        return int(args.func(args))
+
+    from .profiling import profiling
+
+    with profiling(memory=args.profile_memory) as prof:
+        rc = int(args.func(args))
+    prof.write(args.profile)
+    return rc
 
 
 if __name__ == "__main__":
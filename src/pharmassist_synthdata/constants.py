@@ -0,0 +1,26 @@
+"""Names and defaults the CLI parser needs, in a module without imports.
+
+`cli` only imports a command's module (and its dependencies: jsonschema, reportlab, the
+simulator, ...) when that command runs, so values shown in `--help` or used as argument
+defaults live here. The modules that own them re-export them.
+"""
+
+PHARMACY_PRESETS = ("paris15", "rural", "suburban")  # sorted names of the sim-year presets
+STOCK_FILENAME = "stock_daily.jsonl.gz"
+# Dated sim-year files, in tie-break order: on the same day, visits come before their events.
+REPLAY_FILES = ("visits", "events")
+SECONDS_PER_DAY = 86_400
+BENCHMARK_NAMES = (
+    "sim_year_mini",
+    "sim_year_full",
+    "case_bundle",
+    "ocr_noise",
+    "rx_pdf_suite",
+    "validate_instance",
+    "validate_many",
+    "cli_import",
+)
+DEFAULT_BENCH_THRESHOLD = 0.25
+DEFAULT_CHUNK_ROWS = 2000
+DEFAULT_MAX_ISSUES = 100
+DEFAULT_CONFIDENCE = 0.95
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from json.encoder import encode_basestring as _enc_str  # ensure_ascii=False escaping (C)
+from typing import Any, Literal
+
+EncoderName = Literal["fast", "json"]
+RecordEncodeFn = Callable[[str, dict[str, Any]], str]
+
+_VISIT_KEYS = frozenset(
+    {"visit_ref", "patient_ref", "occurred_at", "primary_domain", "intents", "intake_extracted"}
+)
+_EVENT_KEYS = frozenset(
+    {"event_ref", "visit_ref", "patient_ref", "occurred_at", "event_type", "payload"}
+)
+_PATIENT_KEYS = frozenset({"patient_ref", "llm_context"})
+_INTAKE_KEYS = frozenset({"schema_version", "presenting_problem", "symptoms", "red_flags"})
+_ITEM_KEYS = frozenset({"sku", "qty"})
+
+# Upper bound on cached intake fragments: the generators only emit a few dozen distinct
+# intakes, this just keeps pathological inputs from growing the cache without limit.
+_MAX_FRAGMENTS = 4096
+
+
+# id(payload) -> (payload, canonical JSON). Holding the payload keeps its id from being reused.
+_INTERNED: dict[int, tuple[Any, str]] = {}
+
+
+def dumps_canonical(obj: Any) -> str:
+    """Reference encoder: compact, sorted-key JSON (the on-disk sim-year line format)."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def intern_payload(obj: dict[str, Any]) -> dict[str, Any]:
+    """Register a shared, never-mutated payload and serialize it once.
+
+    `FastRecordEncoder` then reuses the canonical JSON by identity wherever the object
+    appears. Only intern long-lived objects from a small, finite set.
+    """
+    _INTERNED[id(obj)] = (obj, dumps_canonical(obj))
+    return obj
+
+
+def _str_list(values: Any) -> str | None:
+    if type(values) is not list:
+        return None
+    return "[" + ",".join(_enc_str(v) for v in values) + "]"
+
+
+def _intake_key(obj: Any) -> tuple[Any, ...] | None:
+    """Hashable identity of an intake dict, or None when it is not the known shape.
+
+    Only str and exact-int leaves are accepted so that equal keys always mean identical JSON
+    (e.g. `1`, `1.0` and `True` hash alike but encode differently).
+    """
+    if type(obj) is not dict or obj.keys() != _INTAKE_KEYS:
+        return None
+    symptoms = obj["symptoms"]
+    red_flags = obj["red_flags"]
+    if type(symptoms) is not list or type(red_flags) is not list:
+        return None
+
+    sym_key: list[tuple[tuple[str, Any], ...]] = []
+    for s in symptoms:
+        if type(s) is not dict:
+            return None
+        for v in s.values():
+            if type(v) is not str and type(v) is not int:
+                return None
+        sym_key.append(tuple(sorted(s.items())))
+    for rf in red_flags:
+        if type(rf) is not str:
+            return None
+    version = obj["schema_version"]
+    problem = obj["presenting_problem"]
+    if type(version) is not str or type(problem) is not str:
+        return None
+    return (
+        version,
+        problem,
+        tuple(sym_key),
+        tuple(red_flags),
+    )
+
+
+class FastRecordEncoder:
+    """Canonical JSON for the fixed sim-year record shapes.
+
+    Visits and events are assembled from precomputed, already-sorted key fragments and the
+    few distinct intake payloads are serialized once and cached. Output is byte-identical to
+    `dumps_canonical`; any record that does not match the known shape falls back to it.
+    """
+
+    __slots__ = ("_intake_fragments",)
+
+    def __init__(self) -> None:
+        self._intake_fragments: dict[tuple[Any, ...], str] = {}
+
+    def encode(self, kind: str, data: dict[str, Any]) -> str:
+        try:
+            if kind == "event":
+                out = self._event(data)
+            elif kind == "visit":
+                out = self._visit(data)
+            elif kind == "patient":
+                out = self._patient(data)
+            else:
+                out = None
+        except TypeError:
+            # A leaf of unexpected type (e.g. a non-str ref); let json report or handle it.
+            out = None
+        return dumps_canonical(data) if out is None else out
+
+    def _intake(self, obj: Any) -> str:
+        hit = _INTERNED.get(id(obj))
+        if hit is not None and hit[0] is obj:
+            return hit[1]
+        key = _intake_key(obj)
+        if key is None:
+            return dumps_canonical(obj)
+        frag = self._intake_fragments.get(key)
+        if frag is None:
+            frag = dumps_canonical(obj)
+            if len(self._intake_fragments) < _MAX_FRAGMENTS:
+                self._intake_fragments[key] = frag
+        return frag
+
+    def _visit(self, d: dict[str, Any]) -> str | None:
+        if d.keys() != _VISIT_KEYS:
+            return None
+        intents = _str_list(d["intents"])
+        if intents is None:
+            return None
+        return (
+            '{"intake_extracted":'
+            + self._intake(d["intake_extracted"])
+            + ',"intents":'
+            + intents
+            + ',"occurred_at":'
+            + _enc_str(d["occurred_at"])
+            + ',"patient_ref":'
+            + _enc_str(d["patient_ref"])
+            + ',"primary_domain":'
+            + _enc_str(d["primary_domain"])
+            + ',"visit_ref":'
+            + _enc_str(d["visit_ref"])
+            + "}"
+        )
+
+    def _payload(self, payload: Any) -> str | None:
+        if type(payload) is not dict or len(payload) != 1:
+            return None
+        if "intake_extracted" in payload:
+            return '{"intake_extracted":' + self._intake(payload["intake_extracted"]) + "}"
+        if "items" in payload:
+            items = payload["items"]
+            if type(items) is not list:
+                return None
+            parts: list[str] = []
+            for item in items:
+                if type(item) is not dict or item.keys() != _ITEM_KEYS:
+                    return None
+                qty = item["qty"]
+                if type(qty) is not int:
+                    return None
+                parts.append(
+                    '{"qty":' + int.__repr__(qty) + ',"sku":' + _enc_str(item["sku"]) + "}"
+                )
+            return '{"items":[' + ",".join(parts) + "]}"
+        if "rx_medications" in payload:
+            meds = _str_list(payload["rx_medications"])
+            return None if meds is None else '{"rx_medications":' + meds + "}"
+        return None
+
+    def _event(self, d: dict[str, Any]) -> str | None:
+        if d.keys() != _EVENT_KEYS:
+            return None
+        payload = self._payload(d["payload"])
+        if payload is None:
+            payload = dumps_canonical(d["payload"])
+        return (
+            '{"event_ref":'
+            + _enc_str(d["event_ref"])
+            + ',"event_type":'
+            + _enc_str(d["event_type"])
+            + ',"occurred_at":'
+            + _enc_str(d["occurred_at"])
+            + ',"patient_ref":'
+            + _enc_str(d["patient_ref"])
+            + ',"payload":'
+            + payload
+            + ',"visit_ref":'
+            + _enc_str(d["visit_ref"])
+            + "}"
+        )
+
+    def _patient(self, d: dict[str, Any]) -> str | None:
+        if d.keys() != _PATIENT_KEYS:
+            return None
+        return (
+            '{"llm_context":'
+            + dumps_canonical(d["llm_context"])
+            + ',"patient_ref":'
+            + _enc_str(d["patient_ref"])
+            + "}"
+        )
+
+
+def record_encoder(name: EncoderName = "fast") -> RecordEncodeFn:
+    """Return a `(kind, data) -> line` encoder; `json` is the reference implementation."""
+    if name == "json":
+        return lambda kind, data: dumps_canonical(data)
+    if name == "fast":
+        return FastRecordEncoder().encode
+    raise ValueError(f"Unsupported encoder: {name}")
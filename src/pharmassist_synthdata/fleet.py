@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, get_args
+
+from .sim_year import Mode, RngMode, _check_modes, default_params, generate_pharmacy_year
+
+INDEX_FILENAME = "fleet_index.json"
+
+
+@dataclass(frozen=True)
+class FleetJob:
+    pharmacy: str
+    year: int
+    seed: int
+    mode: Mode = "full"
+    rng_mode: RngMode = "v1"
+
+    @property
+    def name(self) -> str:
+        return f"{self.pharmacy}_{self.year}_{self.seed:06d}"
+
+
+def parse_job_spec(spec: str) -> FleetJob:
+    """Parse a `PHARMACY:YEAR:SEED` job spec (as accepted by `fleet --job`)."""
+    parts = spec.split(":")
+    if len(parts) != 3:
+        raise ValueError(f"Invalid job spec (expected PHARMACY:YEAR:SEED): {spec}")
+    pharmacy, year, seed = parts
+    return FleetJob(pharmacy=pharmacy, year=int(year), seed=int(seed))
+
+
+def load_jobs(path: Path) -> list[FleetJob]:
+    """Load jobs from a JSON list of `{"pharmacy", "year", "seed", ["mode"], ["rng_mode"]}`."""
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(payload, list):
+        raise ValueError("Jobs file must contain a JSON list")
+
+    jobs: list[FleetJob] = []
+    for idx, row in enumerate(payload):
+        if not isinstance(row, dict):
+            raise ValueError(f"Invalid job #{idx} (expected object)")
+        mode = row.get("mode", "full")
+        rng_mode = row.get("rng_mode", "v1")
+        if mode not in get_args(Mode):
+            raise ValueError(f"Invalid job #{idx}: unknown mode {mode!r}")
+        if rng_mode not in get_args(RngMode):
+            raise ValueError(f"Invalid job #{idx}: unknown rng_mode {rng_mode!r}")
+        try:
+            # Same combination rules as `generate_pharmacy_year`, checked before any work.
+            _check_modes(mode=mode, rng_mode=rng_mode, workers=1)
+            job = FleetJob(
+                pharmacy=str(row["pharmacy"]),
+                year=int(row["year"]),
+                seed=int(row["seed"]),
+                mode=mode,
+                rng_mode=rng_mode,
+            )
+        except KeyError as exc:
+            raise ValueError(f"Invalid job #{idx}: missing {exc.args[0]!r}") from None
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid job #{idx}: {exc}") from None
+        jobs.append(job)
+    return jobs
+
+
+def _run_job(job: FleetJob, out_dir: Path) -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        rows = generate_pharmacy_year(
+            seed=job.seed,
+            pharmacy=job.pharmacy,
+            year=job.year,
+            out_dir=out_dir,
+            mode=job.mode,
+            rng_mode=job.rng_mode,
+        )
+    except Exception as exc:
+        return {
+            "status": "failed",
+            "error": f"{type(exc).__name__}: {exc}",
+            "traceback": traceback.format_exc(),
+            "wall_s": round(time.perf_counter() - started, 3),
+        }
+    return {"status": "ok", "rows": rows, "wall_s": round(time.perf_counter() - started, 3)}
+
+
+def _write_index(path: Path, entries: dict[str, dict[str, Any]]) -> None:
+    index = {
+        "schema_version": "0.0.0",
+        "jobs": [entries[name] for name in sorted(entries)],
+    }
+    # Write-then-rename so a crash never leaves a truncated index behind.
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(
+        json.dumps(index, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+    )
+    os.replace(tmp, path)
+
+
+def run_fleet(
+    jobs: list[FleetJob],
+    *,
+    out_dir: Path,
+    workers: int = 1,
+) -> dict[str, Any]:
+    """Run sim-year jobs on a bounded process pool; one sub-directory per job.
+
+    The index (`fleet_index.json`) is rewritten as each job finishes, so completed jobs stay
+    recorded even if another job fails or the run is interrupted.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate fleet jobs (same pharmacy/year/seed)")
+    for job in jobs:
+        # Fail fast on typos instead of after hours of scheduled work.
+        default_params(pharmacy=job.pharmacy)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    index_path = out_dir / INDEX_FILENAME
+    entries: dict[str, dict[str, Any]] = {
+        job.name: {**asdict(job), "name": job.name, "dir": job.name, "status": "pending"}
+        for job in jobs
+    }
+    _write_index(index_path, entries)
+
+    def record(job: FleetJob, result: dict[str, Any]) -> None:
+        entries[job.name].update(result)
+        _write_index(index_path, entries)
+
+    if workers == 1:
+        for job in jobs:
+            record(job, _run_job(job, out_dir / job.name))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures: dict[Future[dict[str, Any]], FleetJob] = {
+                executor.submit(_run_job, job, out_dir / job.name): job for job in jobs
+            }
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:  # e.g. a worker killed by the OOM killer
+                    result = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+                record(job, result)
+
+    return json.loads(index_path.read_text(encoding="utf-8"))
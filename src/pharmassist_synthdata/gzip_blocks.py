@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import bisect
+import gzip
+import json
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import TracebackType
+
+from .profiling import stage
+from .writers import DEFAULT_COMPRESSLEVEL
+
+# Uncompressed characters (not bytes: lines are str, and measuring their UTF-8 length would
+# cost an encode per record) per block. Blocks always end on a record boundary, so a block
+# is "at least block_size" characters except for the last one; `GzipBlock.size` is in bytes.
+DEFAULT_BLOCK_SIZE = 1 << 20
+INDEX_SUFFIX = ".blocks.json"
+
+
+@dataclass(frozen=True)
+class GzipBlock:
+    """One independent gzip member of a block-gzip JSONL file."""
+
+    offset: int  # byte offset of the member in the file
+    length: int  # compressed size of the member
+    size: int  # uncompressed size
+    rows: int
+    first_ref: str | None  # ref of the first record in the block (for range lookups)
+
+
+def index_path_for(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+@dataclass(frozen=True)
+class PackedBlock:
+    """A compressed block that has not been placed in a file yet."""
+
+    rows: int
+    first_ref: str | None
+    size: int
+    member: bytes
+
+
+def compress_blocks(
+    records: Iterable[tuple[str, str | None]],
+    *,
+    block_size: int | None = DEFAULT_BLOCK_SIZE,
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+) -> list[PackedBlock]:
+    """Split `(line, ref)` pairs into record-aligned blocks and gzip each one (in-process).
+
+    `block_size=None` packs everything into a single block. Used by shard workers; offsets
+    are assigned when the parent appends the members.
+    """
+    out: list[PackedBlock] = []
+    parts: list[str] = []
+    first_ref: str | None = None
+    size = 0
+    for line, ref in records:
+        if not parts:
+            first_ref = ref
+        parts.append(line)
+        size += len(line) + 1
+        if block_size is not None and size >= block_size:
+            out.append(_pack(parts, first_ref, compresslevel))
+            parts = []
+            size = 0
+    if parts:
+        out.append(_pack(parts, first_ref, compresslevel))
+    return out
+
+
+@stage("gzip.compress")
+def _pack(lines: list[str], first_ref: str | None, compresslevel: int) -> PackedBlock:
+    data = ("\n".join(lines) + "\n").encode("utf-8")
+    member = gzip.compress(data, compresslevel=compresslevel, mtime=0)
+    return PackedBlock(rows=len(lines), first_ref=first_ref, size=len(data), member=member)
+
+
+class BlockIndexBuilder:
+    """Append pre-compressed blocks to a file while tracking their offsets."""
+
+    def __init__(self, path: Path, *, block_size: int) -> None:
+        self.path = path
+        self.block_size = block_size
+        self.blocks: list[GzipBlock] = []
+        self._f = path.open("wb")
+        self._offset = 0
+
+    def append(self, block: PackedBlock) -> None:
+        self._f.write(block.member)
+        self.blocks.append(
+            GzipBlock(
+                offset=self._offset,
+                length=len(block.member),
+                size=block.size,
+                rows=block.rows,
+                first_ref=block.first_ref,
+            )
+        )
+        self._offset += len(block.member)
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.close()
+        write_block_index(self.path, self.blocks, block_size=self.block_size)
+
+
+class BlockGzipWriter:
+    """BGZF-style JSONL writer: independent gzip members of ~`block_size` uncompressed chars.
+
+    Any gzip reader sees one stream (concatenated members). The sidecar index
+    (`<file>.blocks.json`) lists each member's offset and first record ref, so blocks can be
+    decompressed in parallel or fetched at random. Blocks are compressed on a small thread
+    pool (zlib releases the GIL) and written in order; output bytes do not depend on
+    `threads`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        compresslevel: int = DEFAULT_COMPRESSLEVEL,
+        threads: int = 4,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be > 0")
+        self._out = BlockIndexBuilder(path, block_size=block_size)
+        self._block_size = block_size
+        self._compresslevel = compresslevel
+        self._threads = max(1, threads)
+        self._pool = ThreadPoolExecutor(max_workers=self._threads)
+        self._inflight: deque[Future[PackedBlock]] = deque()
+        self._parts: list[str] = []
+        self._first_ref: str | None = None
+        self._size = 0
+        self._closed = False
+
+    @property
+    def blocks(self) -> list[GzipBlock]:
+        return self._out.blocks
+
+    def write_record(self, line: str, ref: str | None) -> None:
+        """Write one JSONL record (without trailing newline) and its ref."""
+        if self._closed:
+            raise ValueError("write to closed writer")
+        if not self._parts:
+            self._first_ref = ref
+        self._parts.append(line)
+        self._size += len(line) + 1
+        if self._size >= self._block_size:
+            self._submit()
+
+    def _submit(self) -> None:
+        if not self._parts:
+            return
+        parts, first_ref = self._parts, self._first_ref
+        self._parts = []
+        self._size = 0
+        self._inflight.append(self._pool.submit(_pack, parts, first_ref, self._compresslevel))
+        # Bound memory: at most ~2 blocks per thread are waiting to be written.
+        while len(self._inflight) > 2 * self._threads:
+            self._out.append(self._inflight.popleft().result())
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._submit()
+            while self._inflight:
+                self._out.append(self._inflight.popleft().result())
+        finally:
+            self._pool.shutdown(wait=True)
+            self._out.close()
+
+    def __enter__(self) -> BlockGzipWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def write_block_index(path: Path, blocks: list[GzipBlock], *, block_size: int) -> None:
+    index = {
+        "schema_version": "0.0.0",
+        "file": path.name,
+        "block_size": block_size,
+        "blocks": [asdict(b) for b in blocks],
+    }
+    index_path_for(path).write_text(
+        json.dumps(index, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+    )
+
+
+def load_block_index(path: Path) -> list[GzipBlock]:
+    """Load the block index of a block-gzip file (`path` is the `.jsonl.gz` file)."""
+    index = json.loads(index_path_for(path).read_text(encoding="utf-8"))
+    return [GzipBlock(**b) for b in index["blocks"]]
+
+
+def find_block(blocks: list[GzipBlock], ref: str) -> int:
+    """Index of the block that would contain `ref`.
+
+    Relies on refs sorting like the file (zero-padded `visit_...`/`ev_...` refs do).
+    """
+    keys = [b.first_ref or "" for b in blocks]
+    return max(0, bisect.bisect_right(keys, ref) - 1)
+
+
+def read_block(path: Path, block: GzipBlock) -> list[str]:
+    """Decompress one block and return its JSONL lines."""
+    with path.open("rb") as f:
+        f.seek(block.offset)
+        member = f.read(block.length)
+    # Not `splitlines()`: JSON strings may hold U+2028, U+0085, ... unescaped.
+    lines = gzip.decompress(member).decode("utf-8").split("\n")
+    lines.pop()  # every block ends with a newline
+    return lines
+
+
+def iter_block_lines(
+    path: Path,
+    *,
+    blocks: list[GzipBlock] | None = None,
+    workers: int = 1,
+) -> Iterator[str]:
+    """Yield the lines of `blocks` (default: all) in file order, decompressing in parallel."""
+    if blocks is None:
+        blocks = load_block_index(path)
+    if workers <= 1:
+        for block in blocks:
+            yield from read_block(path, block)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        inflight: deque[Future[list[str]]] = deque()
+        for block in blocks:
+            inflight.append(pool.submit(read_block, path, block))
+            if len(inflight) > 2 * workers:
+                yield from inflight.popleft().result()
+        while inflight:
+            yield from inflight.popleft().result()
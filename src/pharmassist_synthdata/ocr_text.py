@@ -5,6 +5,8 @@ import re
 import unicodedata
 from typing import Any, Literal
 
+from .profiling import stage
+
 
 def _strip_accents(text: str) -> str:
     # OCR outputs often lose accents; keep output mostly ASCII for reproducible parsing.
@@ -12,6 +14,7 @@ def _strip_accents(text: str) -> str:
     return "".join(ch for ch in norm if not unicodedata.combining(ch))
 
 
+@stage("ocr.render")
 def render_intake_text(bundle: dict[str, Any], language: Literal["fr", "en"]) -> str:
     """Render a PHI-free intake text (note-like) from structured synthetic ground truth."""
     llm_context = bundle.get("llm_context") or {}
@@ -95,6 +98,7 @@ def render_intake_text(bundle: dict[str, Any], language: Literal["fr", "en"]) ->
     return "\n".join(lines).strip() + "\n"
 
 
+@stage("ocr.noise")
 def apply_ocr_noise(
     text: str, seed: int, level: Literal["mild", "medium", "hard"] = "medium"
 ) -> str:
@@ -3,9 +3,12 @@ from __future__ import annotations
 import random
 from typing import Any
 
+from .profiling import stage
+
 SCHEMA_VERSION = "0.0.0"
 
 
+@stage("patient.generate")
 def generate_patient(seed: int) -> dict[str, Any]:
     """Generate a PHI-free llm_context-compatible patient bundle."""
     # Hand-authored special cases used by downstream fixture suites.
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from array import array
+from typing import Any
+
+from .sampler import WeightedSampler
+
+
+class PatientPool:
+    """Active patients of a pharmacy with preferential-attachment weights.
+
+    Patients live in slots of a `WeightedSampler` (weight = 1 + returning visits). When a
+    patient churns, their slot drops to weight 0 and is reused by the next new patient, so
+    memory and draw cost follow the active pool size rather than every patient ever seen.
+    Without churn, slot == patient number and draws match a plain `WeightedSampler`.
+
+    Patients are plain integers in `array("q")` buffers (refs such as `pt_000042` are only
+    formatted when a record is written), about 24 bytes per patient in total.
+    """
+
+    __slots__ = ("_sampler", "_ids", "_free")
+
+    def __init__(self, initial_patients: int = 0) -> None:
+        self._sampler = WeightedSampler([1] * initial_patients)
+        self._ids = array("q", range(initial_patients))
+        self._free = array("q")
+
+    def __len__(self) -> int:
+        """Number of active patients."""
+        return len(self._ids) - len(self._free)
+
+    @property
+    def slots(self) -> int:
+        return len(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the pool's buffers."""
+        return self._sampler.nbytes + (len(self._ids) + len(self._free)) * self._ids.itemsize
+
+    def add(self, patient_n: int) -> None:
+        """Register a new patient (weight 1), reusing a churned slot when there is one."""
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = patient_n
+            self._sampler.add(slot, 1)
+        else:
+            self._sampler.append(1)
+            self._ids.append(patient_n)
+
+    def visit(self, rng: random.Random) -> int:
+        """Pick a returning patient by weight, bump their weight and return their number."""
+        slot = self._sampler.sample(rng)
+        self._sampler.add(slot, 1)
+        return self._ids[slot]
+
+    def churn(self, rng: random.Random, p: float) -> int:
+        """Drop each active patient with probability `p` (one draw per slot); return count."""
+        sampler = self._sampler
+        free = set(self._free)
+        dropped = 0
+        for slot in range(len(self._ids)):
+            if slot in free:
+                continue
+            if rng.random() < p:
+                sampler.add(slot, -sampler.weight(slot))
+                self._free.append(slot)
+                dropped += 1
+        return dropped
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "weights": self._sampler.weights(),
+            "ids": self._ids.tolist(),
+            "free": self._free.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any]) -> PatientPool:
+        pool = cls()
+        pool._sampler = WeightedSampler(payload["weights"])
+        pool._ids = array("q", payload["ids"])
+        pool._free = array("q", payload["free"])
+        return pool
@@ -9,6 +9,7 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 
 from .case_bundle import generate_case_bundle
+from .profiling import stage
 
 Language = Literal["fr", "en"]
 PhiMode = Literal["present", "free"]
@@ -18,6 +19,7 @@ def _sha256_12(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()[:12]
 
 
+@stage("pdf.lines")
 def _lines_for_pdf(*, seed: int, language: Language, phi_mode: PhiMode) -> list[str]:
     bundle = generate_case_bundle(seed=seed)
     case_ref = str(bundle.get("case_ref") or f"case_{seed:06d}")
@@ -64,6 +66,7 @@ def _lines_for_pdf(*, seed: int, language: Language, phi_mode: PhiMode) -> list[
     return lines
 
 
+@stage("pdf.render")
 def _write_text_layer_pdf(*, path: Path, lines: list[str]) -> None:
     # invariant=1 makes reportlab output deterministic (no current-time stamps).
     c = canvas.Canvas(str(path), pagesize=A4, invariant=1, pageCompression=1)
@@ -98,6 +101,7 @@ def _default_case_seeds(seed: int) -> tuple[int, ...]:
     return (seed, seed + 59, seed + 60)
 
 
+@stage("pdf.total")
 def generate_prescription_pdf_suite(
     *,
     out_dir: Path,
@@ -0,0 +1,220 @@
+"""Opt-in per-stage timing for the generators.
+
+Stages are named `<generator>.<stage>` (e.g. `sim_year.patient`, `validate.instance`) and
+timed inclusively: a stage's time includes the stages it calls. Instrumentation is off
+unless a `profiling()` block is active:
+
+    with profiling() as prof:
+        generate_pharmacy_year(...)
+    report = prof.report()
+
+- `@stage(name)` decorates functions; when off, the wrapper only checks one global.
+- `timed(name, fn)` wraps a callable once (e.g. a per-run encoder); when off it returns
+  `fn` itself, so hot loops pay nothing.
+
+`hook(stage, seconds)` is called after every timed call, on the calling thread. Work done
+in other processes (`workers > 1`) is not captured.
+
+`profiling(memory=True)` also records, per stage, the peak of `tracemalloc`-traced memory
+while the stage ran (`peak_kb`) and its rise above the level at entry (`growth_kb`), plus
+the process RSS high-water mark. Tracing slows everything down severalfold, so time and
+memory figures should come from separate runs. Only calls on the thread that opened the
+block are measured (the background gzip writers are timed but not memory-tracked).
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import Any, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+StageHook = Callable[[str, float], None]
+
+PROFILE_SCHEMA_VERSION = "0.0.0"
+
+
+def rss_peak_bytes() -> int | None:
+    """High-water mark of this process's resident set size (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """Cumulative seconds and call counts per stage (thread-safe), optionally peak memory."""
+
+    def __init__(self, hook: StageHook | None = None, *, memory: bool = False) -> None:
+        self.hook = hook
+        self.memory = memory
+        self.calls: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+        self.peak_bytes: dict[str, int] = {}
+        self.growth_bytes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._owner = threading.get_ident()
+        # Open memory-tracked stages, innermost last: [traced at entry, peak seen so far].
+        self._frames: list[list[int]] = []
+        # Imported on demand: tracemalloc pulls in pickle, tokenize, ... (CLI startup time).
+        self._tracemalloc: ModuleType | None = None
+        if memory:
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+        self._traced_peak = 0
+        self._started = time.perf_counter()
+        self._stopped: float | None = None
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        if self.hook is not None:
+            self.hook(name, seconds)
+
+    def enter(self) -> bool:
+        """Open a memory frame for a stage call; False if this call is not tracked."""
+        tracemalloc = self._tracemalloc
+        if tracemalloc is None or threading.get_ident() != self._owner:
+            return False
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak counter is shared: credit it to the enclosing stage before resetting it.
+        if self._frames:
+            self._frames[-1][1] = max(self._frames[-1][1], peak)
+        self._traced_peak = max(self._traced_peak, peak)
+        self._frames.append([current, current])
+        tracemalloc.reset_peak()
+        return True
+
+    def leave(self, name: str) -> None:
+        """Close the innermost memory frame (opened by `enter`) as stage `name`."""
+        assert self._tracemalloc is not None
+        peak = self._tracemalloc.get_traced_memory()[1]
+        entry, seen = self._frames.pop()
+        top = max(seen, peak)
+        if self._frames:
+            self._frames[-1][1] = max(self._frames[-1][1], top)
+        self._traced_peak = max(self._traced_peak, top)
+        self.peak_bytes[name] = max(self.peak_bytes.get(name, 0), top)
+        self.growth_bytes[name] = max(self.growth_bytes.get(name, 0), top - entry)
+
+    def stop(self) -> None:
+        self._stopped = time.perf_counter()
+        tracemalloc = self._tracemalloc
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            self._traced_peak = max(self._traced_peak, tracemalloc.get_traced_memory()[1])
+
+    def report(self) -> dict[str, Any]:
+        end = self._stopped if self._stopped is not None else time.perf_counter()
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": self.calls[name],
+                    "total_s": round(self.seconds[name], 6),
+                    "mean_us": round(self.seconds[name] / self.calls[name] * 1e6, 3),
+                }
+                for name in self.calls
+            }
+        report: dict[str, Any] = {
+            "schema_version": PROFILE_SCHEMA_VERSION,
+            "wall_s": round(end - self._started, 6),
+            "stages": stages,
+        }
+        if self.memory:
+            for name, peak in self.peak_bytes.items():
+                stages[name]["peak_kb"] = round(peak / 1024, 1)
+                stages[name]["growth_kb"] = round(self.growth_bytes[name] / 1024, 1)
+            rss = rss_peak_bytes()
+            report["memory"] = {
+                "traced_peak_kb": round(self._traced_peak / 1024, 1),
+                "rss_peak_kb": None if rss is None else round(rss / 1024, 1),
+            }
+        return report
+
+    def write(self, path: Path) -> None:
+        path.write_text(
+            json.dumps(self.report(), ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+
+
+_active: Profiler | None = None
+
+
+def active_profiler() -> Profiler | None:
+    return _active
+
+
+@contextmanager
+def profiling(hook: StageHook | None = None, *, memory: bool = False) -> Iterator[Profiler]:
+    """Enable stage timing (and with `memory`, tracing) for the block (not re-entrant)."""
+    global _active
+    if _active is not None:
+        raise RuntimeError("profiling() is already active")
+    prof = Profiler(hook, memory=memory)
+    tracemalloc = prof._tracemalloc
+    own_tracing = tracemalloc is not None and not tracemalloc.is_tracing()
+    if own_tracing:
+        tracemalloc.start()
+    _active = prof
+    try:
+        yield prof
+    finally:
+        _active = None
+        prof.stop()
+        if own_tracing:
+            tracemalloc.stop()
+
+
+def _call(prof: Profiler, name: str, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+    tracked = prof.memory and prof.enter()
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - started
+        if tracked:
+            prof.leave(name)
+        prof.record(name, seconds)
+
+
+def stage(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator: time every call of the function as stage `name` while profiling."""
+
+    def decorate(fn: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            prof = _active
+            if prof is None:
+                return fn(*args, **kwargs)
+            return _call(prof, name, fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def timed(name: str, fn: Callable[P, R]) -> Callable[P, R]:
+    """`fn` timed as stage `name` if profiling is active now, else `fn` unchanged."""
+    prof = _active
+    if prof is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return _call(prof, name, fn, *args, **kwargs)
+
+    return wrapper
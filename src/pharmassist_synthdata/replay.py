@@ -0,0 +1,278 @@
+"""Replay sim-year outputs as one chronological stream, paced for load tests.
+
+`iter_merged` k-way merges the dated files of a sim-year directory by `occurred_at`, holding
+one line per file in memory. `replay` sends the merged lines to a sink at `speed` simulated
+seconds per wall-clock second (86400 = one simulated day per second). Records only carry a
+date, so each day's records are spread evenly over that day's wall-clock slot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import heapq
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date
+from itertools import dropwhile, groupby, takewhile
+from pathlib import Path
+from typing import Any, BinaryIO, Protocol
+from urllib.parse import urlsplit
+
+from .constants import REPLAY_FILES, SECONDS_PER_DAY
+
+_OCCURRED_AT = b'"occurred_at":"'
+
+
+@dataclass(frozen=True)
+class ReplayLine:
+    occurred_at: str  # YYYY-MM-DD
+    kind: str  # file stem ("visits", "events")
+    line: bytes  # the JSONL line as stored, without the trailing newline
+
+
+def _occurred_at(line: bytes) -> str:
+    # Both encoders write compact JSON, so a substring scan avoids a full parse per line.
+    i = line.find(_OCCURRED_AT)
+    if i >= 0:
+        start = i + len(_OCCURRED_AT)
+        return line[start : start + 10].decode("ascii")
+    return str(json.loads(line)["occurred_at"])[:10]
+
+
+def _iter_file(path: Path, kind: str) -> Iterator[ReplayLine]:
+    previous = ""
+    with gzip.open(path, "rb") as f:
+        for raw in f:
+            line = raw.rstrip(b"\n")
+            if not line:
+                continue
+            occurred_at = _occurred_at(line)
+            if occurred_at < previous:
+                raise ValueError(f"{path} is not sorted by occurred_at ({occurred_at})")
+            previous = occurred_at
+            yield ReplayLine(occurred_at, kind, line)
+
+
+def iter_merged(data_dir: Path, *, files: Iterable[str] = REPLAY_FILES) -> Iterator[ReplayLine]:
+    """Lines of the given `<stem>.jsonl.gz` files merged by `occurred_at` (stable, lazy)."""
+    streams = []
+    for kind in files:
+        path = data_dir / f"{kind}.jsonl.gz"
+        if not path.exists():
+            raise ValueError(f"Missing replay input: {path}")
+        streams.append(_iter_file(path, kind))
+    # heapq.merge keeps one pending line per stream and breaks ties by stream order.
+    return heapq.merge(*streams, key=lambda r: r.occurred_at)
+
+
+class ReplaySink(Protocol):
+    async def send(self, line: bytes) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class StreamSink:
+    """NDJSON to a binary file object (stdout or a local file)."""
+
+    def __init__(self, f: BinaryIO, *, owned: bool = False) -> None:
+        self._f = f
+        self._owned = owned
+
+    async def send(self, line: bytes) -> None:
+        self._f.write(line + b"\n")
+
+    async def close(self) -> None:
+        self._f.flush()
+        if self._owned:
+            self._f.close()
+
+
+class SocketSink:
+    """NDJSON over a TCP connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> SocketSink:
+        _, writer = await asyncio.open_connection(host, port)
+        return cls(writer)
+
+    async def send(self, line: bytes) -> None:
+        self._writer.write(line + b"\n")
+        # Only wait when the transport buffer is over its high-water mark.
+        await self._writer.drain()
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+class HttpSink:
+    """One `POST` per record over a keep-alive HTTP/1.1 connection (stand-in for the API).
+
+    Non-2xx responses are counted in `errors`; the replay carries on.
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *, host: str, path: str
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._host = host
+        self._path = path
+        self.errors = 0
+
+    @classmethod
+    async def connect(cls, url: str) -> HttpSink:
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Unsupported HTTP sink URL: {url}")
+        port = parts.port or 80
+        reader, writer = await asyncio.open_connection(parts.hostname, port)
+        return cls(reader, writer, host=f"{parts.hostname}:{port}", path=parts.path or "/")
+
+    async def send(self, line: bytes) -> None:
+        head = (
+            f"POST {self._path} HTTP/1.1\r\nHost: {self._host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(line)}\r\n\r\n"
+        )
+        self._writer.write(head.encode("ascii") + line)
+        await self._writer.drain()
+
+        status = await self._reader.readline()
+        length = 0
+        while True:
+            header = await self._reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.partition(b":")
+            if name.strip().lower() == b"content-length":
+                length = int(value)
+        if length:
+            await self._reader.readexactly(length)
+        parts = status.split(b" ", 2)
+        if len(parts) < 2 or not parts[1].startswith(b"2"):
+            self.errors += 1
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def open_sink(target: str) -> ReplaySink:
+    """Sink from a target string: `-` (stdout), `file:PATH`, `tcp:HOST:PORT` or `http://...`."""
+    if target == "-":
+        return StreamSink(sys.stdout.buffer)
+    if target.startswith("file:"):
+        return StreamSink(Path(target[5:]).open("wb"), owned=True)
+    if target.startswith("tcp:"):
+        host, _, port = target[4:].rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Expected tcp:HOST:PORT, got {target!r}")
+        return await SocketSink.connect(host, int(port))
+    if target.startswith("http://"):
+        return await HttpSink.connect(target)
+    raise ValueError(f"Unsupported replay sink: {target!r}")
+
+
+@dataclass(frozen=True)
+class ReplayReport:
+    records: int
+    days: int
+    speed: float
+    elapsed_s: float
+    target_rate: float | None  # records/s the schedule asked for (None when unpaced)
+    achieved_rate: float
+    errors: int = 0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "records": self.records,
+            "days": self.days,
+            "speed": self.speed,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "target_rate": None if self.target_rate is None else round(self.target_rate, 1),
+            "achieved_rate": round(self.achieved_rate, 1),
+            "errors": self.errors,
+        }
+
+
+async def replay(lines: Iterable[ReplayLine], sink: ReplaySink, *, speed: float) -> ReplayReport:
+    """Send `lines` (in `occurred_at` order) to `sink`, paced at `speed` (0 = unpaced).
+
+    Day d starts `(d - first day) * 86400 / speed` seconds after the start and its records
+    are spread evenly over the day's slot. When the sink falls behind, records are sent back
+    to back until the schedule is caught up, so the achieved rate shows the sink's limit.
+    Only one day of records is buffered. `sink` is closed when the replay ends, even on error.
+    """
+    try:
+        if speed < 0:
+            raise ValueError("speed must be >= 0")
+        loop = asyncio.get_running_loop()
+        day_s = SECONDS_PER_DAY / speed if speed else 0.0
+        started = loop.time()
+        sent = 0
+        first_day: date | None = None
+        last_day: date | None = None
+        for occurred_at, group in groupby(lines, key=lambda r: r.occurred_at):
+            batch = list(group)
+            day = date.fromisoformat(occurred_at)
+            if first_day is None:
+                first_day = day
+            last_day = day
+            day_start = started + (day - first_day).days * day_s
+            step = day_s / len(batch)
+            for i, rec in enumerate(batch):
+                if day_s:
+                    delay = day_start + i * step - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await sink.send(rec.line)
+            sent += len(batch)
+        # Pacing covers the last day's whole slot, so back-to-back runs keep their cadence.
+        days = 0 if first_day is None or last_day is None else (last_day - first_day).days + 1
+        if day_s:
+            remaining = started + days * day_s - loop.time()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        elapsed = loop.time() - started
+    finally:
+        await sink.close()
+    return ReplayReport(
+        records=sent,
+        days=days,
+        speed=speed,
+        elapsed_s=elapsed,
+        target_rate=sent / (days * day_s) if day_s and days else None,
+        achieved_rate=sent / elapsed if elapsed > 0 else 0.0,
+        errors=getattr(sink, "errors", 0),
+    )
+
+
+def replay_dataset(
+    data_dir: Path,
+    *,
+    sink: str = "-",
+    speed: float = SECONDS_PER_DAY,
+    files: Iterable[str] = REPLAY_FILES,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> ReplayReport:
+    """Replay a sim-year directory to `sink` (see `open_sink`) and return the rate report."""
+    lines: Iterable[ReplayLine] = iter_merged(data_dir, files=files)
+    if date_from is not None:
+        lo = date_from.isoformat()
+        lines = dropwhile(lambda r: r.occurred_at < lo, lines)
+    if date_to is not None:
+        hi = date_to.isoformat()
+        lines = takewhile(lambda r: r.occurred_at <= hi, lines)
+
+    async def run() -> ReplayReport:
+        # `replay` closes the sink, also when reading the dataset or sending fails.
+        return await replay(lines, await open_sink(sink), speed=speed)
+
+    return asyncio.run(run())
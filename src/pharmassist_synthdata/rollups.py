@@ -0,0 +1,115 @@
+"""Aggregates of a sim-year dataset, accumulated while it is generated.
+
+`Rollups.observe` sees every record once (same observer shape as `stock.StockLedger`) and
+only bumps counters, so dashboards and calibration checks can read three small JSON files
+instead of decompressing `visits.jsonl.gz`:
+
+- `rollup_daily_domain.json`: visits per day and primary domain;
+- `rollup_intents.json`: visits per intent and per intent combination;
+- `rollup_patient_visits.json`: how many patients had 0, 1, 2, ... visits.
+
+Partial rollups (e.g. one per month shard) combine with `merge`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from .profiling import stage
+
+ROLLUP_FILES = {
+    "daily_domain": "rollup_daily_domain.json",
+    "intents": "rollup_intents.json",
+    "patient_visits": "rollup_patient_visits.json",
+}
+ROLLUP_SCHEMA_VERSION = "0.0.0"
+
+
+class Rollups:
+    __slots__ = ("daily_domain", "intents", "intent_mix", "visits_per_patient", "patients")
+
+    def __init__(self) -> None:
+        self.daily_domain: dict[str, Counter[str]] = {}
+        self.intents: Counter[str] = Counter()
+        self.intent_mix: Counter[str] = Counter()
+        self.visits_per_patient: Counter[str] = Counter()
+        self.patients = 0
+
+    def observe(self, kind: str, data: dict[str, Any]) -> None:
+        if kind == "visit":
+            day = self.daily_domain.get(data["occurred_at"])
+            if day is None:
+                day = self.daily_domain[data["occurred_at"]] = Counter()
+            day[data["primary_domain"]] += 1
+            intents = data["intents"]
+            self.intents.update(intents)
+            self.intent_mix["+".join(sorted(intents))] += 1
+            self.visits_per_patient[data["patient_ref"]] += 1
+        elif kind == "patient":
+            self.patients += 1
+
+    def merge(self, other: Rollups) -> None:
+        for day, counts in other.daily_domain.items():
+            self.daily_domain.setdefault(day, Counter()).update(counts)
+        self.intents.update(other.intents)
+        self.intent_mix.update(other.intent_mix)
+        self.visits_per_patient.update(other.visits_per_patient)
+        self.patients += other.patients
+
+    @property
+    def visits(self) -> int:
+        return sum(self.intent_mix.values())
+
+    def to_files(self) -> dict[str, dict[str, Any]]:
+        """File name -> JSON payload of the three rollup tables."""
+        distribution = Counter(self.visits_per_patient.values())
+        # Patients who never came back in the stream (e.g. part of the initial pool).
+        never = self.patients - len(self.visits_per_patient)
+        if never > 0:
+            distribution[0] = never
+        domains = sorted({d for counts in self.daily_domain.values() for d in counts})
+        return {
+            ROLLUP_FILES["daily_domain"]: {
+                "schema_version": ROLLUP_SCHEMA_VERSION,
+                "domains": domains,
+                "days": {
+                    day: dict(sorted(counts.items()))
+                    for day, counts in sorted(self.daily_domain.items())
+                },
+            },
+            ROLLUP_FILES["intents"]: {
+                "schema_version": ROLLUP_SCHEMA_VERSION,
+                "visits": self.visits,
+                "intents": dict(sorted(self.intents.items())),
+                "combinations": dict(sorted(self.intent_mix.items())),
+            },
+            ROLLUP_FILES["patient_visits"]: {
+                "schema_version": ROLLUP_SCHEMA_VERSION,
+                "patients": max(self.patients, len(self.visits_per_patient)),
+                # JSON keys are strings; "3": 120 means 120 patients had 3 visits.
+                "distribution": {str(n): distribution[n] for n in sorted(distribution)},
+            },
+        }
+
+    def write(self, out_dir: Path) -> None:
+        for name, payload in self.to_files().items():
+            (out_dir / name).write_text(
+                json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+                encoding="utf-8",
+            )
+
+
+@stage("rollups.scan")
+def rollups_from_files(out_dir: Path) -> Rollups:
+    """Rollups of an already written dataset (scans `patients` and `visits`)."""
+    rollups = Rollups()
+    for kind, name in (("patient", "patients.jsonl.gz"), ("visit", "visits.jsonl.gz")):
+        with gzip.open(out_dir / name, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    rollups.observe(kind, json.loads(line))
+    return rollups
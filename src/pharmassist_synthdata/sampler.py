@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import random
+from array import array
+from collections.abc import Iterable
+
+
+class WeightedSampler:
+    """Growable weighted sampler backed by a Fenwick (binary indexed) tree.
+
+    Draws, weight bumps and appends are all O(log n). Weights are non-negative ints
+    (preferential-attachment counts), which keeps prefix sums exact. Both the tree and the
+    weights are stored as `array("q")` (8 bytes per item instead of a list slot plus an int
+    object), so pools of millions of items stay compact.
+
+    `sample(rng)` consumes exactly one `rng.random()` and returns the same index as
+    `rng.choices(range(n), weights=weights, k=1)[0]`, so swapping it in for the
+    linear-time `choices` call keeps seeded outputs byte-identical.
+    """
+
+    __slots__ = ("_tree", "_weights", "_total")
+
+    def __init__(self, weights: Iterable[int] = ()) -> None:
+        self._weights = array("q", weights)
+        if any(w < 0 for w in self._weights):
+            raise ValueError("weights must be non-negative")
+        self._total = sum(self._weights)
+        # O(n) bulk build: each node pushes its partial sum to its parent.
+        tree = array("q", [0])
+        tree.extend(self._weights)
+        size = len(tree)
+        for node in range(1, size):
+            parent = node + (node & -node)
+            if parent < size:
+                tree[parent] += tree[node]
+        self._tree = tree
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def weight(self, idx: int) -> int:
+        return self._weights[idx]
+
+    def weights(self) -> list[int]:
+        """Copy of all weights (enough to rebuild an identical sampler)."""
+        return self._weights.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the tree and weight buffers."""
+        return (len(self._tree) + len(self._weights)) * self._weights.itemsize
+
+    def _prefix(self, n: int) -> int:
+        # Sum of the first `n` weights.
+        s = 0
+        tree = self._tree
+        while n > 0:
+            s += tree[n]
+            n &= n - 1
+        return s
+
+    def append(self, weight: int) -> int:
+        """Append a new item and return its index."""
+        if weight < 0:
+            raise ValueError("weights must be non-negative")
+        idx = len(self._weights)
+        node = idx + 1
+        # A Fenwick node covers (node - lowbit(node), node]; everything but the new
+        # item in that range is already in the tree.
+        covered = self._prefix(idx) - self._prefix(node - (node & -node))
+        self._tree.append(covered + weight)
+        self._weights.append(weight)
+        self._total += weight
+        return idx
+
+    def add(self, idx: int, delta: int) -> None:
+        """Add `delta` to the weight of item `idx`."""
+        new_weight = self._weights[idx] + delta
+        if new_weight < 0:
+            raise ValueError("weights must be non-negative")
+        self._weights[idx] = new_weight
+        self._total += delta
+        tree = self._tree
+        size = len(tree)
+        node = idx + 1
+        while node < size:
+            tree[node] += delta
+            node += node & -node
+
+    def find(self, x: float) -> int:
+        """Return the first index whose cumulative weight is strictly greater than `x`.
+
+        Mirrors `bisect.bisect_right(cum_weights, x, 0, n - 1)`: the result is clamped
+        to the last index.
+        """
+        n = len(self._weights)
+        if n == 0:
+            raise IndexError("cannot search an empty sampler")
+        tree = self._tree
+        pos = 0
+        acc = 0
+        step = 1 << (n.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            # int + int stays exact; int <= float compares exactly in Python.
+            if nxt <= n and acc + tree[nxt] <= x:
+                pos = nxt
+                acc += tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+    def sample(self, rng: random.Random) -> int:
+        """Draw an index with probability proportional to its weight."""
+        total = self._total + 0.0
+        if total <= 0.0:
+            raise ValueError("total of weights must be greater than zero")
+        return self.find(rng.random() * total)
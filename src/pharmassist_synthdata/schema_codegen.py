@@ -0,0 +1,299 @@
+"""Compile the vendored JSON Schemas into specialized Python check functions.
+
+`compiled_check(schema_name)` returns a function `check(instance) -> bool` that gives the
+same verdict as `Draft202012Validator(schema).is_valid(instance)` for JSON data, but as
+straight-line Python: `$ref`s are inlined, property names and enums become frozensets,
+patterns are precompiled and type guards are skipped where the schema already fixed the
+type. The source is generated and `exec`-ed on first use, then cached; see
+`generate_check_source` to read it.
+
+Only the keywords the contracts use (plus a few trivial ones) are compiled. `format` is an
+annotation, as it is for a validator without a format checker. A schema using anything
+else, or whose generated source does not compile, falls back to the jsonschema validator's
+`is_valid`, so callers never need to care.
+Issues (paths and messages) still come from jsonschema; this only answers valid/invalid.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from functools import cache
+from numbers import Number
+from typing import Any
+
+from jsonschema import Draft202012Validator
+
+from .contracts import load_schema_by_name, schema_registry
+from .profiling import stage
+
+Check = Callable[[Any], bool]
+Resolver = Any  # referencing's resolver (not exported at the package level)
+
+# Keywords without effect on validity (for a validator without a format checker).
+_ANNOTATIONS = frozenset(
+    {
+        "$schema",
+        "$comment",
+        "$defs",
+        "title",
+        "description",
+        "default",
+        "examples",
+        "format",
+        "deprecated",
+        "readOnly",
+        "writeOnly",
+    }
+)
+_TYPE_TESTS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "number": "(type({v}) in _NUM or isinstance({v}, _Number) and not isinstance({v}, bool))",
+    "integer": (
+        "(type({v}) is int or isinstance({v}, int) and not isinstance({v}, bool)"
+        " or isinstance({v}, float) and {v}.is_integer())"
+    ),
+}
+_STRING_KEYWORDS = ("minLength", "maxLength", "pattern")
+_NUMBER_KEYWORDS = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+_ARRAY_KEYWORDS = ("items", "minItems", "maxItems")
+_OBJECT_KEYWORDS = ("required", "properties", "additionalProperties")
+_HANDLED = frozenset(
+    {"type", "enum", "$ref", "$id"}
+    | set(_STRING_KEYWORDS)
+    | set(_NUMBER_KEYWORDS)
+    | set(_ARRAY_KEYWORDS)
+    | set(_OBJECT_KEYWORDS)
+)
+_COMPARE = {
+    "minimum": "<",
+    "maximum": ">",
+    "exclusiveMinimum": "<=",
+    "exclusiveMaximum": ">=",
+}
+
+
+class _Codegen:
+    def __init__(self, schema_name: str) -> None:
+        self.schema_name = schema_name
+        self.lines: list[str] = []
+        self.consts: dict[str, Any] = {}
+        self._n = 0
+
+    def fresh(self, prefix: str = "v") -> str:
+        self._n += 1
+        return f"{prefix}{self._n}"
+
+    def const(self, value: Any, prefix: str) -> str:
+        name = self.fresh(f"_{prefix}")
+        self.consts[name] = value
+        return name
+
+    def fail_unless(self, test: str, ind: str) -> None:
+        self.lines.append(f"{ind}if not {test}:")
+        self.lines.append(f"{ind}    return False")
+
+    def unsupported(self, what: str) -> ValueError:
+        return ValueError(f"Cannot compile schema {self.schema_name!r}: {what}")
+
+    def node(
+        self, schema: Any, v: str, ind: str, resolver: Resolver, refs: tuple[str, ...], root: bool
+    ) -> None:
+        """Emit statements that `return False` unless `v` is valid against `schema`."""
+        if schema is True:
+            return
+        if schema is False:
+            self.lines.append(f"{ind}return False")
+            return
+        if not isinstance(schema, dict):
+            raise self.unsupported(f"subschema {schema!r}")
+        unknown = set(schema) - _HANDLED - _ANNOTATIONS
+        if unknown:
+            raise self.unsupported(f"keywords {sorted(unknown)}")
+        if "$id" in schema and not root:
+            raise self.unsupported("nested $id")
+
+        known = None
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            if any(t not in _TYPE_TESTS for t in types):
+                raise self.unsupported(f"type {schema['type']!r}")
+            self.fail_unless(" or ".join(_TYPE_TESTS[t].format(v=v) for t in types), ind)
+            if len(types) == 1:
+                known = types[0]
+
+        if "enum" in schema:
+            values = schema["enum"]
+            if not all(isinstance(x, str) for x in values):
+                raise self.unsupported("non-string enum")
+            name = self.const(frozenset(values), "E")
+            if known == "string":
+                self.fail_unless(f"({v} in {name})", ind)
+            else:
+                self.fail_unless(f"(isinstance({v}, str) and {v} in {name})", ind)
+
+        if "$ref" in schema:
+            ref = schema["$ref"]
+            if ref in refs:
+                raise self.unsupported(f"recursive $ref {ref}")
+            resolved = resolver.lookup(ref)
+            self.node(resolved.contents, v, ind, resolved.resolver, (*refs, ref), root=False)
+
+        self._typed(schema, v, ind, known, "string", _STRING_KEYWORDS, self._string)
+        self._typed(schema, v, ind, known, "number", _NUMBER_KEYWORDS, self._number)
+        self._typed(
+            schema,
+            v,
+            ind,
+            known,
+            "array",
+            _ARRAY_KEYWORDS,
+            lambda s, v, ind: self._array(s, v, ind, resolver, refs),
+        )
+        self._typed(
+            schema,
+            v,
+            ind,
+            known,
+            "object",
+            _OBJECT_KEYWORDS,
+            lambda s, v, ind: self._object(s, v, ind, resolver, refs),
+        )
+
+    def _typed(
+        self,
+        schema: dict[str, Any],
+        v: str,
+        ind: str,
+        known: str | None,
+        kind: str,
+        keywords: tuple[str, ...],
+        emit: Callable[[dict[str, Any], str, str], None],
+    ) -> None:
+        """Keywords that only apply to one JSON type: guard them unless the type is fixed."""
+        if not any(k in schema for k in keywords):
+            return
+        if known == kind or (kind == "number" and known == "integer"):
+            emit(schema, v, ind)
+            return
+        mark = len(self.lines)
+        self.lines.append(f"{ind}if {_TYPE_TESTS[kind].format(v=v)}:")
+        emit(schema, v, ind + "    ")
+        if len(self.lines) == mark + 1:  # e.g. `items: true` checks nothing
+            del self.lines[mark:]
+
+    def _string(self, schema: dict[str, Any], v: str, ind: str) -> None:
+        if "minLength" in schema:
+            self.fail_unless(f"len({v}) >= {int(schema['minLength'])}", ind)
+        if "maxLength" in schema:
+            self.fail_unless(f"len({v}) <= {int(schema['maxLength'])}", ind)
+        if "pattern" in schema:
+            name = self.const(re.compile(schema["pattern"]), "P")
+            self.fail_unless(f"{name}.search({v})", ind)
+
+    def _number(self, schema: dict[str, Any], v: str, ind: str) -> None:
+        for keyword, op in _COMPARE.items():
+            if keyword in schema:
+                limit = schema[keyword]
+                if isinstance(limit, bool) or not isinstance(limit, int | float):
+                    raise self.unsupported(f"{keyword} {limit!r}")
+                self.lines.append(f"{ind}if {v} {op} {limit!r}:")
+                self.lines.append(f"{ind}    return False")
+
+    def _array(
+        self, schema: dict[str, Any], v: str, ind: str, resolver: Resolver, refs: tuple[str, ...]
+    ) -> None:
+        if "minItems" in schema:
+            self.fail_unless(f"len({v}) >= {int(schema['minItems'])}", ind)
+        if "maxItems" in schema:
+            self.fail_unless(f"len({v}) <= {int(schema['maxItems'])}", ind)
+        items = schema.get("items", True)
+        if items is False:
+            self.fail_unless(f"not {v}", ind)
+        elif items is not True:
+            item = self.fresh()
+            mark = len(self.lines)
+            self.lines.append(f"{ind}for {item} in {v}:")
+            self.node(items, item, ind + "    ", resolver, refs, root=False)
+            if len(self.lines) == mark + 1:  # `items: {}` checks nothing
+                del self.lines[mark:]
+
+    def _object(
+        self, schema: dict[str, Any], v: str, ind: str, resolver: Resolver, refs: tuple[str, ...]
+    ) -> None:
+        required = schema.get("required", [])
+        if required:
+            self.fail_unless("(" + " and ".join(f"{k!r} in {v}" for k in required) + ")", ind)
+        properties: dict[str, Any] = schema.get("properties", {})
+        extra = schema.get("additionalProperties", True)
+        if extra is False:
+            name = self.const(frozenset(properties), "K")
+            self.fail_unless(f"{name}.issuperset({v})", ind)
+        elif extra is not True:
+            name = self.const(frozenset(properties), "K")
+            key, value = self.fresh("k"), self.fresh()
+            mark = len(self.lines)
+            self.lines.append(f"{ind}for {key}, {value} in {v}.items():")
+            self.lines.append(f"{ind}    if {key} not in {name}:")
+            self.node(extra, value, ind + "        ", resolver, refs, root=False)
+            if len(self.lines) == mark + 2:  # `additionalProperties: {}` checks nothing
+                del self.lines[mark:]
+                self.consts.pop(name)
+        for prop, sub in properties.items():
+            value = self.fresh()
+            mark = len(self.lines)
+            self.lines.append(f"{ind}{value} = {v}.get({prop!r}, _MISSING)")
+            self.lines.append(f"{ind}if {value} is not _MISSING:")
+            self.node(sub, value, ind + "    ", resolver, refs, root=False)
+            if len(self.lines) == mark + 2:  # nothing to check for this property
+                del self.lines[mark:]
+
+
+def _build(schema: dict[str, Any], schema_name: str) -> tuple[str, dict[str, Any]]:
+    gen = _Codegen(schema_name)
+    resolver = schema_registry().resolver(base_uri=schema.get("$id", ""))
+    gen.node(schema, "v0", "    ", resolver, (), root=True)
+    fn = "check_" + re.sub(r"\W", "_", schema_name)
+    source = "\n".join([f"def {fn}(v0):", *gen.lines, "    return True", ""])
+    return source, gen.consts
+
+
+def _const_repr(value: Any) -> str:
+    if isinstance(value, frozenset):  # stable order, unlike the set's own repr
+        return "frozenset({" + ", ".join(repr(x) for x in sorted(value)) + "})"
+    return repr(value)
+
+
+def generate_check_source(schema_name: str) -> str:
+    """Python source of the check function for a vendored schema (ValueError if unsupported)."""
+    source, consts = _build(load_schema_by_name(schema_name), schema_name)
+    header = [f"# {name} = {_const_repr(value)}" for name, value in sorted(consts.items())]
+    return "\n".join(header + [source])
+
+
+@cache
+@stage("validate.codegen")
+def compiled_check(schema_name: str) -> Check:
+    """`check(instance) -> bool` for a vendored schema, compiled on first use."""
+    return compile_check(load_schema_by_name(schema_name), schema_name)
+
+
+def compile_check(schema: dict[str, Any], schema_name: str = "inline") -> Check:
+    """`check(instance) -> bool` for any schema (not cached; see `compiled_check`)."""
+    try:
+        source, consts = _build(schema, schema_name)
+        namespace: dict[str, Any] = {
+            "_MISSING": object(),
+            "_NUM": frozenset({int, float}),
+            "_Number": Number,
+            **consts,
+        }
+        # A generator bug surfaces here as a SyntaxError; still answer, via jsonschema.
+        exec(compile(source, f"<schema {schema_name}>", "exec"), namespace)
+    except (ValueError, SyntaxError):
+        return Draft202012Validator(schema, registry=schema_registry()).is_valid
+    return namespace[source.split("(", 1)[0].removeprefix("def ")]
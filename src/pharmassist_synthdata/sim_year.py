@@ -1,18 +1,122 @@
 from __future__ import annotations
 
-import gzip
+import hashlib
 import json
 import random
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, replace
 from datetime import date, timedelta
+from functools import cache, partial
 from pathlib import Path
 from typing import Any, Literal
 
 from .catalog import SCHEMA_VERSION as PRODUCT_SCHEMA_VERSION
+from .checkpoint import CheckpointedOutput
+from .encoders import EncoderName, intern_payload, record_encoder
+from .gzip_blocks import BlockGzipWriter, BlockIndexBuilder, PackedBlock, compress_blocks
 from .patient import SCHEMA_VERSION as LLM_CONTEXT_SCHEMA_VERSION
 from .patient import generate_patient
+from .patient_pool import PatientPool
+from .profiling import stage, timed
+from .rollups import Rollups, rollups_from_files
+from .sampler import WeightedSampler
+from .stock import STOCK_FILENAME, StockLedger, write_stock_from_files
+from .writers import (
+    DEFAULT_COMPRESSLEVEL,
+    PIPELINE_BUFFER_BYTES,
+    ThreadedGzipWriter,
+    open_jsonl_gz,
+)
 
 Mode = Literal["full", "mini"]
+# v1: one sequential `random.Random(seed)` stream (reference output).
+# sharded: a sequential plan pass + per-month shards seeded from (seed, shard); outputs differ
+# from v1 but are byte-identical for a given seed whatever the number of workers.
+# np1: the year's draws are made as NumPy arrays up front (optional dependency); see
+# `sim_year_np`. Versioned separately from v1/sharded.
+# keyed: counter-based draws keyed by (seed, date, visit, purpose), so any day or visit can
+# be regenerated on its own; see `sim_year_keyed`.
+RngMode = Literal["v1", "sharded", "np1", "keyed"]
+
+RecordKind = Literal["patient", "visit", "event", "inventory"]
+
+RECORD_FILES: dict[RecordKind, str] = {
+    "patient": "patients.jsonl.gz",
+    "visit": "visits.jsonl.gz",
+    "event": "events.jsonl.gz",
+    "inventory": "inventory.jsonl.gz",
+}
+OUTPUT_FILES = tuple(RECORD_FILES.values())
+# Per-kind record id (monotonic within each file; used by block indexes).
+REF_KEYS: dict[RecordKind, str] = {
+    "patient": "patient_ref",
+    "visit": "visit_ref",
+    "event": "event_ref",
+    "inventory": "sku",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SimRecord:
+    """One generated row; `data` is exactly what lands in the kind's JSONL file."""
+
+    kind: RecordKind
+    data: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class RecordSelection:
+    """Subset of a sim-year run to emit: record kinds and an inclusive date window.
+
+    The window applies to visits, events and the new patients they introduce (dated by
+    that first visit); inventory and the initial patient pool are undated and follow `kinds`
+    only. Skipped records still consume their random draws and refs, so every selected record
+    is identical to the one in a full run.
+    """
+
+    kinds: frozenset[RecordKind] = frozenset(RECORD_FILES)
+    date_from: date | None = None
+    date_to: date | None = None
+
+    def in_window(self, day: date) -> bool:
+        return (self.date_from is None or day >= self.date_from) and (
+            self.date_to is None or day <= self.date_to
+        )
+
+    def wants_month(self, year: int, month: int) -> bool:
+        """Whether any day of the month is in the window."""
+        first = date(year, month, 1)
+        last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return (self.date_from is None or last >= self.date_from) and (
+            self.date_to is None or first <= self.date_to
+        )
+
+    @property
+    def is_all(self) -> bool:
+        return self == ALL_RECORDS
+
+
+ALL_RECORDS = RecordSelection()
+
+
+def make_selection(
+    *, only: Iterable[str] | None = None, date_from: date | None = None, date_to: date | None = None
+) -> RecordSelection:
+    """Build a `RecordSelection` from file stems (`"events"`, `"visits"`, ...) and dates."""
+    stems = {name.split(".", 1)[0]: kind for kind, name in RECORD_FILES.items()}
+    if only is None:
+        kinds = frozenset(RECORD_FILES)
+    else:
+        wanted = {name.strip() for name in only if name.strip()}
+        unknown = sorted(wanted - set(stems))
+        if unknown or not wanted:
+            raise ValueError(f"Unknown or empty file selection: {unknown} (known: {sorted(stems)})")
+        kinds = frozenset(stems[name] for name in wanted)
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValueError("date_from must be <= date_to")
+    return RecordSelection(kinds=kinds, date_from=date_from, date_to=date_to)
 
 
 @dataclass(frozen=True)
@@ -26,19 +130,33 @@ class PharmacyYearParams:
     # Monday=0 ... Sunday=6
     dow_factors: dict[int, float]
     month_factors: dict[int, float]
-
-
-def default_params(*, pharmacy: str) -> PharmacyYearParams:
-    if pharmacy != "paris15":
-        raise ValueError(f"Unsupported pharmacy: {pharmacy}")
-
+    # Share of active patients lost at each year boundary (multi-year runs only).
+    annual_churn: float = 0.3
+
+
+_MONTH_FACTORS_URBAN = {
+    1: 1.20,
+    2: 1.15,
+    3: 1.10,
+    4: 1.00,
+    5: 1.05,
+    6: 0.95,
+    7: 0.90,
+    8: 0.85,
+    9: 1.05,
+    10: 1.10,
+    11: 1.15,
+    12: 1.20,
+}
+
+_PRESETS: dict[str, PharmacyYearParams] = {
     # v1 defaults are documented in the private plan repo (PharmAssist 2026):
     # - mu_base=210 (Paris 15e standard)
     # - Sunday closed (0)
     # - moderate overdispersion via NB(k=400)
     # - repeat customers: ~92% of visits are returning => p_new_visit ~ 0.08
     # - multi-intent: ~60%
-    return PharmacyYearParams(
+    "paris15": PharmacyYearParams(
         pharmacy="paris15",
         mu_base=210.0,
         nb_k=400.0,
@@ -46,21 +164,43 @@ def default_params(*, pharmacy: str) -> PharmacyYearParams:
         p_multi_intent=0.60,
         initial_patients=5250,  # ~25x mu_base => ~12–13 visits/patient/year
         dow_factors={0: 1.00, 1: 1.00, 2: 1.00, 3: 1.00, 4: 1.00, 5: 0.75, 6: 0.00},
-        month_factors={
-            1: 1.20,
-            2: 1.15,
-            3: 1.10,
-            4: 1.00,
-            5: 1.05,
-            6: 0.95,
-            7: 0.90,
-            8: 0.85,
-            9: 1.05,
-            10: 1.10,
-            11: 1.15,
-            12: 1.20,
-        },
-    )
+        month_factors=_MONTH_FACTORS_URBAN,
+    ),
+    # Synthetic archetypes for fleet runs (same shape as paris15, scaled down):
+    # - suburban: busier Saturdays, more loyal patients
+    # - rural: small stable pool, flatter seasonality, higher overdispersion
+    "suburban": PharmacyYearParams(
+        pharmacy="suburban",
+        mu_base=140.0,
+        nb_k=200.0,
+        p_new_visit=0.06,
+        p_multi_intent=0.60,
+        initial_patients=3500,
+        dow_factors={0: 1.00, 1: 1.00, 2: 1.00, 3: 1.00, 4: 1.00, 5: 0.95, 6: 0.00},
+        month_factors=_MONTH_FACTORS_URBAN,
+    ),
+    "rural": PharmacyYearParams(
+        pharmacy="rural",
+        mu_base=70.0,
+        nb_k=60.0,
+        p_new_visit=0.04,
+        p_multi_intent=0.55,
+        initial_patients=1750,
+        dow_factors={0: 1.00, 1: 1.00, 2: 1.00, 3: 1.00, 4: 1.00, 5: 0.60, 6: 0.00},
+        month_factors={m: 1.0 + 0.5 * (f - 1.0) for m, f in _MONTH_FACTORS_URBAN.items()},
+    ),
+}
+
+
+def pharmacy_presets() -> tuple[str, ...]:
+    return tuple(sorted(_PRESETS))
+
+
+def default_params(*, pharmacy: str) -> PharmacyYearParams:
+    params = _PRESETS.get(pharmacy)
+    if params is None:
+        raise ValueError(f"Unsupported pharmacy: {pharmacy}")
+    return params
 
 
 def _iter_dates(year: int) -> list[date]:
@@ -146,10 +286,17 @@ def _domain_probs_by_month(month: int) -> list[tuple[str, float]]:
 
 
 def _choice_weighted(rng: random.Random, items: list[tuple[str, float]]) -> str:
+    if sum(w for _, w in items) <= 0:
+        return items[0][0]  # no draw consumed
+    return _pick_weighted(items, rng.random())
+
+
+def _pick_weighted(items: list[tuple[str, float]], u: float) -> str:
+    """`_choice_weighted` for a given uniform `u` in [0, 1)."""
     total = sum(w for _, w in items)
     if total <= 0:
         return items[0][0]
-    r = rng.random() * total
+    r = u * total
     acc = 0.0
     for key, w in items:
         acc += w
@@ -158,12 +305,41 @@ def _choice_weighted(rng: random.Random, items: list[tuple[str, float]]) -> str:
     return items[-1][0]
 
 
+# Duration choices per domain (days). Unknown domains fall back to respiratory.
+_INTAKE_DAYS: dict[str, list[int]] = {
+    "allergy_ent": [3, 5, 7, 10, 14],
+    "digestive": [1, 2, 3, 5, 7, 10],
+    "skin": [7, 10, 14, 21],
+    "pain": [1, 2, 3, 5],
+    "eye": [1, 2, 3],
+    "urology": [1, 2, 3, 5],
+    "respiratory": [1, 2, 3, 5, 7],
+}
+
+
 def _intake_extracted_for_domain(rng: random.Random, *, domain: str) -> dict[str, Any]:
+    # Draw order/consumption is part of the seeded output: one choice for the duration, plus
+    # one for the severity of pain.
+    if domain not in _INTAKE_DAYS:
+        domain = "respiratory"
+    days = rng.choice(_INTAKE_DAYS[domain])
+    severity = rng.choice(["mild", "moderate"]) if domain == "pain" else None
+    return _intake_payload(domain, days, severity)
+
+
+@cache
+def _intake_payload(domain: str, days: int, severity: str | None) -> dict[str, Any]:
+    """Interned intake payload: shared by every visit/event that draws it (read-only).
+
+    Only the writers see the shared object; `iter_pharmacy_year` hands out copies.
+
+    There are only a few dozen (domain, days, severity) outcomes, so each payload is built
+    and JSON-encoded once per process instead of twice per visit.
+    """
     # Keep this strictly schema-compatible with intake_extracted.schema.json (no extra keys).
     # Use short labels; avoid free text that could invite PHI.
     if domain == "allergy_ent":
-        days = rng.choice([3, 5, 7, 10, 14])
-        return {
+        payload = {
             "schema_version": "0.0.0",
             "presenting_problem": "Sneezing and itchy eyes",
             "symptoms": [
@@ -172,42 +348,36 @@ def _intake_extracted_for_domain(rng: random.Random, *, domain: str) -> dict[str
             ],
             "red_flags": [],
         }
-    if domain == "digestive":
-        days = rng.choice([1, 2, 3, 5, 7, 10])
-        return {
+    elif domain == "digestive":
+        payload = {
             "schema_version": "0.0.0",
             "presenting_problem": "Bloating after meals",
             "symptoms": [{"label": "bloating", "severity": "mild", "duration_days": days}],
             "red_flags": [],
         }
-    if domain == "skin":
-        days = rng.choice([7, 10, 14, 21])
-        return {
+    elif domain == "skin":
+        payload = {
             "schema_version": "0.0.0",
             "presenting_problem": "Dry skin and itching",
             "symptoms": [{"label": "dry skin", "severity": "mild", "duration_days": days}],
             "red_flags": [],
         }
-    if domain == "pain":
-        days = rng.choice([1, 2, 3, 5])
-        sev = rng.choice(["mild", "moderate"])
-        return {
+    elif domain == "pain":
+        payload = {
             "schema_version": "0.0.0",
             "presenting_problem": "Headache",
-            "symptoms": [{"label": "headache", "severity": sev, "duration_days": days}],
+            "symptoms": [{"label": "headache", "severity": severity, "duration_days": days}],
             "red_flags": [],
         }
-    if domain == "eye":
-        days = rng.choice([1, 2, 3])
-        return {
+    elif domain == "eye":
+        payload = {
             "schema_version": "0.0.0",
             "presenting_problem": "Eye irritation",
             "symptoms": [{"label": "eye irritation", "severity": "mild", "duration_days": days}],
             "red_flags": [],
         }
-    if domain == "urology":
-        days = rng.choice([1, 2, 3, 5])
-        return {
+    elif domain == "urology":
+        payload = {
             "schema_version": "0.0.0",
             "presenting_problem": "Burning urination",
             "symptoms": [
@@ -215,20 +385,20 @@ def _intake_extracted_for_domain(rng: random.Random, *, domain: str) -> dict[str
             ],
             "red_flags": [],
         }
-
-    # respiratory default
-    days = rng.choice([1, 2, 3, 5, 7])
-    return {
-        "schema_version": "0.0.0",
-        "presenting_problem": "Cough and sore throat",
-        "symptoms": [
-            {"label": "cough", "severity": "moderate", "duration_days": days},
-            {"label": "sore throat", "severity": "mild", "duration_days": days},
-        ],
-        "red_flags": [],
-    }
+    else:
+        payload = {
+            "schema_version": "0.0.0",
+            "presenting_problem": "Cough and sore throat",
+            "symptoms": [
+                {"label": "cough", "severity": "moderate", "duration_days": days},
+                {"label": "sore throat", "severity": "mild", "duration_days": days},
+            ],
+            "red_flags": [],
+        }
+    return intern_payload(payload)
 
 
+@stage("sim_year.inventory")
 def _generate_inventory(seed: int, *, n_products: int) -> list[dict[str, Any]]:
     rng = random.Random(seed + 9999)
 
@@ -350,264 +520,1392 @@ def _generate_inventory(seed: int, *, n_products: int) -> list[dict[str, Any]]:
     return products[:n_products]
 
 
-def generate_pharmacy_year(
+def _row_counts(counts: dict[RecordKind, int]) -> dict[str, int]:
+    # Keyed by file stem ("patients", "visits", ...), as reported by `generate_pharmacy_year`;
+    # only the kinds present in `counts` (i.e. the files that were written).
+    return {
+        RECORD_FILES[kind].split(".", 1)[0]: counts[kind] for kind in RECORD_FILES if kind in counts
+    }
+
+
+def _derive_seed(seed: int, *key: object) -> int:
+    """Derive an independent, platform-stable 64-bit seed from `seed` and a key path."""
+    material = ":".join(str(part) for part in (seed, *key)).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(material).digest()[:8], "big")
+
+
+def _patient_seed(seed: int, n: int) -> int:
+    return (seed * 100_000) + 1000 + n
+
+
+def _patient_llm_context(seed: int, n: int) -> dict[str, Any]:
+    llm_context = generate_patient(seed=_patient_seed(seed, n))
+    if not isinstance(llm_context.get("schema_version"), str):
+        llm_context["schema_version"] = LLM_CONTEXT_SCHEMA_VERSION
+    return llm_context
+
+
+@stage("sim_year.patient")
+def _patient_record(seed: int, idx: int, *, patient_seed_n: int) -> SimRecord:
+    data = {
+        "patient_ref": f"pt_{idx:06d}",
+        "llm_context": _patient_llm_context(seed, patient_seed_n),
+    }
+    return SimRecord("patient", data)
+
+
+def _visit_record(
     *,
-    seed: int,
-    pharmacy: str,
-    year: int,
-    out_dir: Path,
-    mode: Mode = "full",
-) -> None:
-    """Generate a synthetic pharmacy-year dataset.
+    visit_ref: str,
+    patient_ref: str,
+    occurred_at: str,
+    primary_domain: str,
+    intents: list[str],
+    intake_extracted: dict[str, Any],
+) -> SimRecord:
+    data = {
+        "visit_ref": visit_ref,
+        "patient_ref": patient_ref,
+        "occurred_at": occurred_at,
+        "primary_domain": primary_domain,
+        "intents": intents,
+        "intake_extracted": intake_extracted,
+    }
+    return SimRecord("visit", data)
 
-    Outputs (gzipped JSONL):
-    - patients.jsonl.gz
-    - visits.jsonl.gz
-    - events.jsonl.gz
-    - inventory.jsonl.gz
-    """
-    params = default_params(pharmacy=pharmacy)
-    rng = random.Random(seed)
 
-    out_dir.mkdir(parents=True, exist_ok=True)
-    patients_path = out_dir / "patients.jsonl.gz"
-    visits_path = out_dir / "visits.jsonl.gz"
-    events_path = out_dir / "events.jsonl.gz"
-    inventory_path = out_dir / "inventory.jsonl.gz"
-
-    def dumps(obj: Any) -> str:
-        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
-
-    with (
-        gzip.open(patients_path, "wt", encoding="utf-8") as patients_f,
-        gzip.open(visits_path, "wt", encoding="utf-8") as visits_f,
-        gzip.open(events_path, "wt", encoding="utf-8") as events_f,
-        gzip.open(inventory_path, "wt", encoding="utf-8") as inventory_f,
-    ):
-        inv = _generate_inventory(seed, n_products=200 if mode == "full" else 50)
-        for p in inv:
-            inventory_f.write(dumps(p) + "\n")
-
-        patient_counter = 0
-        patient_refs: list[str] = []
-        patient_weights: list[int] = []
-
-        initial_patients = params.initial_patients if mode == "full" else 20
+def _event_record(
+    *,
+    event_ref: str,
+    visit_ref: str,
+    patient_ref: str,
+    occurred_at: str,
+    event_type: str,
+    payload: Any,
+) -> SimRecord:
+    data = {
+        "event_ref": event_ref,
+        "visit_ref": visit_ref,
+        "patient_ref": patient_ref,
+        "occurred_at": occurred_at,
+        "event_type": event_type,
+        "payload": payload,
+    }
+    return SimRecord("event", data)
+
+
+_RX_POOL = ["metformin", "levothyroxine", "amlodipine", "atorvastatin"]
+
+
+@dataclass
+class _V1State:
+    """Everything the v1 stream carries from one day to the next (what a checkpoint saves)."""
+
+    rng: random.Random
+    # Preferential attachment: every visit bumps the patient's weight by one.
+    pool: PatientPool
+    patient_counter: int
+    visit_counter: int = 0
+    event_counter: int = 0
+
+    @classmethod
+    def start(cls, *, seed: int, initial_patients: int) -> _V1State:
+        return cls(
+            rng=random.Random(seed),
+            pool=PatientPool(initial_patients),
+            patient_counter=initial_patients,
+        )
+
+    def next_visit_ref(self) -> str:
+        ref = f"visit_{self.visit_counter:09d}"
+        self.visit_counter += 1
+        return ref
+
+    def next_event_ref(self) -> str:
+        ref = f"ev_{self.event_counter:09d}"
+        self.event_counter += 1
+        return ref
+
+    def to_json(self) -> dict[str, Any]:
+        version, internal, gauss_next = self.rng.getstate()
+        return {
+            "rng": [version, list(internal), gauss_next],
+            "pool": self.pool.to_json(),
+            "patient_counter": self.patient_counter,
+            "visit_counter": self.visit_counter,
+            "event_counter": self.event_counter,
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any]) -> _V1State:
+        version, internal, gauss_next = payload["rng"]
+        rng = random.Random()
+        rng.setstate((version, tuple(internal), gauss_next))
+        return cls(
+            rng=rng,
+            pool=PatientPool.from_json(payload["pool"]),
+            patient_counter=payload["patient_counter"],
+            visit_counter=payload["visit_counter"],
+            event_counter=payload["event_counter"],
+        )
+
+
+def _iter_v1_preamble(
+    *,
+    seed: int,
+    n_products: int,
+    initial_patients: int,
+    select: RecordSelection = ALL_RECORDS,
+) -> Iterator[SimRecord]:
+    if "inventory" in select.kinds:
+        for p in _generate_inventory(seed, n_products=n_products):
+            yield SimRecord("inventory", p)
+    if "patient" in select.kinds:
         for i in range(initial_patients):
-            patient_ref = f"pt_{patient_counter:06d}"
-            patient_counter += 1
-
-            llm_context = generate_patient(seed=(seed * 100_000) + 1000 + i)
-            if not isinstance(llm_context.get("schema_version"), str):
-                llm_context["schema_version"] = LLM_CONTEXT_SCHEMA_VERSION
-
-            patients_f.write(dumps({"patient_ref": patient_ref, "llm_context": llm_context}) + "\n")
-            patient_refs.append(patient_ref)
-            patient_weights.append(1)
-
-        def pick_patient_ref() -> str:
-            idx = rng.choices(range(len(patient_refs)), weights=patient_weights, k=1)[0]
-            patient_weights[idx] += 1
-            return patient_refs[idx]
-
-        visit_counter = 0
-        event_counter = 0
-
-        def write_event(
-            *,
-            visit_ref: str,
-            patient_ref: str,
-            occurred_at: str,
-            event_type: str,
-            payload: Any,
-        ) -> None:
-            nonlocal event_counter
-            ev_ref = f"ev_{event_counter:09d}"
-            event_counter += 1
-            events_f.write(
-                dumps(
-                    {
-                        "event_ref": ev_ref,
-                        "visit_ref": visit_ref,
-                        "patient_ref": patient_ref,
-                        "occurred_at": occurred_at,
-                        "event_type": event_type,
-                        "payload": payload,
-                    }
-                )
-                + "\n"
+            yield _patient_record(seed, i, patient_seed_n=i)
+
+
+def _iter_v1_mini(
+    state: _V1State, *, year: int, params: PharmacyYearParams, skus: list[str]
+) -> Iterator[SimRecord]:
+    rng = state.rng
+    initial_patients = len(state.pool)
+    visit_dates = [
+        date(year, 1, 15),
+        date(year, 3, 10),
+        date(year, 5, 20),
+        date(year, 9, 5),
+        date(year, 11, 25),
+    ]
+
+    for i in range(60):
+        d = visit_dates[i % len(visit_dates)]
+        occurred_at = d.isoformat()
+        patient_ref = f"pt_{i % initial_patients:06d}"
+
+        if i == 2:
+            intake_extracted = {
+                "schema_version": "0.0.0",
+                "presenting_problem": "Unspecified symptom",
+                "symptoms": [{"label": "unspecified symptom", "severity": "unknown"}],
+                "red_flags": [],
+            }
+            primary_domain = "other"
+        elif i == 3:
+            intake_extracted = {
+                "schema_version": "0.0.0",
+                "presenting_problem": "Dyspnea and chest pain",
+                "symptoms": [
+                    {"label": "dyspnea", "severity": "severe", "duration_days": 1},
+                    {"label": "chest pain", "severity": "severe", "duration_days": 1},
+                ],
+                "red_flags": ["dyspnea", "chest_pain"],
+            }
+            primary_domain = "respiratory"
+        else:
+            domain = _choice_weighted(rng, _domain_probs_by_month(d.month))
+            intake_extracted = _intake_extracted_for_domain(rng, domain=domain)
+            primary_domain = domain
+
+        visit_ref = state.next_visit_ref()
+
+        intents = ["symptom_advice"]
+        if rng.random() < params.p_multi_intent:
+            intents.append("otc_purchase")
+
+        yield _visit_record(
+            visit_ref=visit_ref,
+            patient_ref=patient_ref,
+            occurred_at=occurred_at,
+            primary_domain=primary_domain,
+            intents=intents,
+            intake_extracted=intake_extracted,
+        )
+        yield _event_record(
+            event_ref=state.next_event_ref(),
+            visit_ref=visit_ref,
+            patient_ref=patient_ref,
+            occurred_at=occurred_at,
+            event_type="symptom_intake",
+            payload={"intake_extracted": intake_extracted},
+        )
+        if "otc_purchase" in intents:
+            items = [{"sku": skus[rng.randrange(len(skus))], "qty": int(rng.randint(1, 2))}]
+            yield _event_record(
+                event_ref=state.next_event_ref(),
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                event_type="otc_purchase",
+                payload={"items": items},
             )
 
-        if mode == "mini":
-            visit_dates = [
-                date(year, 1, 15),
-                date(year, 3, 10),
-                date(year, 5, 20),
-                date(year, 9, 5),
-                date(year, 11, 25),
-            ]
-
-            for i in range(60):
-                d = visit_dates[i % len(visit_dates)]
-                occurred_at = d.isoformat()
-                patient_ref = patient_refs[i % len(patient_refs)]
-
-                if i == 2:
-                    intake_extracted = {
-                        "schema_version": "0.0.0",
-                        "presenting_problem": "Unspecified symptom",
-                        "symptoms": [{"label": "unspecified symptom", "severity": "unknown"}],
-                        "red_flags": [],
-                    }
-                    primary_domain = "other"
-                elif i == 3:
-                    intake_extracted = {
-                        "schema_version": "0.0.0",
-                        "presenting_problem": "Dyspnea and chest pain",
-                        "symptoms": [
-                            {"label": "dyspnea", "severity": "severe", "duration_days": 1},
-                            {"label": "chest pain", "severity": "severe", "duration_days": 1},
-                        ],
-                        "red_flags": ["dyspnea", "chest_pain"],
-                    }
-                    primary_domain = "respiratory"
-                else:
-                    domain = _choice_weighted(rng, _domain_probs_by_month(d.month))
-                    intake_extracted = _intake_extracted_for_domain(rng, domain=domain)
-                    primary_domain = domain
-
-                visit_ref = f"visit_{visit_counter:09d}"
-                visit_counter += 1
-
-                intents = ["symptom_advice"]
-                if rng.random() < params.p_multi_intent:
-                    intents.append("otc_purchase")
-
-                visits_f.write(
-                    dumps(
-                        {
-                            "visit_ref": visit_ref,
-                            "patient_ref": patient_ref,
-                            "occurred_at": occurred_at,
-                            "primary_domain": primary_domain,
-                            "intents": intents,
-                            "intake_extracted": intake_extracted,
-                        }
-                    )
-                    + "\n"
-                )
 
-                write_event(
+def _iter_v1_month(
+    state: _V1State,
+    *,
+    seed: int,
+    year: int,
+    month: int,
+    params: PharmacyYearParams,
+    skus: list[str],
+    select: RecordSelection = ALL_RECORDS,
+) -> Iterator[SimRecord]:
+    """One calendar month of the v1 full-mode stream; advances `state` as it goes.
+
+    Records outside `select` are not built, but their draws and refs are still consumed.
+    """
+    rng = state.rng
+    pool = state.pool
+    d = date(year, month, 1)
+    while d.month == month:
+        day = d
+        d += timedelta(days=1)
+        f_dow = params.dow_factors.get(day.weekday(), 1.0)
+        if f_dow <= 0:
+            continue
+        in_window = select.in_window(day)
+        emit_patient = in_window and "patient" in select.kinds
+        emit_visit = in_window and "visit" in select.kinds
+        emit_event = in_window and "event" in select.kinds
+
+        f_month = params.month_factors.get(month, 1.0)
+        mu = params.mu_base * f_dow * f_month
+
+        n = _poisson(rng, mu) if params.nb_k is None else _neg_binom(rng, mu, params.nb_k)
+
+        for _ in range(n):
+            occurred_at = day.isoformat()
+
+            # An empty pool (e.g. after churn 1.0) can only take new patients; the draw is
+            # still made so the stream is unchanged whenever the pool has patients.
+            is_new = rng.random() < params.p_new_visit or len(pool) == 0
+            if is_new:
+                idx = state.patient_counter
+                pool.add(idx)
+                state.patient_counter += 1
+                # v1 seeds new patients with the post-increment counter (idx + 1).
+                if emit_patient:
+                    yield _patient_record(seed, idx, patient_seed_n=state.patient_counter)
+            else:
+                # Same draw as `rng.choices(range(n), weights=...)`, in O(log n).
+                idx = pool.visit(rng)
+            patient_ref = f"pt_{idx:06d}"
+
+            visit_ref = state.next_visit_ref()
+
+            domain = _choice_weighted(rng, _domain_probs_by_month(month))
+            intake_extracted = _intake_extracted_for_domain(rng, domain=domain)
+
+            intents = ["symptom_advice"]
+            if rng.random() < params.p_multi_intent:
+                intents.append("otc_purchase")
+            if rng.random() < 0.18:
+                intents.append("prescription_added")
+
+            if emit_visit:
+                yield _visit_record(
+                    visit_ref=visit_ref,
+                    patient_ref=patient_ref,
+                    occurred_at=occurred_at,
+                    primary_domain=domain,
+                    intents=intents,
+                    intake_extracted=intake_extracted,
+                )
+            event_ref = state.next_event_ref()
+            if emit_event:
+                yield _event_record(
+                    event_ref=event_ref,
                     visit_ref=visit_ref,
                     patient_ref=patient_ref,
                     occurred_at=occurred_at,
                     event_type="symptom_intake",
                     payload={"intake_extracted": intake_extracted},
                 )
-                if "otc_purchase" in intents:
-                    items = [
-                        {
-                            "sku": inv[rng.randrange(len(inv))]["sku"],
-                            "qty": int(rng.randint(1, 2)),
-                        }
-                    ]
-                    write_event(
+
+            if "otc_purchase" in intents:
+                sku = skus[rng.randrange(len(skus))]
+                qty = int(rng.randint(1, 3))
+                event_ref = state.next_event_ref()
+                if emit_event:
+                    yield _event_record(
+                        event_ref=event_ref,
                         visit_ref=visit_ref,
                         patient_ref=patient_ref,
                         occurred_at=occurred_at,
                         event_type="otc_purchase",
-                        payload={"items": items},
+                        payload={"items": [{"sku": sku, "qty": qty}]},
+                    )
+
+            if "prescription_added" in intents:
+                rx = rng.sample(_RX_POOL, k=1)
+                event_ref = state.next_event_ref()
+                if emit_event:
+                    yield _event_record(
+                        event_ref=event_ref,
+                        visit_ref=visit_ref,
+                        patient_ref=patient_ref,
+                        occurred_at=occurred_at,
+                        event_type="prescription_added",
+                        payload={"rx_medications": rx},
                     )
 
+
+def _v1_skus(seed: int, mode: Mode) -> list[str]:
+    return [str(p["sku"]) for p in _generate_inventory(seed, n_products=_v1_n_products(mode))]
+
+
+def _v1_n_products(mode: Mode) -> int:
+    return 200 if mode == "full" else 50
+
+
+def _iter_v1(
+    *,
+    seed: int,
+    year: int,
+    mode: Mode,
+    params: PharmacyYearParams,
+    select: RecordSelection = ALL_RECORDS,
+) -> Iterator[SimRecord]:
+    initial_patients = params.initial_patients if mode == "full" else 20
+    yield from _iter_v1_preamble(
+        seed=seed,
+        n_products=_v1_n_products(mode),
+        initial_patients=initial_patients,
+        select=select,
+    )
+    state = _V1State.start(seed=seed, initial_patients=initial_patients)
+    skus = _v1_skus(seed, mode)
+    if mode == "mini":
+        # Mini has no dated patients, so a plain filter gives the same records.
+        for rec in _iter_v1_mini(state, year=year, params=params, skus=skus):
+            if rec.kind in select.kinds and select.in_window(
+                date.fromisoformat(rec.data["occurred_at"])
+            ):
+                yield rec
+        return
+    for month in range(1, 13):
+        # Months before the window still run (their draws feed later months); nothing after
+        # the window's end is generated at all.
+        if select.date_to is not None and date(year, month, 1) > select.date_to:
             return
+        yield from _iter_v1_month(
+            state, seed=seed, year=year, month=month, params=params, skus=skus, select=select
+        )
 
-        for d in _iter_dates(year):
-            dow = d.weekday()
-            f_dow = params.dow_factors.get(dow, 1.0)
-            if f_dow <= 0:
-                continue
 
-            f_month = params.month_factors.get(d.month, 1.0)
-            mu = params.mu_base * f_dow * f_month
+@dataclass(frozen=True)
+class _Shard:
+    """Self-contained unit of sharded work (picklable for the process pool).
 
-            n = _poisson(rng, mu) if params.nb_k is None else _neg_binom(rng, mu, params.nb_k)
+    Shard 0 holds the inventory and the initial patient pool; shards 1..12 hold the visits
+    of one calendar month, already resolved to patients and intents by the plan pass.
+    """
 
-            for _ in range(n):
+    shard: int
+    seed: int
+    initial_patients: int
+    skus: tuple[str, ...]
+    visit_offset: int
+    event_offset: int
+    # (occurred_at, patient_index, is_new, otc_purchase, prescription_added)
+    visits: tuple[tuple[str, int, bool, bool, bool], ...]
+    select: RecordSelection = ALL_RECORDS
+
+    @property
+    def wanted(self) -> bool:
+        """Whether the shard emits anything under `select` (otherwise it is not rendered)."""
+        if self.shard == 0:
+            return bool(self.select.kinds & {"inventory", "patient"})
+        if not self.select.kinds & {"patient", "visit", "event"} or not self.visits:
+            return False
+        first = date.fromisoformat(self.visits[0][0])
+        return self.select.wants_month(first.year, first.month)
+
+
+def _select_shards(shards: list[_Shard], select: RecordSelection) -> list[_Shard]:
+    return [s for s in (replace(shard, select=select) for shard in shards) if s.wanted]
+
+
+@stage("sim_year.plan")
+def _plan_shards(*, seed: int, year: int, params: PharmacyYearParams) -> list[_Shard]:
+    """Sequential plan pass for the sharded mode.
+
+    Only the draws that carry state across days (daily counts, new vs returning patient,
+    preferential-attachment picks and intents) happen here. Intents fix how many events
+    each visit emits, so every shard knows its `visit_ref`/`event_ref` offsets up front.
+    """
+    skus = tuple(str(p["sku"]) for p in _generate_inventory(seed, n_products=200))
+    rng = random.Random(_derive_seed(seed, "plan"))
+    pool = WeightedSampler([1] * params.initial_patients)
+
+    shards = [
+        _Shard(
+            shard=0,
+            seed=seed,
+            initial_patients=params.initial_patients,
+            skus=skus,
+            visit_offset=0,
+            event_offset=0,
+            visits=(),
+        )
+    ]
+    visit_counter = 0
+    event_counter = 0
+    for month in range(1, 13):
+        visit_offset = visit_counter
+        event_offset = event_counter
+        visits: list[tuple[str, int, bool, bool, bool]] = []
+
+        d = date(year, month, 1)
+        while d.month == month:
+            f_dow = params.dow_factors.get(d.weekday(), 1.0)
+            if f_dow > 0:
+                mu = params.mu_base * f_dow * params.month_factors.get(month, 1.0)
+                n = _poisson(rng, mu) if params.nb_k is None else _neg_binom(rng, mu, params.nb_k)
                 occurred_at = d.isoformat()
+                for _ in range(n):
+                    is_new = rng.random() < params.p_new_visit
+                    if is_new:
+                        idx = pool.append(1)
+                    else:
+                        idx = pool.sample(rng)
+                        pool.add(idx, 1)
+                    otc = rng.random() < params.p_multi_intent
+                    rx = rng.random() < 0.18
+                    visits.append((occurred_at, idx, is_new, otc, rx))
+                    visit_counter += 1
+                    event_counter += 1 + otc + rx
+            d += timedelta(days=1)
+
+        shards.append(
+            _Shard(
+                shard=month,
+                seed=seed,
+                initial_patients=params.initial_patients,
+                skus=skus,
+                visit_offset=visit_offset,
+                event_offset=event_offset,
+                visits=tuple(visits),
+            )
+        )
+    return shards
+
+
+def _iter_shard(shard: _Shard) -> Iterator[SimRecord]:
+    seed = shard.seed
+    select = shard.select
+
+    if shard.shard == 0:
+        yield from _iter_v1_preamble(
+            seed=seed,
+            n_products=len(shard.skus),
+            initial_patients=shard.initial_patients,
+            select=select,
+        )
+
+    rng = random.Random(_derive_seed(seed, "shard", shard.shard))
+    event_counter = shard.event_offset
+    emit_patient = "patient" in select.kinds
+    emit_visit = "visit" in select.kinds
+    emit_event = "event" in select.kinds
+    for i, (occurred_at, idx, is_new, otc, rx) in enumerate(shard.visits):
+        in_window = select.is_all or select.in_window(date.fromisoformat(occurred_at))
+        if is_new and emit_patient and in_window:
+            # Same patient seed as v1 uses for the pool entry at this index.
+            yield _patient_record(seed, idx, patient_seed_n=idx + 1)
+        patient_ref = f"pt_{idx:06d}"
+
+        visit_ref = f"visit_{shard.visit_offset + i:09d}"
+        domain = _choice_weighted(rng, _domain_probs_by_month(int(occurred_at[5:7])))
+        intake_extracted = _intake_extracted_for_domain(rng, domain=domain)
+        intents = ["symptom_advice"]
+        if otc:
+            intents.append("otc_purchase")
+        if rx:
+            intents.append("prescription_added")
+
+        if emit_visit and in_window:
+            yield _visit_record(
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                primary_domain=domain,
+                intents=intents,
+                intake_extracted=intake_extracted,
+            )
 
-                is_new = rng.random() < params.p_new_visit
-                if is_new:
-                    patient_ref = f"pt_{patient_counter:06d}"
-                    patient_counter += 1
+        payloads: list[tuple[str, Any]] = [
+            ("symptom_intake", {"intake_extracted": intake_extracted})
+        ]
+        if otc:
+            sku = shard.skus[rng.randrange(len(shard.skus))]
+            payloads.append(("otc_purchase", {"items": [{"sku": sku, "qty": rng.randint(1, 3)}]}))
+        if rx:
+            payloads.append(("prescription_added", {"rx_medications": rng.sample(_RX_POOL, k=1)}))
+        if not (emit_event and in_window):
+            event_counter += len(payloads)
+            continue
+        for event_type, payload in payloads:
+            yield _event_record(
+                event_ref=f"ev_{event_counter:09d}",
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                event_type=event_type,
+                payload=payload,
+            )
+            event_counter += 1
 
-                    llm_context = generate_patient(seed=(seed * 100_000) + 1000 + patient_counter)
-                    if not isinstance(llm_context.get("schema_version"), str):
-                        llm_context["schema_version"] = LLM_CONTEXT_SCHEMA_VERSION
 
-                    patients_f.write(
-                        dumps({"patient_ref": patient_ref, "llm_context": llm_context}) + "\n"
-                    )
-                    patient_refs.append(patient_ref)
-                    patient_weights.append(1)
-                else:
-                    patient_ref = pick_patient_ref()
-
-                visit_ref = f"visit_{visit_counter:09d}"
-                visit_counter += 1
-
-                domain = _choice_weighted(rng, _domain_probs_by_month(d.month))
-                intake_extracted = _intake_extracted_for_domain(rng, domain=domain)
-
-                intents = ["symptom_advice"]
-                if rng.random() < params.p_multi_intent:
-                    intents.append("otc_purchase")
-                if rng.random() < 0.18:
-                    intents.append("prescription_added")
-
-                visits_f.write(
-                    dumps(
-                        {
-                            "visit_ref": visit_ref,
-                            "patient_ref": patient_ref,
-                            "occurred_at": occurred_at,
-                            "primary_domain": domain,
-                            "intents": intents,
-                            "intake_extracted": intake_extracted,
-                        }
+def _selected_files(select: RecordSelection) -> dict[RecordKind, str]:
+    return {kind: name for kind, name in RECORD_FILES.items() if kind in select.kinds}
+
+
+@stage("sim_year.render")
+def _render_records(
+    records: Iterable[SimRecord],
+    *,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    block_size: int | None = None,
+) -> dict[RecordKind, list[PackedBlock]]:
+    """Encode records into gzip members (one per block) per file they touch."""
+    encode = timed("sim_year.encode", record_encoder(encoder))
+    lines: dict[RecordKind, list[tuple[str, str | None]]] = {kind: [] for kind in RECORD_FILES}
+    for rec in records:
+        lines[rec.kind].append((encode(rec.kind, rec.data), rec.data.get(REF_KEYS[rec.kind])))
+    return {
+        kind: compress_blocks(rows, block_size=block_size, compresslevel=compresslevel)
+        for kind, rows in lines.items()
+        if rows
+    }
+
+
+def _render_shard(
+    shard: _Shard,
+    *,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    block_size: int | None = None,
+) -> dict[RecordKind, list[PackedBlock]]:
+    """Shard sink: render one shard (runs in the worker processes)."""
+    return _render_records(
+        _iter_shard(shard), encoder=encoder, compresslevel=compresslevel, block_size=block_size
+    )
+
+
+def _render_shard_rollups(
+    shard: _Shard,
+    *,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    block_size: int | None = None,
+) -> tuple[dict[RecordKind, list[PackedBlock]], Rollups]:
+    """`_render_shard` plus the shard's rollups (merged by the parent)."""
+    rollups = Rollups()
+    rendered = _render_records(
+        _tap(_iter_shard(shard), [rollups.observe]),
+        encoder=encoder,
+        compresslevel=compresslevel,
+        block_size=block_size,
+    )
+    return rendered, rollups
+
+
+def _append_rendered(
+    out: CheckpointedOutput, rendered: dict[RecordKind, list[PackedBlock]]
+) -> None:
+    for kind, blocks in rendered.items():
+        for blk in blocks:
+            out.append(kind, blk.member, blk.rows)
+
+
+def _run_identity(
+    *,
+    seed: int,
+    year: int,
+    rng_mode: RngMode,
+    params: PharmacyYearParams,
+    encoder: EncoderName,
+    compresslevel: int,
+) -> dict[str, Any]:
+    # Everything that changes the output bytes; a checkpoint only resumes the same run.
+    params_json = json.dumps(asdict(params), sort_keys=True)
+    return {
+        "seed": seed,
+        "year": year,
+        "rng_mode": rng_mode,
+        "pharmacy": params.pharmacy,
+        "params_sha256": hashlib.sha256(params_json.encode("utf-8")).hexdigest(),
+        "encoder": encoder,
+        "compresslevel": compresslevel,
+    }
+
+
+def _write_v1_checkpointed(
+    *,
+    seed: int,
+    year: int,
+    params: PharmacyYearParams,
+    out_dir: Path,
+    run: dict[str, Any],
+    resume: bool,
+    encoder: EncoderName,
+    compresslevel: int,
+) -> dict[str, int]:
+    """v1 full year as 13 chunks (preamble + one per month), checkpointed after each."""
+    render = partial(_render_records, encoder=encoder, compresslevel=compresslevel)
+    skus = _v1_skus(seed, "full")
+    with CheckpointedOutput(out_dir, RECORD_FILES, run=run, resume=resume) as out:
+        if out.last_chunk < 0:
+            preamble = _iter_v1_preamble(
+                seed=seed,
+                n_products=_v1_n_products("full"),
+                initial_patients=params.initial_patients,
+            )
+            _append_rendered(out, render(preamble))
+            state = _V1State.start(seed=seed, initial_patients=params.initial_patients)
+            out.commit(0, state.to_json())
+        else:
+            assert out.state is not None
+            state = _V1State.from_json(out.state)
+        for month in range(out.last_chunk + 1, 13):
+            records = _iter_v1_month(
+                state, seed=seed, year=year, month=month, params=params, skus=skus
+            )
+            _append_rendered(out, render(records))
+            out.commit(month, state.to_json())
+        return _row_counts(out.rows)
+
+
+def _write_sharded_checkpointed(
+    shards: list[_Shard],
+    *,
+    out_dir: Path,
+    workers: int,
+    run: dict[str, Any],
+    resume: bool,
+    encoder: EncoderName,
+    compresslevel: int,
+) -> dict[str, int]:
+    """Sharded year, checkpointed after each shard (shards are self-contained)."""
+    render = partial(_render_shard, encoder=encoder, compresslevel=compresslevel)
+    with ExitStack() as stack:
+        out = stack.enter_context(CheckpointedOutput(out_dir, RECORD_FILES, run=run, resume=resume))
+        todo = [shard for shard in shards if shard.shard > out.last_chunk]
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            rendered = executor.map(render, todo)
+        else:
+            rendered = map(render, todo)
+        for shard, members in zip(todo, rendered, strict=True):
+            _append_rendered(out, members)
+            out.commit(shard.shard, {})
+        return _row_counts(out.rows)
+
+
+def _write_sharded(
+    shards: list[_Shard],
+    *,
+    out_dir: Path,
+    workers: int,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    block_size: int | None = None,
+    select: RecordSelection = ALL_RECORDS,
+    rollups: Rollups | None = None,
+) -> dict[str, int]:
+    """Sharded file sink; with `rollups`, each shard also returns its partial rollups."""
+    render = partial(
+        _render_shard if rollups is None else _render_shard_rollups,
+        encoder=encoder,
+        compresslevel=compresslevel,
+        block_size=block_size,
+    )
+    files = _selected_files(select)
+    counts: dict[RecordKind, int] = dict.fromkeys(files, 0)
+    with ExitStack() as stack:
+        if block_size is not None:
+            builders = {
+                kind: BlockIndexBuilder(out_dir / name, block_size=block_size)
+                for kind, name in files.items()
+            }
+            for b in builders.values():
+                stack.callback(b.close)
+            append = {kind: b.append for kind, b in builders.items()}
+        else:
+            handles = {
+                kind: stack.enter_context((out_dir / name).open("wb"))
+                for kind, name in files.items()
+            }
+            append = {kind: (lambda blk, f=f: f.write(blk.member)) for kind, f in handles.items()}
+
+        if not select.is_all:
+            shards = _select_shards(shards, select)
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            rendered = executor.map(render, shards)
+        else:
+            rendered = map(render, shards)
+        # Concatenated gzip members form one valid gzip stream. Shard (and block) boundaries
+        # do not depend on `workers`, so neither do the bytes.
+        for members in rendered:
+            if rollups is not None:
+                members, part = members
+                rollups.merge(part)
+            for kind, blocks in members.items():
+                for blk in blocks:
+                    append[kind](blk)
+                    counts[kind] += blk.rows
+    return _row_counts(counts)
+
+
+def _write_records(
+    records: Iterable[SimRecord],
+    *,
+    out_dir: Path,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    pipeline: bool = True,
+    block_size: int | None = None,
+    kinds: Iterable[RecordKind] = RECORD_FILES,
+) -> dict[str, int]:
+    """File sink: one gzipped JSONL stream per record kind.
+
+    With `pipeline`, each file is compressed by its own background thread (same bytes).
+    With `block_size`, files are written as indexed independent gzip blocks instead.
+    Only the files of `kinds` are created.
+    """
+    encode = timed("sim_year.encode", record_encoder(encoder))
+    files = {kind: RECORD_FILES[kind] for kind in RECORD_FILES if kind in set(kinds)}
+    counts: dict[RecordKind, int] = dict.fromkeys(files, 0)
+    with ExitStack() as stack:
+        if block_size is not None:
+            blocks = {
+                kind: stack.enter_context(
+                    BlockGzipWriter(
+                        out_dir / name, block_size=block_size, compresslevel=compresslevel
                     )
-                    + "\n"
                 )
+                for kind, name in files.items()
+            }
+            for rec in records:
+                blocks[rec.kind].write_record(
+                    encode(rec.kind, rec.data), rec.data.get(REF_KEYS[rec.kind])
+                )
+                counts[rec.kind] += 1
+            return _row_counts(counts)
 
-                write_event(
-                    visit_ref=visit_ref,
-                    patient_ref=patient_ref,
-                    occurred_at=occurred_at,
-                    event_type="symptom_intake",
-                    payload={"intake_extracted": intake_extracted},
+        if pipeline:
+            handles = {
+                kind: stack.enter_context(
+                    ThreadedGzipWriter(out_dir / name, compresslevel=compresslevel)
                 )
+                for kind, name in files.items()
+            }
+        else:
+            handles = {
+                kind: stack.enter_context(
+                    open_jsonl_gz(out_dir / name, compresslevel=compresslevel)
+                )
+                for kind, name in files.items()
+            }
+        # Handle writes include the hand-off to (or, inline, the work of) gzip.
+        writes = {kind: timed("sim_year.write", f.write) for kind, f in handles.items()}
+        for rec in records:
+            writes[rec.kind](encode(rec.kind, rec.data) + "\n")
+            counts[rec.kind] += 1
+    return _row_counts(counts)
+
+
+def _check_checkpoint(*, mode: Mode, rng_mode: RngMode, block_size: int | None) -> None:
+    if mode != "full" or rng_mode not in ("v1", "sharded"):
+        raise ValueError("checkpoint/resume requires mode='full' and rng_mode 'v1' or 'sharded'")
+    if block_size is not None:
+        raise ValueError("checkpoint/resume does not support block_size")
+
+
+def _check_modes(*, mode: Mode, rng_mode: RngMode, workers: int) -> None:
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if rng_mode in ("sharded", "np1", "keyed"):
+        if mode != "full":
+            raise ValueError(f"rng_mode={rng_mode!r} only supports mode='full'")
+        if rng_mode != "sharded" and workers != 1:
+            raise ValueError(f"rng_mode={rng_mode!r} does not support workers > 1")
+    elif rng_mode == "v1":
+        if workers != 1:
+            raise ValueError("workers > 1 requires rng_mode='sharded'")
+    else:
+        raise ValueError(f"Unsupported rng_mode: {rng_mode}")
+
+
+# Memory model (bytes) behind `estimate_memory`, calibrated with tracemalloc on the presets.
+# Sizes are upper estimates of Python-allocated state; the interpreter itself (~20 MB RSS per
+# process) is not included.
+_MEM_BASELINE = 3 << 19  # inventory, interned payloads, caches, inline gzip state
+_MEM_POOL_PER_PATIENT = 32  # PatientPool / plan sampler slots
+_MEM_ROLLUPS_PER_PATIENT = 128  # visits-per-patient counter entry
+_MEM_ROLLUPS_PER_DAY = 1 << 10
+_MEM_PLAN_PER_VISIT = {"sharded": 128, "keyed": 160, "np1": 320}
+_MEM_RENDER_PER_VISIT = 11 << 8  # a month rendered in memory: lines, refs, joined text, gzip
+_MEM_STOCK = 1 << 19
+_MEM_VOLUME_HEADROOM = 1.05  # daily counts are random; budget for a busier-than-mean year
+_LINE_BYTES: dict[RecordKind, int] = {"patient": 280, "visit": 380, "event": 300, "inventory": 260}
+# `BlockGzipWriter` keeps up to 2 blocks per thread (4 threads) in flight, as text then bytes.
+_BLOCK_WRITER_BLOCKS = 2 * (2 * 4 + 2)
+
+
+class MemoryBudgetError(ValueError):
+    """A generation cannot fit in the requested memory budget."""
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024
+    return f"{n:.1f} GiB"
 
-                if "otc_purchase" in intents:
-                    items = [
-                        {
-                            "sku": inv[rng.randrange(len(inv))]["sku"],
-                            "qty": int(rng.randint(1, 3)),
-                        }
-                    ]
-                    write_event(
-                        visit_ref=visit_ref,
-                        patient_ref=patient_ref,
-                        occurred_at=occurred_at,
-                        event_type="otc_purchase",
-                        payload={"items": items},
-                    )
 
-                if "prescription_added" in intents:
-                    rx_pool = ["metformin", "levothyroxine", "amlodipine", "atorvastatin"]
-                    rx = rng.sample(rx_pool, k=1)
-                    write_event(
-                        visit_ref=visit_ref,
-                        patient_ref=patient_ref,
-                        occurred_at=occurred_at,
-                        event_type="prescription_added",
-                        payload={"rx_medications": rx},
-                    )
+@dataclass(frozen=True)
+class MemoryEstimate:
+    """Upper estimate of a generation's in-memory state, in bytes per component."""
+
+    components: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        return sum(self.components.values())
+
+    def describe(self) -> str:
+        parts = ", ".join(
+            f"{name} {format_bytes(n)}" for name, n in sorted(self.components.items()) if n
+        )
+        return f"{format_bytes(self.total)} ({parts})"
+
+
+def _expected_visits(year: int, params: PharmacyYearParams) -> tuple[float, float]:
+    """Mean visits over the year and in its busiest month."""
+    per_month = dict.fromkeys(range(1, 13), 0.0)
+    for d in _iter_dates(year):
+        per_month[d.month] += (
+            params.mu_base
+            * params.dow_factors.get(d.weekday(), 1.0)
+            * params.month_factors.get(d.month, 1.0)
+        )
+    return sum(per_month.values()), max(per_month.values())
+
+
+def estimate_memory(
+    *,
+    year: int,
+    params: PharmacyYearParams,
+    mode: Mode = "full",
+    rng_mode: RngMode = "v1",
+    workers: int = 1,
+    pipeline: bool = True,
+    block_size: int | None = None,
+    checkpoint: bool = False,
+    stock: bool = False,
+    rollups: bool = True,
+) -> MemoryEstimate:
+    """Estimate the peak memory `generate_pharmacy_year` needs with these settings.
+
+    The figure covers every process of the run (each sharded worker renders one month) and is
+    derived from the expected volume of `params`, so it is known before anything runs.
+    """
+    if mode == "mini":
+        return MemoryEstimate({"baseline": _MEM_BASELINE})
+    visits, busiest_month = (n * _MEM_VOLUME_HEADROOM for n in _expected_visits(year, params))
+    patients = params.initial_patients + params.p_new_visit * visits
+    events = visits * (1 + params.p_multi_intent + 0.18)
+    mem = {
+        "baseline": _MEM_BASELINE,
+        "patient_pool": patients * _MEM_POOL_PER_PATIENT,
+        "plan": visits * _MEM_PLAN_PER_VISIT.get(rng_mode, 0),
+        "rollups": (
+            patients * _MEM_ROLLUPS_PER_PATIENT + 366 * _MEM_ROLLUPS_PER_DAY if rollups else 0
+        ),
+        "stock": _MEM_STOCK if stock else 0,
+        "render": 0.0,
+        "writers": 0.0,
+    }
+    if checkpoint or rng_mode == "sharded":
+        # Months are rendered whole, then written as gzip members without a writer buffer.
+        mem["render"] = busiest_month * _MEM_RENDER_PER_VISIT * workers
+    else:
+        sizes: dict[RecordKind, float] = {
+            "patient": patients,
+            "visit": visits,
+            "event": events,
+            "inventory": _v1_n_products(mode),
+        }
+        if block_size is not None:
+            cap = float(_BLOCK_WRITER_BLOCKS * block_size)
+        else:
+            cap = float(PIPELINE_BUFFER_BYTES if pipeline else 0)
+        mem["writers"] = sum(min(cap, n * _LINE_BYTES[kind]) for kind, n in sizes.items())
+    return MemoryEstimate({name: int(n) for name, n in mem.items()})
+
+
+def _fit_memory_budget(
+    max_memory: int,
+    *,
+    year: int,
+    params: PharmacyYearParams,
+    mode: Mode,
+    rng_mode: RngMode,
+    workers: int,
+    pipeline: bool,
+    block_size: int | None,
+    checkpoint: bool,
+    stock: bool,
+    rollups: bool,
+) -> tuple[bool, int]:
+    """`(pipeline, workers)` that fit `max_memory`, or MemoryBudgetError before any work.
+
+    Only settings that leave the output bytes unchanged are lowered: first the background
+    gzip pipeline, then the number of sharded workers.
+    """
+    while True:
+        est = estimate_memory(
+            year=year,
+            params=params,
+            mode=mode,
+            rng_mode=rng_mode,
+            workers=workers,
+            pipeline=pipeline,
+            block_size=block_size,
+            checkpoint=checkpoint,
+            stock=stock,
+            rollups=rollups,
+        )
+        if est.total <= max_memory:
+            return pipeline, workers
+        if pipeline and block_size is None and est.components["writers"]:
+            pipeline = False
+        elif workers > 1:
+            workers -= 1
+        else:
+            raise MemoryBudgetError(
+                f"Estimated memory {est.describe()} exceeds the budget of "
+                f"{format_bytes(max_memory)}. Lower the volume (mu_base, initial_patients), "
+                "turn off rollups/stock, or use rng_mode='v1', which streams the year "
+                "instead of planning or rendering it in memory."
+            )
+
+
+def iter_pharmacy_year(
+    *,
+    seed: int,
+    pharmacy: str,
+    year: int,
+    mode: Mode = "full",
+    rng_mode: RngMode = "v1",
+    params: PharmacyYearParams | None = None,
+    select: RecordSelection = ALL_RECORDS,
+) -> Iterator[SimRecord]:
+    """Lazily yield the records of a synthetic pharmacy-year dataset.
+
+    Records come in generation order: inventory, the initial patient pool, then each visit
+    preceded by its new patient (if any) and followed by its events. Only the patient pool
+    (and, in sharded mode, the compact visit plan) is kept in memory.
+
+    `select` (see `make_selection`) limits the output to some record kinds and/or a date
+    window; the selected records are identical to those of a full run.
+
+    Every record owns its data: the interned `intake_extracted` payloads the engines share
+    between records are copied on the way out.
+    """
+    records = _iter_pharmacy_year(
+        seed=seed,
+        pharmacy=pharmacy,
+        year=year,
+        mode=mode,
+        rng_mode=rng_mode,
+        params=params,
+        select=select,
+    )
+    return _own_intakes(records)
+
+
+def _iter_pharmacy_year(
+    *,
+    seed: int,
+    pharmacy: str,
+    year: int,
+    mode: Mode,
+    rng_mode: RngMode,
+    params: PharmacyYearParams | None,
+    select: RecordSelection,
+) -> Iterator[SimRecord]:
+    """`iter_pharmacy_year` without the copies, for the writers (records are read-only).
+
+    `intake_extracted` payloads are interned (see `_intake_payload`) and shared between
+    visits and their `symptom_intake` events.
+    """
+    if params is None:
+        params = default_params(pharmacy=pharmacy)
+    _check_modes(mode=mode, rng_mode=rng_mode, workers=1)
+
+    if rng_mode == "sharded":
+        shards = _plan_shards(seed=seed, year=year, params=params)
+        if not select.is_all:
+            shards = _select_shards(shards, select)
+        return (rec for shard in shards for rec in _iter_shard(shard))
+    if rng_mode == "np1":
+        from .sim_year_np import _require_numpy, iter_np1
+
+        _require_numpy()
+        return iter_np1(seed=seed, year=year, params=params, select=select)
+    if rng_mode == "keyed":
+        from .sim_year_keyed import KeyedYear
+
+        return KeyedYear(seed=seed, year=year, params=params).iter_year(select)
+    return _iter_v1(seed=seed, year=year, mode=mode, params=params, select=select)
+
+
+@stage("sim_year.total")
+def generate_pharmacy_year(
+    *,
+    seed: int,
+    pharmacy: str,
+    year: int,
+    out_dir: Path,
+    mode: Mode = "full",
+    rng_mode: RngMode = "v1",
+    workers: int = 1,
+    params: PharmacyYearParams | None = None,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    pipeline: bool = True,
+    block_size: int | None = None,
+    checkpoint: bool = False,
+    resume: bool = False,
+    only: Iterable[str] | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    stock: bool = False,
+    rollups: bool = True,
+    max_memory: int | None = None,
+) -> dict[str, int]:
+    """Generate a synthetic pharmacy-year dataset and return its row counts.
+
+    Outputs (gzipped JSONL):
+    - patients.jsonl.gz
+    - visits.jsonl.gz
+    - events.jsonl.gz
+    - inventory.jsonl.gz
+
+    This is a file sink over `iter_pharmacy_year`. `rng_mode="sharded"` splits the year into
+    month shards rendered by `workers` processes; see `RngMode`. `params` overrides the
+    pharmacy preset. `encoder="json"` uses the reference `json.dumps` path (same bytes).
+    `pipeline` moves gzip compression to per-file background threads (same bytes);
+    `compresslevel` trades size for speed. `block_size` writes each file as independent gzip
+    members of ~`block_size` uncompressed characters plus a `<file>.blocks.json` index (see
+    `gzip_blocks`); any gzip reader still reads the files as one stream.
+
+    `checkpoint` writes each month (shard) as its own gzip members and records progress in
+    `checkpoint.json` after it; `resume` continues from that checkpoint (or starts fresh if
+    there is none). A resumed run is byte-identical to an uninterrupted checkpointed run, and
+    decompresses to the same content as a run without checkpoints.
+
+    `only` (file stems, e.g. `["events", "visits"]`) and `date_from`/`date_to` (inclusive)
+    regenerate part of the dataset: only the selected files are written, and they hold
+    exactly the matching lines of a full run (same refs, same content). Work after the
+    window is skipped and unselected records are never built; see `RecordSelection`.
+
+    `stock` also writes `stock_daily.jsonl.gz`, the day-by-day OTC stock driven by the
+    purchases (see `stock`). It is computed in-stream when the records pass through this
+    process, otherwise from the written inventory and events files.
+
+    `rollups` writes the small aggregate files of `rollups.ROLLUP_FILES` (visits per day and
+    domain, intent mix, visits per patient), accumulated as the records go by (per shard in
+    sharded mode). They describe the full dataset, so partial runs skip them.
+
+    `max_memory` (bytes) is a budget for the run's in-memory state (see `estimate_memory`).
+    Settings that do not change the output are lowered to fit it (the gzip pipeline, then
+    `workers`); if it still does not fit, MemoryBudgetError is raised before any file is
+    written.
+    """
+    if params is None:
+        params = default_params(pharmacy=pharmacy)
+    _check_modes(mode=mode, rng_mode=rng_mode, workers=workers)
+    select = make_selection(only=only, date_from=date_from, date_to=date_to)
+    if stock and not select.is_all:
+        raise ValueError("stock needs the full dataset (no only/date_from/date_to)")
+    rollup = Rollups() if rollups and select.is_all else None
+    if max_memory is not None:
+        pipeline, workers = _fit_memory_budget(
+            max_memory,
+            year=year,
+            params=params,
+            mode=mode,
+            rng_mode=rng_mode,
+            workers=workers,
+            pipeline=pipeline,
+            block_size=block_size,
+            checkpoint=checkpoint or resume,
+            stock=stock,
+            rollups=rollup is not None,
+        )
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if checkpoint or resume or rng_mode == "sharded":
+        checkpointed = checkpoint or resume
+        rows = _write_batched(
+            seed=seed,
+            year=year,
+            mode=mode,
+            rng_mode=rng_mode,
+            workers=workers,
+            params=params,
+            out_dir=out_dir,
+            encoder=encoder,
+            compresslevel=compresslevel,
+            block_size=block_size,
+            checkpoint=checkpointed,
+            resume=resume,
+            select=select,
+            # Checkpointed chunks are not all rendered by this process: scan the files after.
+            rollups=None if checkpointed else rollup,
+        )
+        if rollup is not None:
+            (rollups_from_files(out_dir) if checkpointed else rollup).write(out_dir)
+        if stock:
+            rows["stock_daily"] = write_stock_from_files(
+                out_dir, year=year, compresslevel=compresslevel
+            )
+        return rows
+
+    records = _iter_pharmacy_year(
+        seed=seed,
+        pharmacy=pharmacy,
+        year=year,
+        mode=mode,
+        rng_mode=rng_mode,
+        params=params,
+        select=select,
+    )
+    write = partial(
+        _write_records,
+        out_dir=out_dir,
+        encoder=encoder,
+        compresslevel=compresslevel,
+        pipeline=pipeline,
+        block_size=block_size,
+        kinds=select.kinds,
+    )
+    observers: list[Callable[[str, dict[str, Any]], None]] = []
+    if rollup is not None:
+        observers.append(timed("sim_year.rollups", rollup.observe))
+    with ExitStack() as stack:
+        if stock:
+            ledger = stack.enter_context(
+                StockLedger(out_dir / STOCK_FILENAME, year=year, compresslevel=compresslevel)
+            )
+            observers.append(timed("sim_year.stock", ledger.observe))
+        rows = write(_tap(records, observers) if observers else records)
+    if stock:
+        rows["stock_daily"] = ledger.days_written
+    if rollup is not None:
+        rollup.write(out_dir)
+    return rows
+
+
+def _copy_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _own_intakes(records: Iterable[SimRecord]) -> Iterator[SimRecord]:
+    """Give each record its own copy of the interned intake payload it references."""
+    for rec in records:
+        if rec.kind == "visit":
+            rec.data["intake_extracted"] = _copy_json(rec.data["intake_extracted"])
+        elif rec.kind == "event" and rec.data["event_type"] == "symptom_intake":
+            payload = rec.data["payload"]
+            payload["intake_extracted"] = _copy_json(payload["intake_extracted"])
+        yield rec
+
+
+def _tap(
+    records: Iterable[SimRecord], observers: list[Callable[[str, dict[str, Any]], None]]
+) -> Iterator[SimRecord]:
+    """Pass `records` through, showing each one to `observers` (in-stream aggregates)."""
+    for rec in records:
+        for observe in observers:
+            observe(rec.kind, rec.data)
+        yield rec
+
+
+def _write_batched(
+    *,
+    seed: int,
+    year: int,
+    mode: Mode,
+    rng_mode: RngMode,
+    workers: int,
+    params: PharmacyYearParams,
+    out_dir: Path,
+    encoder: EncoderName,
+    compresslevel: int,
+    block_size: int | None,
+    checkpoint: bool,
+    resume: bool,
+    select: RecordSelection,
+    rollups: Rollups | None,
+) -> dict[str, int]:
+    """Sharded and/or checkpointed writes (no single in-process record stream)."""
+    if checkpoint:
+        _check_checkpoint(mode=mode, rng_mode=rng_mode, block_size=block_size)
+        if not select.is_all:
+            raise ValueError("checkpoint/resume does not support only/date_from/date_to")
+        run = _run_identity(
+            seed=seed,
+            year=year,
+            rng_mode=rng_mode,
+            params=params,
+            encoder=encoder,
+            compresslevel=compresslevel,
+        )
+        if rng_mode == "sharded":
+            return _write_sharded_checkpointed(
+                _plan_shards(seed=seed, year=year, params=params),
+                out_dir=out_dir,
+                workers=workers,
+                run=run,
+                resume=resume,
+                encoder=encoder,
+                compresslevel=compresslevel,
+            )
+        return _write_v1_checkpointed(
+            seed=seed,
+            year=year,
+            params=params,
+            out_dir=out_dir,
+            run=run,
+            resume=resume,
+            encoder=encoder,
+            compresslevel=compresslevel,
+        )
+
+    shards = _plan_shards(seed=seed, year=year, params=params)
+    return _write_sharded(
+        shards,
+        out_dir=out_dir,
+        workers=workers,
+        encoder=encoder,
+        compresslevel=compresslevel,
+        block_size=block_size,
+        select=select,
+        rollups=rollups,
+    )
+
+
+YEARS_INDEX_FILENAME = "years.json"
+
+
+def _iter_v1_years(
+    *, seed: int, years: list[int], params: PharmacyYearParams, stats: list[dict[str, Any]]
+) -> Iterator[tuple[int, Iterator[SimRecord]]]:
+    """Yield `(year, records)` for consecutive years that share one v1 state.
+
+    The first year is exactly the single-year v1 stream. Before each later year, patients
+    churn out of the pool (see `PatientPool.churn`) and the same RNG, pool and counters carry
+    on, so refs stay unique across years. Each year re-emits the inventory but only the
+    patients who are new that year. `stats` receives one summary dict per finished year.
+    """
+    state = _V1State.start(seed=seed, initial_patients=params.initial_patients)
+    skus = _v1_skus(seed, "full")
+
+    def one_year(k: int, year: int) -> Iterator[SimRecord]:
+        churned = 0
+        if k == 0:
+            yield from _iter_v1_preamble(
+                seed=seed,
+                n_products=_v1_n_products("full"),
+                initial_patients=params.initial_patients,
+            )
+        else:
+            churned = state.pool.churn(state.rng, params.annual_churn)
+            for p in _generate_inventory(seed, n_products=_v1_n_products("full")):
+                yield SimRecord("inventory", p)
+        active_at_start = len(state.pool)
+        for month in range(1, 13):
+            yield from _iter_v1_month(
+                state, seed=seed, year=year, month=month, params=params, skus=skus
+            )
+        stats.append(
+            {
+                "year": year,
+                "churned": churned,
+                "active_at_start": active_at_start,
+                "active_at_end": len(state.pool),
+                "pool_slots": state.pool.slots,
+                "patient_counter": state.patient_counter,
+                "visit_counter": state.visit_counter,
+                "event_counter": state.event_counter,
+            }
+        )
+
+    for k, year in enumerate(years):
+        yield year, one_year(k, year)
+
+
+def generate_pharmacy_years(
+    *,
+    seed: int,
+    pharmacy: str,
+    first_year: int,
+    n_years: int,
+    out_dir: Path,
+    params: PharmacyYearParams | None = None,
+    encoder: EncoderName = "fast",
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    pipeline: bool = True,
+) -> dict[str, Any]:
+    """Simulate consecutive years of one pharmacy from a continuing state (v1, full mode).
+
+    Writes one dataset per year to `out_dir/<year>/` (same four files; patients files hold
+    only that year's new patients, visits may reference patients from earlier years) and a
+    `years.json` index with row counts and pool statistics. Churn keeps the active pool, and
+    so memory and per-visit cost, bounded however many years are simulated.
+    """
+    if n_years < 1:
+        raise ValueError("n_years must be >= 1")
+    if params is None:
+        params = default_params(pharmacy=pharmacy)
+    if not 0.0 <= params.annual_churn <= 1.0:
+        raise ValueError("annual_churn must be within [0, 1]")
+
+    years = list(range(first_year, first_year + n_years))
+    stats: list[dict[str, Any]] = []
+    rows: dict[int, dict[str, int]] = {}
+    for year, records in _iter_v1_years(seed=seed, years=years, params=params, stats=stats):
+        year_dir = out_dir / str(year)
+        year_dir.mkdir(parents=True, exist_ok=True)
+        rows[year] = _write_records(
+            records,
+            out_dir=year_dir,
+            encoder=encoder,
+            compresslevel=compresslevel,
+            pipeline=pipeline,
+        )
+
+    index = {
+        "schema_version": "0.0.0",
+        "seed": seed,
+        "pharmacy": pharmacy,
+        "annual_churn": params.annual_churn,
+        "years": [{**s, "dir": str(s["year"]), "rows": rows[s["year"]]} for s in stats],
+    }
+    (out_dir / YEARS_INDEX_FILENAME).write_text(
+        json.dumps(index, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+    )
+    return index
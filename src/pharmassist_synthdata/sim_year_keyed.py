@@ -0,0 +1,338 @@
+"""Counter-based sim-year engine (`rng_mode="keyed"`): any day or visit can be regenerated.
+
+Randomness is keyed instead of sequential:
+
+- each day has its own `random.Random` seeded from `(seed, "keyed", date)`; it draws the
+  day's visit count and, per visit, new vs returning and the intents (which fix the number
+  of events);
+- every other per-visit draw is a uniform derived from a hash of
+  `(seed, date, visit index in day, purpose)`.
+
+Refs and patient numbers only need prefix counts over days, which a small per-year table
+(`KeyedYear`) holds. Preferential attachment is sampled as a Pólya urn: a returning visit
+either picks a uniform existing patient or copies the patient of a uniform earlier returning
+visit, so a single visit is resolved by following a short chain of earlier visits instead
+of replaying the year.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import struct
+from bisect import bisect_right
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date
+from functools import cached_property
+from typing import Any
+
+from .profiling import stage
+from .sim_year import (
+    _INTAKE_DAYS,
+    _RX_POOL,
+    ALL_RECORDS,
+    RECORD_FILES,
+    PharmacyYearParams,
+    RecordKind,
+    RecordSelection,
+    SimRecord,
+    _derive_seed,
+    _domain_probs_by_month,
+    _event_record,
+    _generate_inventory,
+    _intake_payload,
+    _iter_dates,
+    _neg_binom,
+    _patient_record,
+    _pick_weighted,
+    _poisson,
+    _visit_record,
+    default_params,
+)
+
+_INV_2_53 = 1.0 / (1 << 53)
+_ALL_KINDS: frozenset[RecordKind] = frozenset(RECORD_FILES)
+
+
+_UNPACK_4Q = struct.Struct(">4Q").unpack
+
+
+def keyed_uniforms(seed: int, day: str, visit: int, purpose: str) -> tuple[float, ...]:
+    """Four independent uniforms in [0, 1) for one `(seed, day, visit, purpose)` key."""
+    digest = hashlib.blake2b(f"{seed}:{day}:{visit}:{purpose}".encode(), digest_size=32).digest()
+    a, b, c, d = _UNPACK_4Q(digest)
+    return (
+        (a >> 11) * _INV_2_53,
+        (b >> 11) * _INV_2_53,
+        (c >> 11) * _INV_2_53,
+        (d >> 11) * _INV_2_53,
+    )
+
+
+@dataclass(frozen=True)
+class _DayPlan:
+    day: date
+    # (is_new, otc_purchase, prescription_added) per visit, in visit order.
+    flags: tuple[tuple[bool, bool, bool], ...]
+
+    @cached_property
+    def new_before(self) -> tuple[int, ...]:
+        """new_before[i]: new-patient visits before visit i of the day (len = n + 1)."""
+        out = [0]
+        for is_new, _, _ in self.flags:
+            out.append(out[-1] + is_new)
+        return tuple(out)
+
+    @cached_property
+    def iso(self) -> str:
+        return self.day.isoformat()
+
+    @cached_property
+    def returning_positions(self) -> tuple[int, ...]:
+        return tuple(i for i, (is_new, _, _) in enumerate(self.flags) if not is_new)
+
+
+def _plan_day(seed: int, day: date, params: PharmacyYearParams) -> _DayPlan:
+    f_dow = params.dow_factors.get(day.weekday(), 1.0)
+    if f_dow <= 0:
+        return _DayPlan(day, ())
+    rng = random.Random(_derive_seed(seed, "keyed", day.isoformat()))
+    mu = params.mu_base * f_dow * params.month_factors.get(day.month, 1.0)
+    n = _poisson(rng, mu) if params.nb_k is None else _neg_binom(rng, mu, params.nb_k)
+    flags = tuple(
+        (
+            rng.random() < params.p_new_visit,
+            rng.random() < params.p_multi_intent,
+            rng.random() < 0.18,
+        )
+        for _ in range(n)
+    )
+    return _DayPlan(day, flags)
+
+
+class KeyedYear:
+    """Day table of one keyed pharmacy-year: prefix counts for refs and patient numbers.
+
+    Building it costs one small `random.Random` per day (no per-visit hashing), so any day
+    or visit is then reachable without generating the rest of the year.
+    """
+
+    @stage("sim_year.plan")
+    def __init__(self, *, seed: int, year: int, params: PharmacyYearParams) -> None:
+        self.seed = seed
+        self.year = year
+        self.params = params
+        self.days = [_plan_day(seed, d, params) for d in _iter_dates(year)]
+        self._day_index = {plan.day: k for k, plan in enumerate(self.days)}
+        self.skus = [str(p["sku"]) for p in _generate_inventory(seed, n_products=200)]
+
+        # Prefix counts before each day (len = n_days + 1).
+        self.visits_before = [0]
+        self.new_before = [0]
+        self.returning_before = [0]
+        self.events_before = [0]
+        for plan in self.days:
+            n_new = plan.new_before[-1]
+            n_events = sum(1 + otc + rx for _, otc, rx in plan.flags)
+            self.visits_before.append(self.visits_before[-1] + len(plan.flags))
+            self.new_before.append(self.new_before[-1] + n_new)
+            self.returning_before.append(self.returning_before[-1] + len(plan.flags) - n_new)
+            self.events_before.append(self.events_before[-1] + n_events)
+
+    def day_index(self, day: date) -> int:
+        try:
+            return self._day_index[day]
+        except KeyError:
+            raise ValueError(f"{day} is not in {self.year}") from None
+
+    def locate_visit(self, visit_index: int) -> tuple[int, int]:
+        """(day index, visit index in day) of the year's `visit_index`-th visit."""
+        if not 0 <= visit_index < self.visits_before[-1]:
+            raise ValueError(f"visit index out of range: {visit_index}")
+        k = bisect_right(self.visits_before, visit_index) - 1
+        return k, visit_index - self.visits_before[k]
+
+    def _pick_slot(self, k: int, i: int) -> tuple[bool, int]:
+        """(is patient number, value) for visit i of day k.
+
+        New visits and direct picks give a patient number; otherwise the value is the global
+        index of the earlier returning visit whose patient is copied.
+        """
+        plan = self.days[k]
+        n_patients = self.params.initial_patients + self.new_before[k] + plan.new_before[i]
+        if plan.flags[i][0]:
+            return True, n_patients
+        n_returning = self.returning_before[k] + (i - plan.new_before[i])
+        u = keyed_uniforms(self.seed, plan.iso, i, "pick")[0]
+        weight = n_patients + n_returning
+        if weight <= 0:
+            raise ValueError("Cannot pick a returning patient from an empty pool")
+        slot = min(int(u * weight), weight - 1)
+        if slot < n_patients:
+            return True, slot
+        return False, slot - n_patients
+
+    def _returning_visit(self, r: int) -> tuple[int, int]:
+        k = bisect_right(self.returning_before, r) - 1
+        return k, self.days[k].returning_positions[r - self.returning_before[k]]
+
+    def patient_of(self, k: int, i: int) -> int:
+        """Patient number of visit i of day k (walks back through copied visits)."""
+        while True:
+            resolved, value = self._pick_slot(k, i)
+            if resolved:
+                return value
+            k, i = self._returning_visit(value)
+
+    def event_offset(self, k: int, i: int) -> int:
+        """Global index of the first event of visit i of day k."""
+        flags = self.days[k].flags
+        return self.events_before[k] + sum(1 + otc + rx for _, otc, rx in flags[:i])
+
+    def iter_visit(
+        self,
+        k: int,
+        i: int,
+        idx: int,
+        event_n: int,
+        *,
+        kinds: frozenset[RecordKind] = _ALL_KINDS,
+    ) -> Iterator[SimRecord]:
+        """Visit i of day k for patient `idx`: new patient (if any), visit, events.
+
+        Only records of `kinds` are built; no draw depends on another, so skipping is free.
+        """
+        seed = self.seed
+        plan = self.days[k]
+        is_new, otc, rx = plan.flags[i]
+        occurred_at = plan.iso
+        if is_new and "patient" in kinds:
+            yield _patient_record(seed, idx, patient_seed_n=idx + 1)
+        if "visit" not in kinds and "event" not in kinds:
+            return
+        patient_ref = f"pt_{idx:06d}"
+        visit_ref = f"visit_{self.visits_before[k] + i:09d}"
+
+        u_domain, u_days, u_severity, _ = keyed_uniforms(seed, occurred_at, i, "intake")
+        domain = _pick_weighted(_domain_probs_by_month(plan.day.month), u_domain)
+        choices = _INTAKE_DAYS.get(domain, _INTAKE_DAYS["respiratory"])
+        days = choices[int(u_days * len(choices))]
+        severity = ("mild", "moderate")[int(u_severity * 2)] if domain == "pain" else None
+        intake_extracted = _intake_payload(domain, days, severity)
+        intents = ["symptom_advice"]
+        if otc:
+            intents.append("otc_purchase")
+        if rx:
+            intents.append("prescription_added")
+
+        if "visit" in kinds:
+            yield _visit_record(
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                primary_domain=domain,
+                intents=intents,
+                intake_extracted=intake_extracted,
+            )
+        if "event" not in kinds:
+            return
+
+        payloads: list[tuple[str, Any]] = [
+            ("symptom_intake", {"intake_extracted": intake_extracted})
+        ]
+        if otc:
+            u_sku, u_qty, _, _ = keyed_uniforms(seed, occurred_at, i, "items")
+            item = {"sku": self.skus[int(u_sku * len(self.skus))], "qty": 1 + int(u_qty * 3)}
+            payloads.append(("otc_purchase", {"items": [item]}))
+        if rx:
+            u_rx = keyed_uniforms(seed, occurred_at, i, "rx")[0]
+            rx_medications = [_RX_POOL[int(u_rx * len(_RX_POOL))]]
+            payloads.append(("prescription_added", {"rx_medications": rx_medications}))
+        for event_type, payload in payloads:
+            yield _event_record(
+                event_ref=f"ev_{event_n:09d}",
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                event_type=event_type,
+                payload=payload,
+            )
+            event_n += 1
+
+    def iter_day(
+        self,
+        k: int,
+        *,
+        patient_of: Callable[[int, int], int] | None = None,
+        kinds: frozenset[RecordKind] = _ALL_KINDS,
+    ) -> Iterator[SimRecord]:
+        """Records of day k in stream order."""
+        resolve = patient_of or self.patient_of
+        event_n = self.events_before[k]
+        for i, (_, otc, rx) in enumerate(self.days[k].flags):
+            yield from self.iter_visit(k, i, resolve(k, i), event_n, kinds=kinds)
+            event_n += 1 + otc + rx
+
+    def iter_year(self, select: RecordSelection = ALL_RECORDS) -> Iterator[SimRecord]:
+        """The full year (or the `select`ed part of it), in the same order as other modes."""
+        if "inventory" in select.kinds:
+            for p in _generate_inventory(self.seed, n_products=len(self.skus)):
+                yield SimRecord("inventory", p)
+        if "patient" in select.kinds:
+            for i in range(self.params.initial_patients):
+                yield _patient_record(self.seed, i, patient_seed_n=i)
+        if not select.kinds & {"patient", "visit", "event"}:
+            return
+
+        if select.date_from is not None:
+            # Days before the window are never visited: each visit walks its own copy chain.
+            for k, plan in enumerate(self.days):
+                if select.in_window(plan.day):
+                    yield from self.iter_day(k, kinds=select.kinds)
+            return
+
+        # Sequential pass: remember each returning visit's patient so copies are O(1).
+        returning_patients: list[int] = []
+
+        def patient_of(k: int, i: int) -> int:
+            resolved, value = self._pick_slot(k, i)
+            idx = value if resolved else returning_patients[value]
+            if not self.days[k].flags[i][0]:
+                returning_patients.append(idx)
+            return idx
+
+        for k, plan in enumerate(self.days):
+            if not select.in_window(plan.day):
+                return
+            yield from self.iter_day(k, patient_of=patient_of, kinds=select.kinds)
+
+
+def _keyed_year(
+    *, seed: int, pharmacy: str, year: int, params: PharmacyYearParams | None
+) -> KeyedYear:
+    if params is None:
+        params = default_params(pharmacy=pharmacy)
+    return KeyedYear(seed=seed, year=year, params=params)
+
+
+def regenerate_day(
+    *, seed: int, pharmacy: str, day: date, params: PharmacyYearParams | None = None
+) -> list[SimRecord]:
+    """Records of one day of the keyed stream, identical to the full-year output."""
+    year = _keyed_year(seed=seed, pharmacy=pharmacy, year=day.year, params=params)
+    return list(year.iter_day(year.day_index(day)))
+
+
+def regenerate_visit(
+    *,
+    seed: int,
+    pharmacy: str,
+    year: int,
+    visit_index: int,
+    params: PharmacyYearParams | None = None,
+) -> list[SimRecord]:
+    """Records of the `visit_index`-th visit (its new patient, if any, visit and events)."""
+    keyed = _keyed_year(seed=seed, pharmacy=pharmacy, year=year, params=params)
+    k, i = keyed.locate_visit(visit_index)
+    return list(keyed.iter_visit(k, i, keyed.patient_of(k, i), keyed.event_offset(k, i)))
@@ -0,0 +1,282 @@
+"""Vectorized sim-year engine (`rng_mode="np1"`, optional NumPy dependency).
+
+The whole year's random draws are made up front as arrays (daily counts, new vs returning
+patients, preferential-attachment picks, domains, durations, intents and SKU picks); records
+are then assembled from those arrays in one Python pass. Output is deterministic for a given
+seed and NumPy stream, but differs from the `v1` and `sharded` modes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install "pharmassist-synthdata[numpy]"
+    np = None
+
+from .profiling import stage
+from .sim_year import (
+    _INTAKE_DAYS,
+    _RX_POOL,
+    ALL_RECORDS,
+    PharmacyYearParams,
+    RecordSelection,
+    SimRecord,
+    _derive_seed,
+    _domain_probs_by_month,
+    _event_record,
+    _generate_inventory,
+    _intake_payload,
+    _iter_dates,
+    _patient_record,
+    _visit_record,
+)
+
+# Bump when the draw layout changes; it is part of every stream's seed.
+ENGINE_VERSION = "np1"
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError(
+            "rng_mode='np1' requires NumPy (pip install 'pharmassist-synthdata[numpy]')"
+        )
+
+
+def _stream(seed: int, purpose: str) -> Any:
+    # One independent PCG64 stream per purpose, so the arrays do not share a draw order.
+    return np.random.Generator(np.random.PCG64(_derive_seed(seed, ENGINE_VERSION, purpose)))
+
+
+@dataclass(frozen=True)
+class YearDraws:
+    """Per-day and per-visit draws for one pharmacy-year (parallel NumPy arrays)."""
+
+    days: list[date]
+    daily_counts: Any  # int64[n_days]
+    visit_day: Any  # int64[n_visits], index into `days`
+    is_new: Any  # bool[n_visits]
+    patient_idx: Any  # int64[n_visits]
+    domain_idx: Any  # int64[n_visits], index into `_DOMAINS`
+    duration_days: Any  # int64[n_visits]
+    pain_moderate: Any  # bool[n_visits]
+    otc: Any  # bool[n_visits]
+    rx: Any  # bool[n_visits]
+    sku_idx: Any  # int64[n_visits]
+    qty: Any  # int64[n_visits]
+    rx_idx: Any  # int64[n_visits], index into `_RX_POOL`
+
+
+_DOMAINS = tuple(_INTAKE_DAYS)
+
+
+def _daily_counts(seed: int, days: list[date], params: PharmacyYearParams) -> Any:
+    f_dow = np.array([params.dow_factors.get(d.weekday(), 1.0) for d in days])
+    f_month = np.array([params.month_factors.get(d.month, 1.0) for d in days])
+    mu = np.clip(params.mu_base * f_dow * f_month, 0.0, None)
+    rng = _stream(seed, "daily_counts")
+    if params.nb_k is not None and params.nb_k > 0:
+        # Gamma-Poisson mixture = negative binomial with mean mu and dispersion k.
+        lam = rng.gamma(params.nb_k, 1.0, size=len(days)) * (mu / params.nb_k)
+    else:
+        lam = mu
+    counts = rng.poisson(lam)
+    counts[f_dow <= 0] = 0
+    return counts
+
+
+def _preferential_picks(seed: int, is_new: Any, initial_patients: int) -> Any:
+    """Patient index of every visit under preferential attachment (weight = 1 + visits).
+
+    Picking by weight is a Pólya urn: with probability P/W take a uniform patient, otherwise
+    copy the patient of a uniform earlier returning visit (P patients, W = P + returning
+    visits so far). One uniform per visit decides both; the copy chains are then resolved
+    by pointer jumping, so the whole year is O(n log n) array work.
+    """
+    new_before = np.cumsum(is_new) - is_new
+    n_patients = initial_patients + new_before
+    patient_idx = np.where(is_new, n_patients, 0)
+
+    returning = np.flatnonzero(~is_new)
+    if len(returning) == 0:
+        return patient_idx
+    u = _stream(seed, "patient_picks").random(len(returning))
+    pool = n_patients[returning]
+    weight = pool + np.arange(len(returning))
+    if (weight <= 0).any():
+        raise ValueError("Cannot pick a returning patient from an empty pool")
+    slot = np.minimum((u * weight).astype(np.int64), weight - 1)
+    # parent[r] >= 0: returning visit r copies the patient of returning visit parent[r].
+    parent = np.where(slot >= pool, slot - pool, -1)
+    picked = np.where(slot >= pool, 0, slot)
+    while True:
+        linked = parent >= 0
+        if not linked.any():
+            break
+        target = np.where(linked, parent, 0)
+        picked = np.where(linked, picked[target], picked)
+        parent = np.where(linked, parent[target], parent)
+    patient_idx[returning] = picked
+    return patient_idx
+
+
+@stage("sim_year.plan")
+def draw_year(*, seed: int, year: int, params: PharmacyYearParams, n_skus: int) -> YearDraws:
+    """Make every random draw of the year as arrays (requires NumPy)."""
+    _require_numpy()
+    days = _iter_dates(year)
+    daily_counts = _daily_counts(seed, days, params)
+    visit_day = np.repeat(np.arange(len(days)), daily_counts)
+    n = len(visit_day)
+
+    is_new = _stream(seed, "new_patient").random(n) < params.p_new_visit
+    patient_idx = _preferential_picks(seed, is_new, params.initial_patients)
+
+    # Domains: same cumulative-weight rule as `_choice_weighted`, one table per month.
+    visit_month = np.array([d.month for d in days])[visit_day]
+    u_domain = _stream(seed, "domain").random(n)
+    domain_idx = np.zeros(n, dtype=np.int64)
+    for month in range(1, 13):
+        in_month = visit_month == month
+        probs = _domain_probs_by_month(month)
+        cum = np.cumsum([w for _, w in probs])
+        local = np.minimum(np.searchsorted(cum, u_domain[in_month] * cum[-1]), len(probs) - 1)
+        domain_idx[in_month] = np.array([_DOMAINS.index(k) for k, _ in probs])[local]
+
+    durations = _stream(seed, "duration")
+    n_choices = np.array([len(_INTAKE_DAYS[k]) for k in _DOMAINS])
+    width = int(n_choices.max())
+    table = np.array([_INTAKE_DAYS[k] + [0] * (width - len(_INTAKE_DAYS[k])) for k in _DOMAINS])
+    choice = (durations.random(n) * n_choices[domain_idx]).astype(np.int64)
+    duration_days = table[domain_idx, choice]
+    pain_moderate = durations.random(n) < 0.5
+
+    intents = _stream(seed, "intents")
+    otc = intents.random(n) < params.p_multi_intent
+    rx = intents.random(n) < 0.18
+
+    items = _stream(seed, "items")
+    sku_idx = items.integers(0, n_skus, size=n)
+    qty = items.integers(1, 4, size=n)
+    rx_idx = items.integers(0, len(_RX_POOL), size=n)
+
+    return YearDraws(
+        days=days,
+        daily_counts=daily_counts,
+        visit_day=visit_day,
+        is_new=is_new,
+        patient_idx=patient_idx,
+        domain_idx=domain_idx,
+        duration_days=duration_days,
+        pain_moderate=pain_moderate,
+        otc=otc,
+        rx=rx,
+        sku_idx=sku_idx,
+        qty=qty,
+        rx_idx=rx_idx,
+    )
+
+
+def iter_np1(
+    *,
+    seed: int,
+    year: int,
+    params: PharmacyYearParams,
+    select: RecordSelection = ALL_RECORDS,
+) -> Iterator[SimRecord]:
+    """Records of one pharmacy-year assembled from `draw_year` (same order as other modes).
+
+    Draws are made for the whole year either way; `select` only limits which records are
+    assembled.
+    """
+    _require_numpy()
+    inv = _generate_inventory(seed, n_products=200)
+    if "inventory" in select.kinds:
+        for p in inv:
+            yield SimRecord("inventory", p)
+    emit_patient = "patient" in select.kinds
+    emit_visit = "visit" in select.kinds
+    emit_event = "event" in select.kinds
+    if emit_patient:
+        for i in range(params.initial_patients):
+            yield _patient_record(seed, i, patient_seed_n=i)
+    if not (emit_patient or emit_visit or emit_event):
+        return
+
+    draws = draw_year(seed=seed, year=year, params=params, n_skus=len(inv))
+    skus = [str(p["sku"]) for p in inv]
+    occurred = [d.isoformat() for d in draws.days]
+    wanted = [select.in_window(d) for d in draws.days]
+    event_counter = 0
+    # `tolist()` once: Python ints/bools are much cheaper to index than NumPy scalars.
+    rows = zip(
+        draws.visit_day.tolist(),
+        draws.is_new.tolist(),
+        draws.patient_idx.tolist(),
+        draws.domain_idx.tolist(),
+        draws.duration_days.tolist(),
+        draws.pain_moderate.tolist(),
+        draws.otc.tolist(),
+        draws.rx.tolist(),
+        draws.sku_idx.tolist(),
+        draws.qty.tolist(),
+        draws.rx_idx.tolist(),
+        strict=True,
+    )
+    for visit_n, row in enumerate(rows):
+        day, is_new, idx, dom, days, moderate, otc, rx, sku, qty, rx_n = row
+        if not wanted[day]:
+            event_counter += 1 + otc + rx
+            continue
+        if is_new and emit_patient:
+            yield _patient_record(seed, idx, patient_seed_n=idx + 1)
+        patient_ref = f"pt_{idx:06d}"
+        visit_ref = f"visit_{visit_n:09d}"
+        occurred_at = occurred[day]
+        domain = _DOMAINS[dom]
+        severity = ("moderate" if moderate else "mild") if domain == "pain" else None
+        intake_extracted = _intake_payload(domain, days, severity)
+        intents = ["symptom_advice"]
+        if otc:
+            intents.append("otc_purchase")
+        if rx:
+            intents.append("prescription_added")
+
+        if emit_visit:
+            yield _visit_record(
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                primary_domain=domain,
+                intents=intents,
+                intake_extracted=intake_extracted,
+            )
+        if not emit_event:
+            event_counter += 1 + otc + rx
+            continue
+
+        payloads: list[tuple[str, Any]] = [
+            ("symptom_intake", {"intake_extracted": intake_extracted})
+        ]
+        if otc:
+            payloads.append(("otc_purchase", {"items": [{"sku": skus[sku], "qty": qty}]}))
+        if rx:
+            payloads.append(("prescription_added", {"rx_medications": [_RX_POOL[rx_n]]}))
+        for event_type, payload in payloads:
+            yield _event_record(
+                event_ref=f"ev_{event_counter:09d}",
+                visit_ref=visit_ref,
+                patient_ref=patient_ref,
+                occurred_at=occurred_at,
+                event_type=event_type,
+                payload=payload,
+            )
+            event_counter += 1
@@ -0,0 +1,283 @@
+"""Day-by-day OTC stock of a pharmacy-year, written as keyframes plus daily deltas.
+
+The static `inventory.jsonl.gz` snapshot is the stock at the start of the year; each SKU's
+par level is its snapshot quantity, raised to `RestockSchedule.min_par` (so SKUs that start
+out of stock still get deliveries). `otc_purchase` events draw stock down (never below
+zero; the shortfall is reported as `unmet`), and deliveries on `RestockSchedule.weekdays`
+top every SKU back up to par before the day's sales.
+
+`stock_daily.jsonl.gz` has one line per day holding the end-of-day stock: a full
+`keyframe` every `keyframe_days` days, otherwise a `delta` of only the SKUs that changed.
+Each keyframe starts a new gzip block (see `gzip_blocks`), so `stock_on` rebuilds any date
+from one keyframe block instead of scanning the file.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from .constants import STOCK_FILENAME
+from .gzip_blocks import (
+    BlockIndexBuilder,
+    compress_blocks,
+    find_block,
+    load_block_index,
+    read_block,
+)
+from .profiling import stage
+from .writers import DEFAULT_COMPRESSLEVEL
+
+DEFAULT_KEYFRAME_DAYS = 28
+STOCK_SCHEMA_VERSION = "0.0.0"
+
+
+@dataclass(frozen=True)
+class RestockSchedule:
+    """Delivery days (`date.weekday()` numbers); a delivery refills every SKU to par."""
+
+    weekdays: tuple[int, ...] = (0, 3)  # Monday and Thursday
+    min_par: int = 5  # par floor, for SKUs whose snapshot quantity is lower (or zero)
+
+    def delivers_on(self, day: date) -> bool:
+        return day.weekday() in self.weekdays
+
+
+class StockBook:
+    """Stock levels of a fixed SKU list: `array("q")` buffers behind a SKU -> slot dict.
+
+    Every operation is O(1) per SKU touched; touched slots are tracked so a day's delta
+    costs nothing for untouched SKUs.
+    """
+
+    __slots__ = ("skus", "_slot", "qty", "par", "_reported", "_changed")
+
+    def __init__(self, stock: Iterable[tuple[str, int]], *, min_par: int = 0) -> None:
+        if min_par < 0:
+            raise ValueError("min_par must be >= 0")
+        pairs = list(stock)
+        self.skus = [sku for sku, _ in pairs]
+        self._slot = {sku: i for i, sku in enumerate(self.skus)}
+        if len(self._slot) != len(self.skus):
+            raise ValueError("Duplicate SKU in stock")
+        self.qty = array("q", (q for _, q in pairs))
+        self.par = array("q", (max(q, min_par) for q in self.qty))
+        self._reported = array("q", self.qty)  # levels as of the last `take_changes`
+        self._changed: set[int] = set()
+
+    def __getitem__(self, sku: str) -> int:
+        return self.qty[self._slot[sku]]
+
+    def sell(self, sku: str, qty: int) -> int:
+        """Take up to `qty` units of `sku` off the shelf; return the unmet quantity."""
+        slot = self._slot.get(sku)
+        if slot is None:
+            raise ValueError(f"Unknown SKU: {sku}")
+        sold = min(qty, self.qty[slot])
+        if sold:
+            self.qty[slot] -= sold
+            self._changed.add(slot)
+        return qty - sold
+
+    def restock(self) -> None:
+        """Refill every SKU below par."""
+        qty, par = self.qty, self.par
+        for slot in range(len(qty)):
+            if qty[slot] < par[slot]:
+                qty[slot] = par[slot]
+                self._changed.add(slot)
+
+    def take_changes(self) -> dict[str, int]:
+        """SKUs whose level differs from the previous call, with their current level."""
+        qty, reported = self.qty, self._reported
+        changes = {}
+        for slot in sorted(self._changed):
+            if qty[slot] != reported[slot]:
+                changes[self.skus[slot]] = qty[slot]
+                reported[slot] = qty[slot]
+        self._changed.clear()
+        return changes
+
+    def snapshot(self) -> dict[str, int]:
+        return dict(zip(self.skus, self.qty, strict=True))
+
+
+def _encode(payload: dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class StockLedger:
+    """Consumes a sim-year record stream (in order) and writes `stock_daily.jsonl.gz`.
+
+    Feed it the records with `observe(kind, data)`: the inventory snapshot first, then the
+    events in date order (other kinds are ignored). `close` finishes the year and writes the
+    block index.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        year: int,
+        schedule: RestockSchedule | None = None,
+        keyframe_days: int = DEFAULT_KEYFRAME_DAYS,
+        compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    ) -> None:
+        if keyframe_days < 1:
+            raise ValueError("keyframe_days must be >= 1")
+        self.schedule = schedule or RestockSchedule()
+        self.keyframe_days = keyframe_days
+        self.days_written = 0
+        self._compresslevel = compresslevel
+        self._inventory: list[tuple[str, int]] = []
+        self._book: StockBook | None = None
+        self._day = date(year, 1, 1)  # the open day
+        self._last = date(year, 12, 31)
+        self._unmet: dict[str, int] = {}
+        self._period: list[tuple[str, str | None]] = []
+        # One block per keyframe period; `block_size` is not used for cutting here.
+        self._out = BlockIndexBuilder(path, block_size=0)
+        self._closed = False
+
+    def observe(self, kind: str, data: dict[str, Any]) -> None:
+        if kind == "inventory":
+            if self._book is not None:
+                raise ValueError("inventory records must come before events")
+            self._inventory.append((str(data["sku"]), int(data["stock_qty"])))
+            return
+        if kind != "event" or data.get("event_type") != "otc_purchase":
+            return
+        book = self._open()
+        self._advance_to(date.fromisoformat(data["occurred_at"][:10]))
+        for item in data["payload"]["items"]:
+            unmet = book.sell(item["sku"], int(item["qty"]))
+            if unmet:
+                self._unmet[item["sku"]] = self._unmet.get(item["sku"], 0) + unmet
+
+    def _open(self) -> StockBook:
+        if self._book is None:
+            self._book = StockBook(self._inventory, min_par=self.schedule.min_par)
+            self._start_day()
+        return self._book
+
+    def _start_day(self) -> None:
+        assert self._book is not None
+        if self.schedule.delivers_on(self._day):
+            self._book.restock()
+
+    def _advance_to(self, day: date) -> None:
+        if day < self._day:
+            raise ValueError(f"events out of order: {day} after {self._day}")
+        if day > self._last:
+            raise ValueError(f"{day} is outside {self._last.year}")
+        while self._day < day:
+            self._end_day()
+            self._day += timedelta(days=1)
+            self._start_day()
+
+    def _end_day(self) -> None:
+        assert self._book is not None
+        iso = self._day.isoformat()
+        keyframe = self.days_written % self.keyframe_days == 0
+        changes = self._book.take_changes()
+        if keyframe:
+            self._flush_period()
+        line = _encode(
+            {
+                "schema_version": STOCK_SCHEMA_VERSION,
+                "date": iso,
+                "kind": "keyframe" if keyframe else "delta",
+                "stock": self._book.snapshot() if keyframe else changes,
+                "unmet": self._unmet,
+            }
+        )
+        self._period.append((line, iso))
+        self._unmet = {}
+        self.days_written += 1
+
+    def _flush_period(self) -> None:
+        for block in compress_blocks(
+            self._period, block_size=None, compresslevel=self._compresslevel
+        ):
+            self._out.append(block)
+        self._period = []
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._open()
+            self._advance_to(self._last)
+            self._end_day()
+            self._flush_period()
+        finally:
+            self._out.close()
+
+    def __enter__(self) -> StockLedger:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._closed = True
+            self._out.close()
+
+
+@stage("stock.scan")
+def write_stock_from_files(
+    out_dir: Path,
+    *,
+    year: int,
+    schedule: RestockSchedule | None = None,
+    keyframe_days: int = DEFAULT_KEYFRAME_DAYS,
+    compresslevel: int = DEFAULT_COMPRESSLEVEL,
+) -> int:
+    """Build `stock_daily.jsonl.gz` from an existing dataset's inventory and events files."""
+    with StockLedger(
+        out_dir / STOCK_FILENAME,
+        year=year,
+        schedule=schedule,
+        keyframe_days=keyframe_days,
+        compresslevel=compresslevel,
+    ) as ledger:
+        for kind, name in (("inventory", "inventory.jsonl.gz"), ("event", "events.jsonl.gz")):
+            with gzip.open(out_dir / name, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        ledger.observe(kind, json.loads(line))
+    return ledger.days_written
+
+
+def stock_on(path: Path, day: date) -> dict[str, int]:
+    """End-of-day stock on `day`, rebuilt from the nearest keyframe at or before it."""
+    blocks = load_block_index(path)
+    iso = day.isoformat()
+    if not blocks or iso < (blocks[0].first_ref or ""):
+        raise ValueError(f"{day} is before the first stock keyframe")
+    stock: dict[str, int] | None = None
+    for line in read_block(path, blocks[find_block(blocks, iso)]):
+        rec = json.loads(line)
+        if rec["date"] > iso:
+            break
+        if rec["kind"] == "keyframe":
+            stock = dict(rec["stock"])
+        else:
+            assert stock is not None
+            stock.update(rec["stock"])
+        if rec["date"] == iso:
+            return stock
+    raise ValueError(f"No stock line for {day} in {path}")
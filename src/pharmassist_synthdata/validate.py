@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import cache
 from typing import Any
 
 from jsonschema import Draft202012Validator
 
 from .contracts import load_schema_by_name, schema_registry
+from .profiling import stage
+from .schema_codegen import compiled_check
 
 
 @dataclass(frozen=True)
@@ -15,22 +19,59 @@ class SchemaIssue:
     message: str
 
 
+@dataclass(frozen=True)
+class BatchResult:
+    """Outcome of `validate_many`: issues of the invalid instances only, by input index."""
+
+    count: int
+    invalid: dict[int, list[SchemaIssue]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.invalid
+
+    def issues(self) -> list[SchemaIssue]:
+        """All issues, in input order."""
+        return [issue for idx in sorted(self.invalid) for issue in self.invalid[idx]]
+
+
+@cache
+@stage("validate.compile")
+def compiled_validator(schema_name: str) -> Draft202012Validator:
+    """Validator of a vendored schema, built once per schema name (treat as read-only)."""
+    return Draft202012Validator(load_schema_by_name(schema_name), registry=schema_registry())
+
+
+def _issues(validator: Draft202012Validator, instance: Any, schema_name: str) -> list[SchemaIssue]:
+    return [
+        SchemaIssue(schema_name=schema_name, json_path=str(err.json_path), message=err.message)
+        for err in sorted(validator.iter_errors(instance), key=lambda e: str(e.json_path))
+    ]
+
+
+@stage("validate.instance")
 def validate_instance(instance: Any, *, schema_name: str) -> list[SchemaIssue]:
-    schema = load_schema_by_name(schema_name)
-    validator = Draft202012Validator(schema, registry=schema_registry())
+    return _issues(compiled_validator(schema_name), instance, schema_name)
 
-    issues: list[SchemaIssue] = []
-    for err in sorted(validator.iter_errors(instance), key=lambda e: str(e.json_path)):
-        issues.append(
-            SchemaIssue(
-                schema_name=schema_name,
-                json_path=str(err.json_path),
-                message=err.message,
-            )
-        )
-    return issues
+
+@stage("validate.many")
+def validate_many(instances: Iterable[Any], schema_name: str) -> BatchResult:
+    """Validate instances against one schema.
+
+    Each instance gets the generated pass/fail check (see `schema_codegen`), which stops at
+    the first error. Issues are only collected, by jsonschema, for instances that fail, so a
+    valid batch creates no `SchemaIssue` objects.
+    """
+    is_valid = compiled_check(schema_name)
+    invalid: dict[int, list[SchemaIssue]] = {}
+    count = 0
+    for count, instance in enumerate(instances, start=1):
+        if not is_valid(instance):
+            invalid[count - 1] = _issues(compiled_validator(schema_name), instance, schema_name)
+    return BatchResult(count=count, invalid=invalid)
 
 
+@stage("validate.case_bundle")
 def validate_case_bundle(bundle: dict[str, Any]) -> list[SchemaIssue]:
     issues: list[SchemaIssue] = []
 
@@ -90,6 +131,9 @@ def validate_case_bundle(bundle: dict[str, Any]) -> list[SchemaIssue]:
 
     products = bundle.get("products")
     if isinstance(products, list):
+        objects = [p for p in products if isinstance(p, dict)]
+        checked = validate_many(objects, "product")
+        k = 0
         for idx, p in enumerate(products):
             if not isinstance(p, dict):
                 issues.append(
@@ -100,7 +144,8 @@ def validate_case_bundle(bundle: dict[str, Any]) -> list[SchemaIssue]:
                     )
                 )
                 continue
-            issues.extend(validate_instance(p, schema_name="product"))
+            issues.extend(checked.invalid.get(k, ()))
+            k += 1
     else:
         issues.append(
             SchemaIssue(
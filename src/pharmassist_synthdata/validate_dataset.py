@@ -0,0 +1,668 @@
+"""Streaming validation of a sim-year dataset directory (`pharmassist-synthdata validate-dataset`).
+
+The four `.jsonl.gz` files are read in chunks of `chunk_rows` lines and checked by a
+process pool, with a bounded number of chunks in flight:
+
+- schemas: `llm_context` (patients), `intake_extracted` (visits and `symptom_intake`
+  events) and `product` (inventory), checked with the generated validators of
+  `schema_codegen` (jsonschema only reports the issues of failing records);
+- referential integrity: every visit's `patient_ref` is a known patient, every event's
+  `visit_ref` a known visit and every purchased `sku` an inventory SKU. Known refs are kept
+  in `RefSet` bitmaps (1 bit per ref number), so memory does not depend on line sizes and
+  stays around `refs / 8` bytes.
+
+Files are consumed in dependency order (patients, inventory, visits, events). For a
+`generate_pharmacy_years` output (a `years.json` index), the years are checked in order
+with a shared patient set, since each year's patients file holds only its new patients.
+
+With `sample=k`, each file is only scanned: a regex picks out the refs it defines (so
+duplicates and the ref sets stay exact) and its rare rows, which are all checked:
+red-flag intakes, `other`-domain visits and out-of-stock SKUs. Of the other rows, a
+deterministic reservoir of `k` (seeded by `seed` and the file name) is checked. Each
+file then gets a Clopper-Pearson upper bound on its invalid-row rate, computed at a
+Bonferroni-adjusted level, so the per-file and overall bounds hold together with
+probability `confidence`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import random
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .constants import DEFAULT_CHUNK_ROWS, DEFAULT_CONFIDENCE, DEFAULT_MAX_ISSUES
+from .profiling import stage
+from .schema_codegen import compiled_check
+from .validate import compiled_validator
+
+# Files in dependency order: (kind, file name).
+DATASET_FILES = (
+    ("patient", "patients.jsonl.gz"),
+    ("inventory", "inventory.jsonl.gz"),
+    ("visit", "visits.jsonl.gz"),
+    ("event", "events.jsonl.gz"),
+)
+
+RefKey = int | str
+# RefSet bitmap growth budget: always 2**20 bits, beyond that 64 bits per ref held.
+_MIN_BITS = 1 << 20
+_DENSITY = 64
+
+# Rows always checked by a sampled run (matched on the raw JSON line).
+_RARE = {
+    "visit": re.compile(r'"red_flags":\s*\[\s*[^\]\s]|"primary_domain":\s*"other"'),
+    "event": re.compile(r'"red_flags":\s*\[\s*[^\]\s]'),
+    "inventory": re.compile(r'"in_stock":\s*false'),
+}
+# Ref defined by each row of a file, for the scan of a sampled run: (regex, ref_key prefix).
+_SCAN_REFS = {
+    "patient": (re.compile(r'"patient_ref":\s*"([^"\\]*)"'), "pt_"),
+    "visit": (re.compile(r'"visit_ref":\s*"([^"\\]*)"'), "visit_"),
+    "inventory": (re.compile(r'"sku":\s*"([^"\\]*)"'), None),
+}
+
+
+@dataclass(frozen=True)
+class DatasetIssue:
+    file: str
+    line: int  # 1-based
+    check: str  # schema name, "json" or "ref"
+    json_path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.file}:{self.line} {self.check} {self.json_path}: {self.message}"
+
+
+def ref_key(ref: Any, prefix: str) -> RefKey:
+    """`ref_key("pt_000042", "pt_")` -> 42 (a bitmap slot); other refs stay strings."""
+    ref = str(ref)
+    digits = ref[len(prefix) :]
+    numbered = ref.startswith(prefix) and digits.isascii() and digits.isdecimal()
+    return int(digits) if numbered else ref
+
+
+class RefSet:
+    """Set of refs: numbered refs as bits of a `bytearray`, anything else in a plain set.
+
+    The bitmap only grows up to `max(_MIN_BITS, _DENSITY * refs held)` bits, so a corrupt
+    huge ref number (`pt_99999999999999`) goes to the plain set instead of allocating
+    terabytes; dense numbering, as generated, always stays in the bitmap.
+    """
+
+    __slots__ = ("_bits", "_other", "count")
+
+    def __init__(self) -> None:
+        self._bits = bytearray()
+        self._other: set[RefKey] = set()
+        self.count = 0
+
+    def add(self, key: RefKey) -> bool:
+        """Add `key`; False if it was already present."""
+        if key in self:
+            return False
+        limit = max(len(self._bits) * 8, _MIN_BITS, _DENSITY * (self.count + 1))
+        if isinstance(key, int) and key < limit:
+            byte, bit = divmod(key, 8)
+            if byte >= len(self._bits):
+                self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+            self._bits[byte] |= 1 << bit
+        else:
+            self._other.add(key)
+        self.count += 1
+        return True
+
+    def __contains__(self, key: RefKey) -> bool:
+        if isinstance(key, int):
+            byte, bit = divmod(key, 8)
+            if byte < len(self._bits) and self._bits[byte] >> bit & 1:
+                return True
+        # Ints may be here too: added before the bitmap grew far enough to hold them.
+        return key in self._other
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+@dataclass(frozen=True)
+class _Chunk:
+    year: int  # index of the dataset directory (one per simulated year)
+    kind: str
+    file: str
+    first_line: int
+    lines: list[str]
+    max_issues: int
+    numbers: tuple[int, ...] = ()  # line numbers, if not consecutive from `first_line`
+    sampled: bool = False  # refs were already defined by the scan
+
+
+@dataclass
+class _ChunkResult:
+    year: int
+    kind: str
+    file: str
+    rows: int = 0
+    n_issues: int = 0
+    issues: list[DatasetIssue] = field(default_factory=list)
+    bad: set[int] = field(default_factory=set)  # lines with at least one issue
+    # Refs this chunk defines (patient/visit refs, SKUs), in line order with their line.
+    defined: list[tuple[int, RefKey]] = field(default_factory=list)
+    # Refs this chunk points to, per target set: "patient", "visit" or "sku".
+    uses: dict[str, list[tuple[int, RefKey]]] = field(default_factory=dict)
+
+    def issue(self, chunk: _Chunk, line: int, check: str, json_path: str, message: str) -> None:
+        self.n_issues += 1
+        self.bad.add(line)
+        if len(self.issues) < chunk.max_issues:
+            self.issues.append(DatasetIssue(chunk.file, line, check, json_path, message))
+
+
+def _schema_issues(schema_name: str, instance: Any) -> list[tuple[str, str]]:
+    if compiled_check(schema_name)(instance):
+        return []
+    validator = compiled_validator(schema_name)
+    return [
+        (str(err.json_path), err.message)
+        for err in sorted(validator.iter_errors(instance), key=lambda e: str(e.json_path))
+    ]
+
+
+def _check(
+    result: _ChunkResult, chunk: _Chunk, line: int, schema_name: str, path: str, instance: Any
+) -> None:
+    if not isinstance(instance, dict):
+        result.issue(chunk, line, schema_name, path, "Missing or invalid object")
+        return
+    for json_path, message in _schema_issues(schema_name, instance):
+        result.issue(chunk, line, schema_name, path + json_path.removeprefix("$"), message)
+
+
+def _use(result: _ChunkResult, target: str, line: int, key: RefKey) -> None:
+    result.uses.setdefault(target, []).append((line, key))
+
+
+@stage("validate.dataset_chunk")
+def _check_chunk(chunk: _Chunk) -> _ChunkResult:
+    """Parse and check one chunk (runs in the worker processes)."""
+    result = _ChunkResult(chunk.year, chunk.kind, chunk.file)
+    numbers = chunk.numbers or range(chunk.first_line, chunk.first_line + len(chunk.lines))
+    for line, text in zip(numbers, chunk.lines, strict=True):
+        if not text.strip():
+            continue
+        result.rows += 1
+        try:
+            rec = json.loads(text)
+        except ValueError as exc:
+            result.issue(chunk, line, "json", "$", f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(rec, dict):
+            result.issue(chunk, line, "json", "$", "Record is not an object")
+            continue
+        kind = chunk.kind
+        if kind == "patient":
+            _check(result, chunk, line, "llm_context", "$.llm_context", rec.get("llm_context"))
+            result.defined.append((line, ref_key(rec.get("patient_ref"), "pt_")))
+        elif kind == "inventory":
+            _check(result, chunk, line, "product", "$", rec)
+            result.defined.append((line, str(rec.get("sku"))))
+        elif kind == "visit":
+            _check(
+                result,
+                chunk,
+                line,
+                "intake_extracted",
+                "$.intake_extracted",
+                rec.get("intake_extracted"),
+            )
+            result.defined.append((line, ref_key(rec.get("visit_ref"), "visit_")))
+            _use(result, "patient", line, ref_key(rec.get("patient_ref"), "pt_"))
+        else:
+            _use(result, "visit", line, ref_key(rec.get("visit_ref"), "visit_"))
+            payload = rec.get("payload")
+            if payload is None:
+                payload = {}
+            elif not isinstance(payload, dict):
+                result.issue(chunk, line, "json", "$.payload", "Payload is not an object")
+                continue
+            if rec.get("event_type") == "symptom_intake":
+                _check(
+                    result,
+                    chunk,
+                    line,
+                    "intake_extracted",
+                    "$.payload.intake_extracted",
+                    payload.get("intake_extracted"),
+                )
+            elif rec.get("event_type") == "otc_purchase":
+                items = payload.get("items")
+                if items is None:
+                    items = []
+                elif not isinstance(items, list):
+                    result.issue(chunk, line, "json", "$.payload.items", "Items is not a list")
+                    continue
+                for item in items:
+                    sku = item.get("sku") if isinstance(item, dict) else None
+                    _use(result, "sku", line, str(sku))
+    if chunk.sampled:
+        result.defined.clear()
+    return result
+
+
+def binomial_upper_bound(invalid: int, n: int, confidence: float) -> float:
+    """Clopper-Pearson upper bound on a rate after finding `invalid` bad rows among `n`."""
+    if invalid >= n:
+        return 1.0
+    alpha = 1.0 - confidence
+    if invalid == 0:
+        return 1.0 - alpha ** (1.0 / n)
+
+    def cdf(p: float) -> float:
+        log_p, log_q = math.log(p), math.log1p(-p)
+        return sum(
+            math.exp(
+                math.lgamma(n + 1)
+                - math.lgamma(i + 1)
+                - math.lgamma(n - i + 1)
+                + i * log_p
+                + (n - i) * log_q
+            )
+            for i in range(invalid + 1)
+        )
+
+    # The bound is the p where P(X <= invalid) falls to alpha; the CDF decreases in p.
+    lo, hi = invalid / n, 1.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if cdf(mid) > alpha:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+@dataclass(frozen=True)
+class SampleStats:
+    """What a sampled run checked in one file, and its bound on the file's invalid rows."""
+
+    file: str
+    rows: int
+    rare: int  # rows of rare categories, all checked
+    sampled: int  # reservoir rows checked, out of `rows - rare`
+    invalid_rare: int  # invalid rare rows, plus rows defining a duplicate ref
+    invalid_sampled: int
+    invalid_upper: float  # upper confidence bound on the number of invalid rows
+
+    @property
+    def rate_upper(self) -> float:
+        return self.invalid_upper / self.rows if self.rows else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "rare": self.rare,
+            "sampled": self.sampled,
+            "invalid_rare": self.invalid_rare,
+            "invalid_sampled": self.invalid_sampled,
+            "rate_upper": round(self.rate_upper, 6),
+        }
+
+
+@dataclass
+class DatasetReport:
+    """Outcome of `validate_dataset`; `issues` holds the first `max_issues` problems."""
+
+    rows: dict[str, int] = field(default_factory=dict)
+    n_issues: int = 0
+    invalid_rows: int = 0  # checked rows with at least one issue
+    issues: list[DatasetIssue] = field(default_factory=list)
+    max_issues: int = DEFAULT_MAX_ISSUES
+    # Sampled runs only: per-file statistics and the confidence of their bounds.
+    sample: list[SampleStats] = field(default_factory=list)
+    confidence: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.n_issues == 0
+
+    @property
+    def rate_upper(self) -> float:
+        """Upper bound on the dataset's invalid-row rate (exact for a full run)."""
+        if not self.sample:
+            rows = sum(self.rows.values())
+            return self.invalid_rows / rows if rows else 0.0
+        rows = sum(s.rows for s in self.sample)
+        return sum(s.invalid_upper for s in self.sample) / rows if rows else 0.0
+
+    def add(self, issue: DatasetIssue) -> None:
+        self.n_issues += 1
+        if len(self.issues) < self.max_issues:
+            self.issues.append(issue)
+
+    def to_json(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "ok": self.ok,
+            "rows": dict(sorted(self.rows.items())),
+            "issues": self.n_issues,
+            "invalid_rows": self.invalid_rows,
+            "first_issues": [str(i) for i in self.issues],
+        }
+        if self.sample:
+            out["sampling"] = {
+                "confidence": self.confidence,
+                "rate_upper": round(self.rate_upper, 6),
+                "files": {s.file: s.to_json() for s in self.sample},
+            }
+        return out
+
+
+def _iter_chunks(
+    path: Path, *, year: int, kind: str, label: str, chunk_rows: int, max_issues: int
+) -> Iterator[_Chunk]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines: list[str] = []
+        first = 1
+        for n, text in enumerate(f, start=1):
+            lines.append(text)
+            if len(lines) >= chunk_rows:
+                yield _Chunk(year, kind, label, first, lines, max_issues)
+                lines = []
+                first = n + 1
+        if lines:
+            yield _Chunk(year, kind, label, first, lines, max_issues)
+
+
+def _dataset_dirs(in_dir: Path) -> list[tuple[str, Path]]:
+    """`(file label prefix, directory)` of each year to check, oldest first."""
+    index = in_dir / "years.json"
+    if index.exists():
+        years = json.loads(index.read_text(encoding="utf-8"))["years"]
+        return [(f"{y['dir']}/", in_dir / y["dir"]) for y in years]
+    return [("", in_dir)]
+
+
+def _bounded_map(
+    chunks: Iterable[_Chunk], executor: ProcessPoolExecutor | None, in_flight: int
+) -> Iterator[_ChunkResult]:
+    """`_check_chunk` over `chunks`, in order, with at most `in_flight` chunks submitted."""
+    if executor is None:
+        yield from map(_check_chunk, chunks)
+        return
+    pending: deque[Future[_ChunkResult]] = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(_check_chunk, chunk))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# Record kind -> (ref set it adds to, field); ref set -> field of the records using it.
+_DEFINES = {
+    "patient": ("patient", "$.patient_ref"),
+    "visit": ("visit", "$.visit_ref"),
+    "inventory": ("sku", "$.sku"),
+}
+_USES = {"patient": "$.patient_ref", "visit": "$.visit_ref", "sku": "$.payload.items[].sku"}
+
+
+class _Refs:
+    """Known refs while merging: patients span all years, visits and SKUs one year."""
+
+    def __init__(self) -> None:
+        self.year = -1
+        self.sets: dict[str, RefSet] = {"patient": RefSet()}
+
+    def for_year(self, year: int) -> dict[str, RefSet]:
+        if year != self.year:
+            self.year = year
+            self.sets = {"patient": self.sets["patient"], "visit": RefSet(), "sku": RefSet()}
+        return self.sets
+
+
+def _define(
+    own: RefSet, kind: str, file: str, line: int, key: RefKey, report: DatasetReport
+) -> bool:
+    """Add a defined ref; False (and an issue) if it is a duplicate."""
+    if own.add(key):
+        return True
+    name, path = _DEFINES[kind]
+    report.add(DatasetIssue(file, line, "ref", path, f"Duplicate {name}: {key}"))
+    return False
+
+
+def _merge(result: _ChunkResult, refs: _Refs, report: DatasetReport) -> None:
+    report.rows[result.file] = report.rows.get(result.file, 0) + result.rows
+    report.n_issues += result.n_issues - len(result.issues)
+    for issue in result.issues:
+        report.add(issue)
+    sets = refs.for_year(result.year)
+    if result.defined:
+        own = sets[_DEFINES[result.kind][0]]
+        for line, key in result.defined:
+            if not _define(own, result.kind, result.file, line, key, report):
+                result.bad.add(line)
+    for target, uses in result.uses.items():
+        known = sets[target]
+        for line, key in uses:
+            if key not in known:
+                result.bad.add(line)
+                report.add(
+                    DatasetIssue(
+                        result.file, line, "ref", _USES[target], f"Unknown {target}: {key}"
+                    )
+                )
+    report.invalid_rows += len(result.bad)
+
+
+@dataclass
+class _Scan:
+    """Counters of a sampled file, filled while its chunks are produced."""
+
+    rows: int = 0
+    rare: set[int] = field(default_factory=set)
+    duplicates: int = 0
+    sampled: int = 0
+
+
+def _sample_chunks(
+    path: Path,
+    *,
+    year: int,
+    kind: str,
+    label: str,
+    size: int,
+    seed: int,
+    chunk_rows: int,
+    max_issues: int,
+    own: RefSet | None,
+    report: DatasetReport,
+    scan: _Scan,
+) -> Iterator[_Chunk]:
+    """Scan a file: define its refs, yield its rare rows, then a reservoir of `size` others."""
+    rare_re = _RARE.get(kind)
+    ref_re, prefix = _SCAN_REFS.get(kind, (None, None))
+    rng = random.Random(f"{seed}:{label}")
+    reservoir: list[tuple[int, str]] = []
+    rare: list[tuple[int, str]] = []
+    seen = 0  # non-rare rows so far
+    # Algorithm L: `w` and the index of the next non-rare row that enters the reservoir.
+    w = math.exp(math.log(1.0 - rng.random()) / size)
+    nxt = size + int(math.log(1.0 - rng.random()) / math.log1p(-w))
+
+    def emit(rows: list[tuple[int, str]]) -> _Chunk:
+        numbers, lines = zip(*rows, strict=True)
+        return _Chunk(year, kind, label, numbers[0], list(lines), max_issues, numbers, True)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            scan.rows += 1
+            is_rare = rare_re is not None and rare_re.search(text) is not None
+            if ref_re is not None and own is not None:
+                m = ref_re.search(text)
+                if m is None:
+                    is_rare = True  # no ref to define: let the full check report it
+                else:
+                    key = m.group(1) if prefix is None else ref_key(m.group(1), prefix)
+                    if not _define(own, kind, label, line, key, report):
+                        scan.duplicates += 1
+            if is_rare:
+                scan.rare.add(line)
+                rare.append((line, text))
+                if len(rare) >= chunk_rows:
+                    yield emit(rare)
+                    rare = []
+                continue
+            if seen < size:
+                reservoir.append((line, text))
+            elif seen == nxt:
+                reservoir[rng.randrange(size)] = (line, text)
+                w *= math.exp(math.log(1.0 - rng.random()) / size)
+                nxt += int(math.log(1.0 - rng.random()) / math.log1p(-w)) + 1
+            seen += 1
+    if rare:
+        yield emit(rare)
+    reservoir.sort()
+    scan.sampled = len(reservoir)
+    for start in range(0, len(reservoir), chunk_rows):
+        yield emit(reservoir[start : start + chunk_rows])
+
+
+def _sample_stats(label: str, scan: _Scan, bad: set[int], confidence: float) -> SampleStats:
+    invalid_rare = len(bad & scan.rare) + scan.duplicates
+    invalid_sampled = len(bad - scan.rare)
+    others = scan.rows - len(scan.rare)
+    if scan.sampled >= others:  # every row was checked
+        rate = invalid_sampled / others if others else 0.0
+    else:
+        rate = binomial_upper_bound(invalid_sampled, scan.sampled, confidence)
+    return SampleStats(
+        file=label,
+        rows=scan.rows,
+        rare=len(scan.rare),
+        sampled=scan.sampled,
+        invalid_rare=invalid_rare,
+        invalid_sampled=invalid_sampled,
+        invalid_upper=min(float(scan.rows), invalid_rare + others * rate),
+    )
+
+
+@stage("validate.dataset")
+def validate_dataset(
+    in_dir: Path,
+    *,
+    workers: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    max_issues: int = DEFAULT_MAX_ISSUES,
+    sample: int | None = None,
+    seed: int = 0,
+    confidence: float = DEFAULT_CONFIDENCE,
+) -> DatasetReport:
+    """Check the schemas and cross-file refs of a sim-year (or sim-years) output directory.
+
+    With `sample`, only the rare rows and `sample` other rows per file are checked, and the
+    report bounds the invalid-row rate instead (see the module docstring).
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be >= 1")
+    if sample is not None and sample < 1:
+        raise ValueError("sample must be >= 1")
+    if not 0.0 < confidence < 1.0:
+        raise ValueError("confidence must be in (0, 1)")
+    dirs = _dataset_dirs(in_dir)
+    for _, d in dirs:
+        for _, name in DATASET_FILES:
+            if not (d / name).exists():
+                raise ValueError(f"Missing dataset file: {d / name}")
+
+    report = DatasetReport(max_issues=max_issues)
+    refs = _Refs()
+    with ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        if sample is not None:
+            _validate_sample(
+                dirs,
+                report,
+                refs,
+                executor,
+                workers=workers,
+                chunk_rows=chunk_rows,
+                size=sample,
+                seed=seed,
+                confidence=confidence,
+            )
+            return report
+        chunks = (
+            chunk
+            for year, (prefix, d) in enumerate(dirs)
+            for kind, name in DATASET_FILES
+            for chunk in _iter_chunks(
+                d / name,
+                year=year,
+                kind=kind,
+                label=prefix + name,
+                chunk_rows=chunk_rows,
+                max_issues=max_issues,
+            )
+        )
+        # Results are merged in file order, so refs are always defined before they are used.
+        for result in _bounded_map(chunks, executor, 2 * workers):
+            _merge(result, refs, report)
+    return report
+
+
+def _validate_sample(
+    dirs: list[tuple[str, Path]],
+    report: DatasetReport,
+    refs: _Refs,
+    executor: ProcessPoolExecutor | None,
+    *,
+    workers: int,
+    chunk_rows: int,
+    size: int,
+    seed: int,
+    confidence: float,
+) -> None:
+    # Each file is scanned and merged before the next, so its refs are complete when used.
+    level = 1.0 - (1.0 - confidence) / (len(dirs) * len(DATASET_FILES))
+    report.confidence = confidence
+    for year, (prefix, d) in enumerate(dirs):
+        for kind, name in DATASET_FILES:
+            label = prefix + name
+            defines = _DEFINES.get(kind)
+            scan = _Scan()
+            chunks = _sample_chunks(
+                d / name,
+                year=year,
+                kind=kind,
+                label=label,
+                size=size,
+                seed=seed,
+                chunk_rows=chunk_rows,
+                max_issues=report.max_issues,
+                own=refs.for_year(year)[defines[0]] if defines else None,
+                report=report,
+                scan=scan,
+            )
+            bad: set[int] = set()
+            for result in _bounded_map(chunks, executor, 2 * workers):
+                _merge(result, refs, report)
+                bad |= result.bad
+            report.rows[label] = scan.rows
+            report.invalid_rows += scan.duplicates
+            report.sample.append(_sample_stats(label, scan, bad, level))
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import gzip
+import io
+import queue
+import threading
+from pathlib import Path
+from types import TracebackType
+from typing import TextIO
+
+from .profiling import timed
+
+DEFAULT_COMPRESSLEVEL = 9
+# Uncompressed bytes per hand-off to the compressor thread. Large enough for zlib to release
+# the GIL for a meaningful stretch, small enough to keep the pipeline memory modest.
+_BATCH_CHARS = 1 << 18
+_MAX_PENDING_BATCHES = 8
+# Worst-case bytes a `ThreadedGzipWriter` holds: the batch being filled, its encoded copy,
+# the queue and the batch being compressed (memory estimates use this).
+PIPELINE_BUFFER_BYTES = (_MAX_PENDING_BATCHES + 4) * _BATCH_CHARS
+
+
+def open_jsonl_gz(path: Path, *, compresslevel: int = DEFAULT_COMPRESSLEVEL) -> TextIO:
+    """Inline gzip text writer (compresses on the calling thread)."""
+    # mtime=0 keeps the gzip header (and therefore the file bytes) reproducible.
+    raw = gzip.GzipFile(path, mode="wb", compresslevel=compresslevel, mtime=0)
+    return io.TextIOWrapper(raw, encoding="utf-8")
+
+
+class ThreadedGzipWriter:
+    """Text writer that gzips on a background thread.
+
+    Writes are batched into ~256 KiB buffers and handed to a per-file compressor thread
+    through a bounded queue, so the producer blocks instead of buffering without limit when
+    compression falls behind. zlib releases the GIL while deflating, which lets compression
+    overlap with record generation. The file is a single gzip stream with the same bytes as
+    `open_jsonl_gz` at the same level.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        compresslevel: int = DEFAULT_COMPRESSLEVEL,
+        max_pending: int = _MAX_PENDING_BATCHES,
+    ) -> None:
+        self._gz = gzip.GzipFile(path, mode="wb", compresslevel=compresslevel, mtime=0)
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=max_pending)
+        self._parts: list[str] = []
+        self._size = 0
+        self._error: BaseException | None = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"gzip-writer:{path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        compress = timed("gzip.compress", self._gz.write)
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                continue  # keep draining so the producer never blocks on a dead consumer
+            try:
+                compress(chunk)
+            except BaseException as exc:
+                self._error = exc
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise OSError(f"background gzip writer failed: {self._error}") from self._error
+
+    def _flush_batch(self) -> None:
+        if not self._parts:
+            return
+        data = "".join(self._parts).encode("utf-8")
+        self._parts = []
+        self._size = 0
+        self._raise_if_failed()
+        self._queue.put(data)
+
+    def write(self, text: str) -> int:
+        if self._closed:
+            raise ValueError("write to closed writer")
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= _BATCH_CHARS:
+            self._flush_batch()
+        return len(text)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._flush_batch()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+            # TextIOWrapper.close() sync-flushes the GzipFile before closing it; do the same
+            # so both writers emit identical deflate blocks.
+            if self._error is None:
+                self._gz.flush()
+            self._gz.close()
+        self._raise_if_failed()
+
+    def __enter__(self) -> ThreadedGzipWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
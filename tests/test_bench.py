@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.bench import compare, run_benchmarks
+from pharmassist_synthdata.cli import main
+
+
+def test_quick_benchmarks_report_rates():
+    results = run_benchmarks(
+        ["case_bundle", "ocr_noise", "validate_instance"], repeat=1, quick=True
+    )
+    assert results["quick"] is True
+    assert results["results"]["case_bundle"]["bundles_per_s"] > 0
+    assert results["results"]["ocr_noise"]["chars_per_s"] > 0
+    assert results["results"]["validate_instance"]["instances_per_s"] > 0
+    with pytest.raises(ValueError):
+        run_benchmarks(["nope"])
+
+
+def test_compare_flags_rates_below_threshold():
+    baseline = {
+        "quick": False,
+        "thresholds": {"noisy": 0.5},
+        "results": {
+            "a": {"rows_per_s": 100.0, "mb_per_s": 10.0, "seconds": 1.0},
+            "noisy": {"pdfs_per_s": 100.0},
+        },
+    }
+    results = {
+        "quick": False,
+        "results": {
+            "a": {"rows_per_s": 70.0, "mb_per_s": 9.0, "seconds": 9.0},
+            "noisy": {"pdfs_per_s": 60.0},
+            "new": {"x_per_s": 1.0},
+        },
+    }
+    regressions = compare(results, baseline, threshold=0.2)
+    assert [(r.bench, r.metric) for r in regressions] == [("a", "rows_per_s")]
+    assert regressions[0].drop == pytest.approx(0.3)
+    assert compare(results, baseline, threshold=0.35) == []
+    with pytest.raises(ValueError):
+        compare({**results, "quick": True}, baseline)
+
+
+def test_bench_cli_writes_results_and_fails_on_regression(tmp_path: Path, capsys):
+    out = tmp_path / "bench.json"
+    assert (
+        main(["bench", "--quick", "--repeat", "1", "--only", "case_bundle", "--out", str(out)]) == 0
+    )
+    results = json.loads(out.read_text(encoding="utf-8"))
+    assert set(results["results"]) == {"case_bundle"}
+
+    # A baseline 100x faster than this run must be reported as a regression.
+    results["results"]["case_bundle"]["bundles_per_s"] *= 100
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(results), encoding="utf-8")
+    argv = ["bench", "--quick", "--repeat", "1", "--only", "case_bundle"]
+    assert main([*argv, "--baseline", str(baseline)]) == 1
+    assert "[REGRESSION] case_bundle bundles_per_s" in capsys.readouterr().err
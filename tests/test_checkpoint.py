@@ -0,0 +1,112 @@
+import gzip
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata import sim_year
+from pharmassist_synthdata.checkpoint import load_checkpoint
+from pharmassist_synthdata.sim_year import RECORD_FILES, default_params, generate_pharmacy_year
+
+
+def _small_params():
+    return replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+
+
+def _files(out_dir: Path) -> dict[str, bytes]:
+    return {name: (out_dir / name).read_bytes() for name in RECORD_FILES.values()}
+
+
+class _Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("rng_mode", ["v1", "sharded"])
+def test_resume_after_crash_is_byte_identical(tmp_path: Path, monkeypatch, rng_mode):
+    kwargs = dict(seed=11, pharmacy="paris15", year=2025, rng_mode=rng_mode, params=_small_params())
+    rows = generate_pharmacy_year(out_dir=tmp_path / "full", checkpoint=True, **kwargs)
+    expected = _files(tmp_path / "full")
+
+    # Content matches a run without checkpoints (only the gzip member layout differs).
+    generate_pharmacy_year(out_dir=tmp_path / "plain", **kwargs)
+    for name in RECORD_FILES.values():
+        assert gzip.decompress(expected[name]) == gzip.decompress(
+            (tmp_path / "plain" / name).read_bytes()
+        )
+
+    # Die while rendering July, after June's checkpoint.
+    if rng_mode == "v1":
+        real = sim_year._iter_v1_month
+
+        def crashing(state, *, month, **kw):
+            if month == 7:
+                raise _Crash
+            return real(state, month=month, **kw)
+
+        monkeypatch.setattr(sim_year, "_iter_v1_month", crashing)
+    else:
+        real = sim_year._render_shard
+
+        def crashing(shard, **kw):
+            if shard.shard == 7:
+                raise _Crash
+            return real(shard, **kw)
+
+        monkeypatch.setattr(sim_year, "_render_shard", crashing)
+
+    out = tmp_path / "resumed"
+    with pytest.raises(_Crash):
+        generate_pharmacy_year(out_dir=out, checkpoint=True, **kwargs)
+    assert load_checkpoint(out).last_chunk == 6
+    # Simulate a half-written chunk past the committed offsets.
+    with (out / "events.jsonl.gz").open("ab") as f:
+        f.write(b"\x1f\x8b torn write")
+
+    monkeypatch.undo()
+    assert generate_pharmacy_year(out_dir=out, resume=True, **kwargs) == rows
+    assert _files(out) == expected
+    assert load_checkpoint(out).last_chunk == 12
+
+
+def test_resume_rejects_a_different_run(tmp_path: Path):
+    params = _small_params()
+    generate_pharmacy_year(
+        seed=1, pharmacy="paris15", year=2025, out_dir=tmp_path, params=params, checkpoint=True
+    )
+    with pytest.raises(ValueError):
+        generate_pharmacy_year(
+            seed=2, pharmacy="paris15", year=2025, out_dir=tmp_path, params=params, resume=True
+        )
+    with pytest.raises(ValueError):
+        generate_pharmacy_year(
+            seed=1, pharmacy="paris15", year=2025, out_dir=tmp_path, mode="mini", checkpoint=True
+        )
+
+
+def test_fresh_run_discards_an_old_checkpoint(tmp_path: Path, monkeypatch):
+    kwargs = dict(seed=5, pharmacy="paris15", year=2025, params=_small_params())
+    rows = generate_pharmacy_year(out_dir=tmp_path, checkpoint=True, **kwargs)
+    expected = _files(tmp_path)
+
+    # A new run crashes before its first commit: the old run's offsets must not survive.
+    def crashing(**kw):
+        raise _Crash
+
+    monkeypatch.setattr(sim_year, "_iter_v1_preamble", crashing)
+    with pytest.raises(_Crash):
+        generate_pharmacy_year(out_dir=tmp_path, checkpoint=True, **kwargs)
+    assert load_checkpoint(tmp_path) is None
+
+    monkeypatch.undo()
+    assert generate_pharmacy_year(out_dir=tmp_path, resume=True, **kwargs) == rows
+    assert _files(tmp_path) == expected
+
+
+def test_resume_rejects_files_shorter_than_the_checkpoint(tmp_path: Path):
+    kwargs = dict(seed=5, pharmacy="paris15", year=2025, params=_small_params())
+    generate_pharmacy_year(out_dir=tmp_path, checkpoint=True, **kwargs)
+    events = tmp_path / RECORD_FILES["event"]
+    events.write_bytes(events.read_bytes()[:100])
+    with pytest.raises(ValueError, match="shorter"):
+        generate_pharmacy_year(out_dir=tmp_path, resume=True, **kwargs)
+    assert len(events.read_bytes()) == 100
@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from pharmassist_synthdata import bench, constants, sim_year
+from pharmassist_synthdata.bench import import_time
+
+# `python -X importtime` budget for `import pharmassist_synthdata.cli` (about 35 ms when
+# measured; it was over 300 ms when the CLI imported every command module up front).
+CLI_IMPORT_BUDGET_S = 0.15
+HEAVY_MODULES = {
+    "jsonschema",
+    "referencing",
+    "reportlab",
+    "numpy",
+    "pharmassist_synthdata.sim_year",
+    "pharmassist_synthdata.validate",
+    "pharmassist_synthdata.prescription_pdf",
+}
+
+
+def _heavy(modules: list[str]) -> set[str]:
+    return {m for m in modules if m in HEAVY_MODULES or m.partition(".")[0] in HEAVY_MODULES}
+
+
+def test_cli_import_is_within_budget():
+    seconds, modules = min(import_time() for _ in range(3))
+    assert not _heavy(modules)
+    assert seconds <= CLI_IMPORT_BUDGET_S, f"CLI import took {seconds * 1e3:.1f} ms"
+
+
+def test_generate_imports_only_its_own_modules(tmp_path: Path):
+    out = tmp_path / "case.json"
+    code = (
+        "import json, sys\n"
+        "from pharmassist_synthdata.cli import main\n"
+        f"rc = main(['generate', '--seed', '1', '--out', {str(out)!r}])\n"
+        "print(json.dumps([rc, sorted(sys.modules)]))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    rc, modules = json.loads(proc.stdout)
+    assert rc == 0 and json.loads(out.read_text(encoding="utf-8"))
+    assert not _heavy(modules)
+
+
+def test_parser_constants_match_their_modules():
+    assert sim_year.pharmacy_presets() == constants.PHARMACY_PRESETS
+    assert tuple(bench.BENCHMARKS) == constants.BENCHMARK_NAMES
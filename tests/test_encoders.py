@@ -0,0 +1,155 @@
+from dataclasses import replace
+
+import pytest
+
+from pharmassist_synthdata.encoders import FastRecordEncoder, dumps_canonical, record_encoder
+from pharmassist_synthdata.sim_year import (
+    ALL_RECORDS,
+    _iter_pharmacy_year,
+    default_params,
+    iter_pharmacy_year,
+)
+
+
+def test_fast_encoder_matches_reference_on_generated_records():
+    params = replace(default_params(pharmacy="paris15"), mu_base=8.0, initial_patients=30)
+    streams = [
+        iter_pharmacy_year(seed=42, pharmacy="paris15", year=2025, mode="mini"),
+        iter_pharmacy_year(
+            seed=42, pharmacy="paris15", year=2025, rng_mode="sharded", params=params
+        ),
+    ]
+    encode = record_encoder("fast")
+    n = 0
+    for stream in streams:
+        for rec in stream:
+            assert encode(rec.kind, rec.data) == dumps_canonical(rec.data)
+            n += 1
+    assert n > 1000
+
+
+def test_fast_encoder_falls_back_on_unexpected_shapes():
+    intake = {
+        "schema_version": "0.0.0",
+        "presenting_problem": 'Toux "sèche"\n',
+        "symptoms": [{"label": "toux", "severity": "mild", "duration_days": 1}],
+        "red_flags": [],
+    }
+    records = [
+        # Escaping and non-ASCII text.
+        (
+            "visit",
+            {
+                "visit_ref": "visit_000000001",
+                "patient_ref": "pt_ünïcode",
+                "occurred_at": "2025-01-01",
+                "primary_domain": "respiratory",
+                "intents": ["symptom_advice"],
+                "intake_extracted": intake,
+            },
+        ),
+        # Same intake key, but a float/bool leaf must not reuse the cached int fragment.
+        (
+            "visit",
+            {
+                "visit_ref": "visit_000000002",
+                "patient_ref": "pt_000001",
+                "occurred_at": "2025-01-01",
+                "primary_domain": "respiratory",
+                "intents": ["symptom_advice"],
+                "intake_extracted": {
+                    **intake,
+                    "symptoms": [{"label": "toux", "severity": "mild", "duration_days": True}],
+                },
+            },
+        ),
+        # Top-level intake leaves too: `True` after `1`, `1.0` after `1`.
+        *(
+            (
+                "visit",
+                {
+                    "visit_ref": "visit_000000003",
+                    "patient_ref": "pt_000001",
+                    "occurred_at": "2025-01-01",
+                    "primary_domain": "respiratory",
+                    "intents": ["symptom_advice"],
+                    "intake_extracted": {**intake, field: value},
+                },
+            )
+            for field in ("schema_version", "presenting_problem")
+            for value in (1, True, 1.0)
+        ),
+        # Extra key: not the known shape.
+        ("visit", {"visit_ref": "v", "extra": 1}),
+        (
+            "event",
+            {
+                "event_ref": "ev_1",
+                "visit_ref": "visit_1",
+                "patient_ref": "pt_1",
+                "occurred_at": "2025-01-01",
+                "event_type": "otc_purchase",
+                "payload": {"items": [{"sku": "SKU-0001", "qty": 2.0}]},
+            },
+        ),
+        (
+            "event",
+            {
+                "event_ref": 7,
+                "visit_ref": "visit_1",
+                "patient_ref": "pt_1",
+                "occurred_at": "2025-01-01",
+                "event_type": "note",
+                "payload": {"text": None},
+            },
+        ),
+        ("inventory", {"sku": "SKU-0001", "price_eur": 4.99, "in_stock": True}),
+    ]
+    encoder = FastRecordEncoder()
+    for kind, data in records:
+        assert encoder.encode(kind, data) == dumps_canonical(data)
+
+
+def test_intake_payloads_are_interned_and_shared_between_visit_and_event():
+    visits: dict[str, dict] = {}
+    shared = 0
+    records = _iter_pharmacy_year(
+        seed=3,
+        pharmacy="paris15",
+        year=2025,
+        mode="mini",
+        rng_mode="v1",
+        params=None,
+        select=ALL_RECORDS,
+    )
+    for rec in records:
+        if rec.kind == "visit":
+            visits[rec.data["visit_ref"]] = rec.data["intake_extracted"]
+        elif rec.kind == "event" and rec.data["event_type"] == "symptom_intake":
+            intake = rec.data["payload"]["intake_extracted"]
+            assert intake is visits[rec.data["visit_ref"]]
+            shared += 1
+    assert shared == 60
+
+    distinct = {id(v) for v in visits.values()}
+    # 60 visits draw from a few dozen interned outcomes (plus the two mini special cases).
+    assert len(distinct) < 40
+
+
+@pytest.mark.parametrize("rng_mode", ["v1", "sharded", "keyed"])
+def test_public_records_own_their_intake_payloads(rng_mode):
+    params = replace(default_params(pharmacy="paris15"), mu_base=4.0, initial_patients=20)
+    kwargs = dict(seed=3, pharmacy="paris15", year=2025, rng_mode=rng_mode, params=params)
+    encode = record_encoder("fast")
+    expected = [encode(r.kind, r.data) for r in iter_pharmacy_year(**kwargs)]
+
+    seen = []
+    for rec in iter_pharmacy_year(**kwargs):
+        seen.append(encode(rec.kind, rec.data))
+        intake = rec.data.get("intake_extracted") or rec.data.get("payload", {}).get(
+            "intake_extracted"
+        )
+        if intake is not None:
+            intake["red_flags"].append("mutated by a consumer")
+            intake["symptoms"].clear()
+    assert seen == expected
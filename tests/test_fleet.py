@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.fleet import (
+    INDEX_FILENAME,
+    FleetJob,
+    load_jobs,
+    parse_job_spec,
+    run_fleet,
+)
+
+
+def test_fleet_runs_jobs_and_keeps_completed_ones_when_one_fails(tmp_path: Path):
+    jobs = [
+        FleetJob(pharmacy="paris15", year=2025, seed=42, mode="mini"),
+        FleetJob(pharmacy="rural", year=2024, seed=7, mode="mini"),
+        # Invalid combination: fails inside the worker.
+        FleetJob(pharmacy="suburban", year=2025, seed=1, mode="mini", rng_mode="sharded"),
+    ]
+    index = run_fleet(jobs, out_dir=tmp_path, workers=2)
+
+    on_disk = json.loads((tmp_path / INDEX_FILENAME).read_text(encoding="utf-8"))
+    assert on_disk == index
+
+    by_name = {j["name"]: j for j in index["jobs"]}
+    assert set(by_name) == {"paris15_2025_000042", "rural_2024_000007", "suburban_2025_000001"}
+
+    for name in ("paris15_2025_000042", "rural_2024_000007"):
+        job = by_name[name]
+        assert job["status"] == "ok"
+        assert job["rows"]["patients"] == 20
+        assert job["rows"]["visits"] == 60
+        assert job["wall_s"] >= 0
+        assert (tmp_path / job["dir"] / "visits.jsonl.gz").exists()
+
+    failed = by_name["suburban_2025_000001"]
+    assert failed["status"] == "failed"
+    assert "ValueError" in failed["error"]
+
+
+def test_fleet_rejects_unknown_presets_and_duplicates(tmp_path: Path):
+    with pytest.raises(ValueError):
+        run_fleet([parse_job_spec("nowhere:2025:1")], out_dir=tmp_path)
+    with pytest.raises(ValueError):
+        run_fleet([parse_job_spec("paris15:2025:1")] * 2, out_dir=tmp_path)
+    with pytest.raises(ValueError):
+        parse_job_spec("paris15:2025")
+
+
+def test_load_jobs_rejects_invalid_rows(tmp_path: Path):
+    path = tmp_path / "jobs.json"
+    base = {"pharmacy": "paris15", "year": 2025, "seed": 1}
+    path.write_text(json.dumps([base, {**base, "mode": "mini"}, {**base, "rng_mode": "keyed"}]))
+    assert [(j.mode, j.rng_mode) for j in load_jobs(path)] == [
+        ("full", "v1"),
+        ("mini", "v1"),
+        ("full", "keyed"),
+    ]
+
+    for bad in (
+        {**base, "mode": "tiny"},
+        {**base, "rng_mode": "v2"},
+        {**base, "mode": ["full"]},
+        {**base, "mode": "mini", "rng_mode": "keyed"},
+        {**base, "mode": "mini", "rng_mode": "sharded"},
+        {"year": 2025, "seed": 1},
+        {**base, "seed": "one"},
+        {**base, "year": None},
+    ):
+        path.write_text(json.dumps([base, bad]))
+        with pytest.raises(ValueError, match="job #1"):
+            load_jobs(path)
@@ -0,0 +1,98 @@
+import gzip
+import json
+from dataclasses import replace
+from pathlib import Path
+
+from pharmassist_synthdata.gzip_blocks import (
+    BlockGzipWriter,
+    find_block,
+    iter_block_lines,
+    load_block_index,
+    read_block,
+)
+from pharmassist_synthdata.sim_year import RECORD_FILES, default_params, generate_pharmacy_year
+
+
+def _small_params():
+    return replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+
+
+def _lines(path: Path) -> list[str]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_block_output_is_plain_gzip_with_consistent_index(tmp_path: Path):
+    kwargs = dict(seed=42, pharmacy="paris15", year=2025, mode="mini")
+    generate_pharmacy_year(out_dir=tmp_path / "plain", **kwargs)
+    generate_pharmacy_year(out_dir=tmp_path / "blocks", block_size=2048, **kwargs)
+
+    for name in RECORD_FILES.values():
+        path = tmp_path / "blocks" / name
+        lines = _lines(path)
+        assert lines == _lines(tmp_path / "plain" / name)
+
+        blocks = load_block_index(path)
+        assert sum(b.rows for b in blocks) == len(lines)
+        assert sum(b.length for b in blocks) == path.stat().st_size
+        assert [b.offset for b in blocks[1:]] == [b.offset + b.length for b in blocks[:-1]]
+        assert list(iter_block_lines(path, workers=3)) == lines
+
+    events = tmp_path / "blocks" / "events.jsonl.gz"
+    blocks = load_block_index(events)
+    assert len(blocks) > 3
+    target = blocks[2].first_ref
+    bumped = target[:-1] + str(int(target[-1]) + 1)
+    block = blocks[find_block(blocks, bumped)]
+    assert any(json.loads(line)["event_ref"] == bumped for line in read_block(events, block))
+
+
+def test_sharded_block_output_matches_across_workers(tmp_path: Path):
+    kwargs = dict(
+        seed=7,
+        pharmacy="paris15",
+        year=2025,
+        rng_mode="sharded",
+        params=_small_params(),
+        block_size=4096,
+    )
+    generate_pharmacy_year(out_dir=tmp_path / "w1", workers=1, **kwargs)
+    generate_pharmacy_year(out_dir=tmp_path / "w2", workers=2, **kwargs)
+    for name in RECORD_FILES.values():
+        assert (tmp_path / "w1" / name).read_bytes() == (tmp_path / "w2" / name).read_bytes()
+        path = tmp_path / "w1" / name
+        assert list(iter_block_lines(path)) == _lines(path)
+
+
+def test_block_writer_bytes_do_not_depend_on_threads(tmp_path: Path):
+    rows = [
+        (json.dumps({"ref": f"r_{i:06d}", "pad": "x" * (i % 50)}), f"r_{i:06d}")
+        for i in range(3000)
+    ]
+    for threads in (1, 4):
+        (tmp_path / str(threads)).mkdir()
+        with BlockGzipWriter(
+            tmp_path / str(threads) / "f.jsonl.gz", block_size=1000, threads=threads
+        ) as w:
+            for line, ref in rows:
+                w.write_record(line, ref)
+    assert (tmp_path / "1" / "f.jsonl.gz").read_bytes() == (
+        tmp_path / "4" / "f.jsonl.gz"
+    ).read_bytes()
+    assert _lines(tmp_path / "4" / "f.jsonl.gz") == [line for line, _ in rows]
+
+
+def test_block_lines_only_split_on_newlines(tmp_path: Path):
+    path = tmp_path / "notes.jsonl.gz"
+    texts = ["a\u2028b", "c\u2029d", "e\x85f", "g\x1ch", "plain"]
+    lines = [
+        json.dumps({"ref": f"n{i}", "text": t}, ensure_ascii=False) for i, t in enumerate(texts)
+    ]
+    with BlockGzipWriter(path, block_size=40) as writer:
+        for i, line in enumerate(lines):
+            writer.write_record(line, f"n{i}")
+
+    blocks = load_block_index(path)
+    assert len(blocks) > 1
+    assert list(iter_block_lines(path)) == lines
+    assert [json.loads(line)["text"] for line in iter_block_lines(path, workers=2)] == texts
@@ -0,0 +1,111 @@
+import tracemalloc
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.cli import main
+from pharmassist_synthdata.prescription_pdf import generate_prescription_pdf_suite
+from pharmassist_synthdata.profiling import profiling
+from pharmassist_synthdata.sim_year import (
+    MemoryBudgetError,
+    default_params,
+    estimate_memory,
+    generate_pharmacy_year,
+)
+
+SMALL = replace(default_params(pharmacy="paris15"), mu_base=20.0, initial_patients=50)
+
+
+def _peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_streamed_year_memory_is_flat_in_the_number_of_days(tmp_path: Path):
+    # Rollups keep one small table per day by design, so they are left out here.
+    def run(last_day: date) -> int:
+        return _peak(
+            lambda: generate_pharmacy_year(
+                seed=5,
+                pharmacy="paris15",
+                year=2025,
+                out_dir=tmp_path / last_day.isoformat(),
+                params=SMALL,
+                pipeline=False,
+                rollups=False,
+                date_to=last_day,
+            )
+        )
+
+    run(date(2025, 1, 7))  # warm module-level caches
+    month, year = run(date(2025, 1, 31)), run(date(2025, 12, 31))
+    assert year < month * 1.1 + (64 << 10)
+
+
+def test_pdf_suite_memory_does_not_grow_with_the_number_of_cases(tmp_path: Path):
+    def run(n: int) -> int:
+        return _peak(
+            lambda: generate_prescription_pdf_suite(
+                out_dir=tmp_path / str(n), seeds=tuple(range(42, 42 + n))
+            )
+        )
+
+    run(1)
+    assert run(8) < run(2) * 1.25
+
+
+@pytest.mark.parametrize(
+    "kw", [{}, {"pipeline": False}, {"rng_mode": "sharded"}, {"checkpoint": True}]
+)
+def test_estimate_is_an_upper_bound_of_the_traced_peak(tmp_path: Path, kw):
+    peak = _peak(
+        lambda: generate_pharmacy_year(
+            seed=5, pharmacy="paris15", year=2025, out_dir=tmp_path, params=SMALL, **kw
+        )
+    )
+    estimate = estimate_memory(year=2025, params=SMALL, **kw).total
+    assert peak <= estimate < 4 * peak
+
+
+def test_budget_lowers_the_pipeline_then_fails_fast(tmp_path: Path):
+    full = estimate_memory(year=2025, params=SMALL)
+    lean = estimate_memory(year=2025, params=SMALL, pipeline=False)
+    assert lean.total < full.total
+
+    common = {"seed": 5, "pharmacy": "paris15", "year": 2025, "params": SMALL}
+    generate_pharmacy_year(**common, out_dir=tmp_path / "ref", pipeline=False)
+    generate_pharmacy_year(**common, out_dir=tmp_path / "fit", max_memory=lean.total)
+    for name in ("patients", "visits", "events", "inventory"):
+        path = f"{name}.jsonl.gz"
+        assert (tmp_path / "fit" / path).read_bytes() == (tmp_path / "ref" / path).read_bytes()
+
+    with pytest.raises(MemoryBudgetError, match="patient_pool"):
+        generate_pharmacy_year(**common, out_dir=tmp_path / "no", max_memory=lean.total - 1)
+    assert not (tmp_path / "no").exists()
+
+
+def test_profile_memory_reports_stage_peaks(tmp_path: Path):
+    with profiling(memory=True) as prof:
+        generate_pharmacy_year(
+            seed=5, pharmacy="paris15", year=2025, out_dir=tmp_path, params=SMALL
+        )
+    report = prof.report()
+    stages = report["stages"]
+    total = stages["sim_year.total"]
+    assert total["peak_kb"] >= stages["sim_year.patient"]["peak_kb"] > 0
+    assert total["growth_kb"] <= total["peak_kb"]
+    assert report["memory"]["traced_peak_kb"] >= total["peak_kb"]
+    assert "peak_kb" not in stages["gzip.compress"]  # background thread: timed only
+    assert not tracemalloc.is_tracing()
+
+
+def test_cli_max_memory_reports_the_estimate(tmp_path: Path, capsys):
+    argv = ["sim-year", "--seed", "1", "--out", str(tmp_path / "o"), "--max-memory", "1M"]
+    assert main(argv) == 1
+    assert "exceeds the budget of 1.0 MiB" in capsys.readouterr().err
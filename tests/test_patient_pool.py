@@ -0,0 +1,101 @@
+import gzip
+import json
+import random
+from dataclasses import replace
+from pathlib import Path
+
+from pharmassist_synthdata.patient_pool import PatientPool
+from pharmassist_synthdata.sampler import WeightedSampler
+from pharmassist_synthdata.sim_year import (
+    RECORD_FILES,
+    YEARS_INDEX_FILENAME,
+    default_params,
+    generate_pharmacy_year,
+    generate_pharmacy_years,
+)
+
+
+def _lines(path: Path) -> list[str]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_pool_without_churn_matches_weighted_sampler():
+    pool, sampler = PatientPool(10), WeightedSampler([1] * 10)
+    a, b = random.Random(3), random.Random(3)
+    for step in range(500):
+        if step % 7 == 0:
+            pool.add(len(sampler))
+            sampler.append(1)
+            continue
+        idx = sampler.sample(b)
+        sampler.add(idx, 1)
+        assert pool.visit(a) == idx
+
+
+def test_churn_frees_slots_for_new_patients():
+    pool = PatientPool(100)
+    rng = random.Random(0)
+    dropped = pool.churn(rng, 0.5)
+    assert 0 < dropped < 100
+    assert len(pool) == 100 - dropped
+    for n in range(100, 100 + dropped):
+        pool.add(n)
+    assert pool.slots == 100 and len(pool) == 100
+
+    restored = PatientPool.from_json(json.loads(json.dumps(pool.to_json())))
+    assert [restored.visit(random.Random(i)) for i in range(20)] == [
+        pool.visit(random.Random(i)) for i in range(20)
+    ]
+
+
+def test_multi_year_continues_state_with_bounded_pool(tmp_path: Path):
+    params = replace(
+        default_params(pharmacy="rural"), mu_base=8.0, initial_patients=60, annual_churn=0.4
+    )
+    index = generate_pharmacy_years(
+        seed=5, pharmacy="rural", first_year=2025, n_years=8, out_dir=tmp_path, params=params
+    )
+    assert json.loads((tmp_path / YEARS_INDEX_FILENAME).read_text(encoding="utf-8")) == index
+
+    # Year one is the plain single-year v1 stream.
+    generate_pharmacy_year(
+        seed=5, pharmacy="rural", year=2025, out_dir=tmp_path / "single", params=params
+    )
+    for name in RECORD_FILES.values():
+        assert _lines(tmp_path / "2025" / name) == _lines(tmp_path / "single" / name)
+
+    known: set[str] = set()
+    visit_refs: set[str] = set()
+    for year in index["years"]:
+        year_dir = tmp_path / year["dir"]
+        known.update(
+            json.loads(line)["patient_ref"] for line in _lines(year_dir / "patients.jsonl.gz")
+        )
+        for line in _lines(year_dir / "visits.jsonl.gz"):
+            visit = json.loads(line)
+            assert visit["patient_ref"] in known
+            assert visit["visit_ref"] not in visit_refs
+            visit_refs.add(visit["visit_ref"])
+
+    # Churn caps the pool well below the number of patients ever seen.
+    years = index["years"]
+    assert all(y["churned"] > 0 for y in years[1:])
+    assert years[-1]["pool_slots"] < 0.6 * years[-1]["patient_counter"]
+    assert max(y["pool_slots"] for y in years) <= 1.5 * years[2]["pool_slots"]
+
+
+def test_full_churn_restarts_the_pool_with_new_patients(tmp_path: Path):
+    params = replace(
+        default_params(pharmacy="rural"), mu_base=4.0, initial_patients=20, annual_churn=1.0
+    )
+    index = generate_pharmacy_years(
+        seed=3, pharmacy="rural", first_year=2025, n_years=3, out_dir=tmp_path, params=params
+    )
+    for year in index["years"][1:]:
+        assert year["active_at_start"] == 0 and year["active_at_end"] > 0
+        year_dir = tmp_path / year["dir"]
+        new = {json.loads(line)["patient_ref"] for line in _lines(year_dir / "patients.jsonl.gz")}
+        # Nobody survives the churn: every visit is by a patient new that year.
+        visits = [json.loads(line) for line in _lines(year_dir / "visits.jsonl.gz")]
+        assert visits and all(v["patient_ref"] in new for v in visits)
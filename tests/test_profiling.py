@@ -0,0 +1,62 @@
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.case_bundle import generate_case_bundle
+from pharmassist_synthdata.cli import main
+from pharmassist_synthdata.ocr_text import apply_ocr_noise, render_intake_text
+from pharmassist_synthdata.profiling import active_profiler, profiling, timed
+from pharmassist_synthdata.sim_year import default_params, generate_pharmacy_year
+from pharmassist_synthdata.validate import validate_case_bundle
+
+
+def test_sim_year_stages_count_records(tmp_path: Path):
+    params = replace(default_params(pharmacy="paris15"), mu_base=4.0, initial_patients=30)
+    with profiling() as prof:
+        rows = generate_pharmacy_year(
+            seed=3, pharmacy="paris15", year=2025, out_dir=tmp_path, params=params
+        )
+    stages = prof.report()["stages"]
+    assert stages["sim_year.total"]["calls"] == 1
+    assert stages["sim_year.patient"]["calls"] == rows["patients"]
+    assert stages["sim_year.encode"]["calls"] == sum(rows.values())
+    assert stages["sim_year.rollups"]["calls"] == sum(rows.values())
+    assert stages["gzip.compress"]["calls"] > 0
+    assert stages["sim_year.total"]["total_s"] >= stages["sim_year.patient"]["total_s"]
+    assert active_profiler() is None
+
+
+def test_hook_sees_every_case_bundle_stage():
+    seen: list[tuple[str, float]] = []
+    with profiling(hook=lambda name, seconds: seen.append((name, seconds))) as prof:
+        bundle = generate_case_bundle(seed=42)
+        apply_ocr_noise(render_intake_text(bundle, language="fr"), seed=1)
+        assert validate_case_bundle(bundle) == []
+    names = {name for name, _ in seen}
+    assert {"case_bundle.total", "patient.generate", "ocr.noise", "validate.instance"} <= names
+    report = prof.report()
+    assert sum(s["calls"] for s in report["stages"].values()) == len(seen)
+    assert all(seconds >= 0 for _, seconds in seen)
+
+
+def test_disabled_profiling_is_a_pass_through():
+    fn = str.upper
+    assert timed("x", fn) is fn
+    with profiling():
+        assert timed("x", fn) is not fn
+        with pytest.raises(RuntimeError), profiling():
+            pass
+    assert timed("x", fn) is fn
+
+
+def test_cli_profile_writes_report(tmp_path: Path):
+    out = tmp_path / "profile.json"
+    assert (
+        main(["--profile", str(out), "generate", "--seed", "1", "--out", str(tmp_path / "b.json")])
+        == 0
+    )
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["stages"]["case_bundle.total"]["calls"] == 1
+    assert report["wall_s"] > 0
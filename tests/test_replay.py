@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import json
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.replay import (
+    SECONDS_PER_DAY,
+    StreamSink,
+    iter_merged,
+    open_sink,
+    replay,
+    replay_dataset,
+)
+from pharmassist_synthdata.sim_year import default_params, generate_pharmacy_year
+
+
+def _dataset(out_dir: Path) -> Path:
+    params = replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+    generate_pharmacy_year(
+        seed=3,
+        pharmacy="paris15",
+        year=2025,
+        out_dir=out_dir,
+        params=params,
+        only=["visits", "events"],
+        date_from=date(2025, 1, 1),
+        date_to=date(2025, 1, 10),
+    )
+    return out_dir
+
+
+def _lines(path: Path) -> list[bytes]:
+    with gzip.open(path, "rb") as f:
+        return [line.rstrip(b"\n") for line in f]
+
+
+def test_merge_is_chronological_and_complete(tmp_path: Path):
+    data = _dataset(tmp_path)
+    merged = list(iter_merged(data))
+
+    assert len(merged) == len(_lines(data / "visits.jsonl.gz")) + len(
+        _lines(data / "events.jsonl.gz")
+    )
+    days = [r.occurred_at for r in merged]
+    assert days == sorted(days)
+    seen_visits = set()
+    for r in merged:
+        rec = json.loads(r.line)
+        if r.kind == "visits":
+            seen_visits.add(rec["visit_ref"])
+        else:
+            assert rec["visit_ref"] in seen_visits
+
+
+def test_replay_paces_days_and_reports_rates(tmp_path: Path):
+    data = _dataset(tmp_path)
+    out = tmp_path / "replayed.jsonl"
+    # 10 simulated days at 50 days/s: ~0.2s of pacing.
+    report = replay_dataset(data, sink=f"file:{out}", speed=SECONDS_PER_DAY * 50)
+
+    assert out.read_bytes().splitlines() == [r.line for r in iter_merged(data)]
+    assert report.records == len(out.read_bytes().splitlines())
+    assert report.days == 10
+    assert report.elapsed_s == pytest.approx(0.2, abs=0.15)
+    assert report.target_rate == pytest.approx(report.records / 0.2)
+    assert report.achieved_rate > 0.5 * report.target_rate
+
+    unpaced = replay_dataset(data, sink=f"file:{out}", speed=0)
+    assert unpaced.target_rate is None
+    assert unpaced.records == report.records
+
+    with pytest.raises(ValueError):
+        replay_dataset(data, sink="udp:localhost:9", speed=0)
+
+
+def test_socket_and_http_sinks(tmp_path: Path):
+    data = _dataset(tmp_path)
+    expected = [r.line for r in iter_merged(data)]
+
+    async def main() -> tuple[list[bytes], list[bytes]]:
+        tcp_lines: list[bytes] = []
+        http_bodies: list[bytes] = []
+
+        async def on_tcp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            while line := await reader.readline():
+                tcp_lines.append(line.rstrip(b"\n"))
+            writer.close()
+
+        async def on_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            while await reader.readline():  # request line
+                length = 0
+                while (header := await reader.readline()) != b"\r\n":
+                    name, _, value = header.partition(b":")
+                    if name.lower() == b"content-length":
+                        length = int(value)
+                http_bodies.append(await reader.readexactly(length))
+                writer.write(b"HTTP/1.1 202 Accepted\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+            writer.close()
+
+        tcp = await asyncio.start_server(on_tcp, "127.0.0.1", 0)
+        http = await asyncio.start_server(on_http, "127.0.0.1", 0)
+        tcp_port = tcp.sockets[0].getsockname()[1]
+        http_port = http.sockets[0].getsockname()[1]
+        async with tcp, http:
+            for target in (f"tcp:127.0.0.1:{tcp_port}", f"http://127.0.0.1:{http_port}/ingest"):
+                report = await replay(iter_merged(data), await open_sink(target), speed=0)
+                assert report.records == len(expected)
+                assert report.errors == 0
+            await asyncio.sleep(0.05)
+        return tcp_lines, http_bodies
+
+    tcp_lines, http_bodies = asyncio.run(main())
+    assert tcp_lines == expected
+    assert http_bodies == expected
+
+
+def test_replay_closes_the_sink_on_error(tmp_path: Path):
+    class Sink:
+        def __init__(self) -> None:
+            self.closed = False
+
+        async def send(self, line: bytes) -> None:
+            pass
+
+        async def close(self) -> None:
+            self.closed = True
+
+    def broken():
+        yield from list(iter_merged(_dataset(tmp_path)))[:5]
+        raise OSError("truncated file")
+
+    sink = Sink()
+    with pytest.raises(OSError):
+        asyncio.run(replay(broken(), sink, speed=0))
+    assert sink.closed
+
+    sink = Sink()
+    with pytest.raises(ValueError):
+        asyncio.run(replay([], sink, speed=-1))
+    assert sink.closed
+
+
+def test_stream_sink_rejects_negative_speed(tmp_path: Path):
+    async def main() -> None:
+        with (tmp_path / "x").open("wb") as f:
+            await replay([], StreamSink(f), speed=-1)
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
@@ -0,0 +1,70 @@
+import gzip
+import json
+from collections import Counter
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.rollups import ROLLUP_FILES, rollups_from_files
+from pharmassist_synthdata.sim_year import default_params, generate_pharmacy_year
+
+
+def _read(path: Path) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _load(out_dir: Path) -> dict[str, dict]:
+    return {
+        name: json.loads((out_dir / name).read_text(encoding="utf-8"))
+        for name in ROLLUP_FILES.values()
+    }
+
+
+@pytest.mark.parametrize(
+    "case",
+    [
+        {"rng_mode": "v1"},
+        {"rng_mode": "sharded", "workers": 2},
+        {"rng_mode": "keyed"},
+        {"rng_mode": "v1", "checkpoint": True},
+    ],
+)
+def test_in_stream_rollups_match_a_scan_of_the_files(tmp_path: Path, case):
+    params = replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+    generate_pharmacy_year(
+        seed=8, pharmacy="paris15", year=2025, out_dir=tmp_path, params=params, **case
+    )
+    rollups = _load(tmp_path)
+    assert rollups == rollups_from_files(tmp_path).to_files()
+
+    visits = _read(tmp_path / "visits.jsonl.gz")
+    daily = rollups[ROLLUP_FILES["daily_domain"]]["days"]
+    assert sum(sum(day.values()) for day in daily.values()) == len(visits)
+    assert daily["2025-03-03"] == dict(
+        Counter(v["primary_domain"] for v in visits if v["occurred_at"] == "2025-03-03")
+    )
+
+    intents = rollups[ROLLUP_FILES["intents"]]
+    assert intents["visits"] == len(visits)
+    assert intents["intents"]["symptom_advice"] == len(visits)
+    assert intents["intents"]["otc_purchase"] == sum("otc_purchase" in v["intents"] for v in visits)
+
+    per_patient = Counter(v["patient_ref"] for v in visits)
+    n_patients = len(_read(tmp_path / "patients.jsonl.gz"))
+    distribution = rollups[ROLLUP_FILES["patient_visits"]]["distribution"]
+    assert rollups[ROLLUP_FILES["patient_visits"]]["patients"] == n_patients
+    assert sum(distribution.values()) == n_patients
+    assert distribution.get("0", 0) == n_patients - len(per_patient)
+    assert distribution["1"] == sum(1 for n in per_patient.values() if n == 1)
+
+
+def test_partial_runs_and_opt_out_write_no_rollups(tmp_path: Path):
+    params = replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+    common = {"seed": 8, "pharmacy": "paris15", "year": 2025, "params": params}
+    generate_pharmacy_year(**common, out_dir=tmp_path / "off", rollups=False)
+    generate_pharmacy_year(**common, out_dir=tmp_path / "part", date_to=date(2025, 1, 31))
+    for sub in ("off", "part"):
+        assert not any((tmp_path / sub / name).exists() for name in ROLLUP_FILES.values())
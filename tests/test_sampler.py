@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from pharmassist_synthdata.sampler import WeightedSampler
+
+
+def test_weighted_sampler_matches_random_choices_stream():
+    rng_ref = random.Random(7)
+    rng_new = random.Random(7)
+    driver = random.Random(99)
+
+    weights = [1] * 50
+    sampler = WeightedSampler(weights)
+
+    for _ in range(5000):
+        if driver.random() < 0.1:
+            weights.append(1)
+            sampler.append(1)
+        expected = rng_ref.choices(range(len(weights)), weights=weights, k=1)[0]
+        got = sampler.sample(rng_new)
+        assert got == expected
+        weights[got] += 1
+        sampler.add(got, 1)
+
+    assert sampler.total == sum(weights)
+    assert [sampler.weight(i) for i in range(len(sampler))] == weights
+
+
+def test_weighted_sampler_skips_zero_weights():
+    sampler = WeightedSampler([0, 3, 0, 0, 2, 0])
+    rng = random.Random(1)
+    seen = {sampler.sample(rng) for _ in range(200)}
+    assert seen == {1, 4}
+
+
+def test_weighted_sampler_rejects_empty_total():
+    sampler = WeightedSampler([0, 0])
+    with pytest.raises(ValueError):
+        sampler.sample(random.Random(0))
+    with pytest.raises(ValueError):
+        sampler.add(0, -1)
+
+
+def test_bulk_build_matches_incremental_appends():
+    weights = [random.Random(i).randrange(0, 9) for i in range(1000)]
+    bulk = WeightedSampler(weights)
+    grown = WeightedSampler()
+    for w in weights:
+        grown.append(w)
+    assert bulk._tree == grown._tree
+    assert bulk.total == grown.total == sum(weights)
+    # Compact storage: one 8-byte slot per weight and per tree node.
+    assert bulk.nbytes == 8 * (2 * len(weights) + 1)
@@ -0,0 +1,137 @@
+import copy
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from jsonschema import Draft202012Validator
+
+from pharmassist_synthdata.case_bundle import generate_case_bundle
+from pharmassist_synthdata.contracts import load_schema_by_name, schema_registry
+from pharmassist_synthdata.schema_codegen import (
+    compile_check,
+    compiled_check,
+    generate_check_source,
+)
+
+SCHEMAS = ("llm_context", "intake_extracted", "product", "recommendation")
+
+RECOMMENDATION = {
+    "schema_version": "0.0.0",
+    "ranked_products": [
+        {"product_sku": "SKU-0001", "score_0_100": 80, "why": "fits", "evidence_refs": ["r1"]}
+    ],
+    "safety_warnings": [
+        {"code": "W1", "message": "check", "severity": "WARN", "related_product_sku": "SKU-0001"}
+    ],
+    "follow_up_questions": [{"question": "Since when?", "reason": "duration", "priority": 2}],
+    "escalation": {"recommended": False, "reason": "none", "suggested_service": "GP"},
+    "confidence": 0.7,
+}
+
+# Replacement values covering every JSON type and the edge cases of the type checks.
+SWAPS = (None, True, False, 0, -1, 1.5, 3.0, 10**6, "", "x", "1.2.3", [], {}, ["x"], {"x": 1})
+
+
+def _valid_corpus() -> dict[str, list[Any]]:
+    corpus: dict[str, list[Any]] = {name: [] for name in SCHEMAS}
+    for seed in range(30):
+        bundle = generate_case_bundle(seed=seed)
+        corpus["llm_context"].append(bundle["llm_context"])
+        corpus["intake_extracted"].append(bundle["intake_extracted"])
+        corpus["product"].extend(bundle["products"])
+    corpus["recommendation"].append(RECOMMENDATION)
+    return corpus
+
+
+def _paths(value: Any, path: tuple = ()) -> Iterator[tuple]:
+    yield path
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _paths(v, (*path, k))
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from _paths(v, (*path, i))
+
+
+def _get(doc: Any, path: tuple) -> Any:
+    for step in path:
+        doc = doc[step]
+    return doc
+
+
+def _set(doc: Any, path: tuple, value: Any) -> Any:
+    if not path:
+        return value
+    out = copy.deepcopy(doc)
+    _get(out, path[:-1])[path[-1]] = value
+    return out
+
+
+def _mutations(doc: Any) -> Iterator[Any]:
+    """Deterministic single-point mutations of `doc`."""
+    for path in _paths(doc):
+        for swap in SWAPS:
+            yield _set(doc, path, swap)
+        node = _get(doc, path)
+        if path and isinstance(_get(doc, path[:-1]), dict):
+            dropped = copy.deepcopy(doc)
+            del _get(dropped, path[:-1])[path[-1]]
+            yield dropped
+        if isinstance(node, dict):
+            yield _set(doc, path, {**node, "unexpected": 1})
+        if isinstance(node, list):
+            yield _set(doc, path, [*node, None])
+        if isinstance(node, str):
+            yield _set(doc, path, node + "!" * 2001)
+            yield _set(doc, path, "v" + node)
+
+
+@pytest.mark.parametrize("schema_name", SCHEMAS)
+def test_compiled_check_agrees_with_jsonschema(schema_name):
+    reference = Draft202012Validator(
+        load_schema_by_name(schema_name), registry=schema_registry()
+    ).is_valid
+    check = compiled_check(schema_name)
+    docs = _valid_corpus()[schema_name]
+    assert docs and all(check(d) for d in docs)
+
+    seen = {True: 0, False: 0}
+    for doc in docs[:4]:
+        for mutant in _mutations(doc):
+            expected = reference(mutant)
+            assert check(mutant) is expected, mutant
+            seen[expected] += 1
+    assert seen[True] and seen[False]
+
+
+def test_generated_source_is_deterministic_python():
+    for name in SCHEMAS:
+        source = generate_check_source(name)
+        assert source == generate_check_source(name)
+        compile(source, name, "exec")
+    assert compiled_check("product") is compiled_check("product")
+
+
+@pytest.mark.parametrize(
+    "schema",
+    [
+        {"items": True},
+        {"items": {}},
+        {"properties": {"a": {"items": True}}},
+        {"additionalProperties": {}},
+        {"type": "object", "properties": {"a": {}}, "additionalProperties": {"maxLength": 3}},
+    ],
+)
+def test_keywords_that_check_nothing_still_compile(schema):
+    reference = Draft202012Validator(schema).is_valid
+    check = compile_check(schema)
+    assert check.__name__ == "check_inline"  # generated, not the jsonschema fallback
+    for doc in (*SWAPS, {"a": [1]}, {"a": 1, "b": "long"}, {"b": "ok"}, [[1], "x"]):
+        assert check(doc) is reference(doc), doc
+
+
+def test_uncompilable_schemas_fall_back_to_jsonschema():
+    schema = {"anyOf": [{"type": "string"}, {"type": "null"}]}
+    check = compile_check(schema)
+    assert check.__name__ == "is_valid"
+    assert check("x") and check(None) and not check(1)
@@ -1,5 +1,12 @@
+from pharmassist_synthdata import validate
 from pharmassist_synthdata.case_bundle import generate_case_bundle
-from pharmassist_synthdata.validate import validate_case_bundle
+from pharmassist_synthdata.validate import (
+    BatchResult,
+    compiled_validator,
+    validate_case_bundle,
+    validate_instance,
+    validate_many,
+)
 
 
 def test_generated_case_bundle_matches_vendored_schemas():
@@ -7,3 +14,36 @@ def test_generated_case_bundle_matches_vendored_schemas():
     issues = validate_case_bundle(bundle)
     assert issues == []
 
+
+def test_validate_many_reports_only_invalid_instances(monkeypatch):
+    products = generate_case_bundle(seed=7)["products"]
+    broken = [dict(products[0]), dict(products[1])]
+    del broken[0]["sku"]
+    broken[1]["price_eur"] = "free"
+    batch = [products[2], broken[0], products[3], broken[1]]
+
+    result = validate_many(iter(batch), "product")
+    assert result.count == 4 and not result.ok
+    assert sorted(result.invalid) == [1, 3]
+    assert result.invalid[1] == validate_instance(broken[0], schema_name="product")
+    assert result.issues() == result.invalid[1] + result.invalid[3]
+    assert compiled_validator("product") is compiled_validator("product")
+
+    # Fast path: nothing but a pass/fail check for valid instances.
+    def no_issues(*args):
+        raise AssertionError("issues built for a valid instance")
+
+    monkeypatch.setattr(validate, "_issues", no_issues)
+    assert validate_many(products, "product") == BatchResult(count=len(products))
+
+
+def test_case_bundle_product_issues_keep_their_order():
+    bundle = generate_case_bundle(seed=7)
+    bad = dict(bundle["products"][1])
+    del bad["sku"]
+    bundle["products"] = ["oops", bad, bundle["products"][0]]
+    issues = validate_case_bundle(bundle)
+    assert [(i.schema_name, i.json_path) for i in issues] == [
+        ("product", "$.products[0]"),
+        *[("product", i.json_path) for i in validate_instance(bad, schema_name="product")],
+    ]
@@ -1,10 +1,22 @@
 import gzip
 import json
+from dataclasses import replace
+from datetime import date
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from typing import Any
 
-from pharmassist_synthdata.sim_year import generate_pharmacy_year
+import pytest
+
+from pharmassist_synthdata.sim_year import (
+    OUTPUT_FILES,
+    RECORD_FILES,
+    default_params,
+    generate_pharmacy_year,
+    iter_pharmacy_year,
+    make_selection,
+)
+from pharmassist_synthdata.sim_year_np import numpy_available
 from pharmassist_synthdata.validate import validate_instance
 
 
@@ -97,3 +109,161 @@ def test_sim_year_mini_outputs_exist_and_are_schema_compatible():
         for p in inventory:
             assert validate_instance(p, schema_name="product") == []
 
+
+def _small_params():
+    return replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+
+
+def test_sim_year_sharded_output_is_independent_of_worker_count(tmp_path: Path):
+    params = _small_params()
+    out_1 = tmp_path / "w1"
+    out_3 = tmp_path / "w3"
+    generate_pharmacy_year(
+        seed=7, pharmacy="paris15", year=2025, out_dir=out_1, rng_mode="sharded", params=params
+    )
+    generate_pharmacy_year(
+        seed=7,
+        pharmacy="paris15",
+        year=2025,
+        out_dir=out_3,
+        rng_mode="sharded",
+        workers=3,
+        params=params,
+    )
+
+    for name in OUTPUT_FILES:
+        assert (out_1 / name).read_bytes() == (out_3 / name).read_bytes(), name
+
+
+def test_sim_year_sharded_refs_are_contiguous_and_consistent(tmp_path: Path):
+    generate_pharmacy_year(
+        seed=7,
+        pharmacy="paris15",
+        year=2025,
+        out_dir=tmp_path,
+        rng_mode="sharded",
+        workers=2,
+        params=_small_params(),
+    )
+
+    patients = _read_jsonl_gz(tmp_path / "patients.jsonl.gz")
+    visits = _read_jsonl_gz(tmp_path / "visits.jsonl.gz")
+    events = _read_jsonl_gz(tmp_path / "events.jsonl.gz")
+
+    assert [p["patient_ref"] for p in patients] == [f"pt_{i:06d}" for i in range(len(patients))]
+    assert [v["visit_ref"] for v in visits] == [f"visit_{i:09d}" for i in range(len(visits))]
+    assert [e["event_ref"] for e in events] == [f"ev_{i:09d}" for i in range(len(events))]
+    assert [v["occurred_at"] for v in visits] == sorted(v["occurred_at"] for v in visits)
+
+    patient_refs = {p["patient_ref"] for p in patients}
+    visit_refs = {v["visit_ref"] for v in visits}
+    assert {v["patient_ref"] for v in visits} <= patient_refs
+    assert {e["visit_ref"] for e in events} == visit_refs
+
+
+def test_iter_pharmacy_year_yields_the_same_records_as_the_files(tmp_path: Path):
+    cases = [
+        {"mode": "mini", "rng_mode": "v1", "params": None},
+        {"mode": "full", "rng_mode": "sharded", "params": _small_params()},
+    ]
+    for i, case in enumerate(cases):
+        out_dir = tmp_path / str(i)
+        rows = generate_pharmacy_year(
+            seed=11, pharmacy="paris15", year=2025, out_dir=out_dir, **case
+        )
+
+        streamed: dict[str, list[Any]] = {kind: [] for kind in RECORD_FILES}
+        for rec in iter_pharmacy_year(seed=11, pharmacy="paris15", year=2025, **case):
+            streamed[rec.kind].append(rec.data)
+
+        for kind, name in RECORD_FILES.items():
+            on_disk = _read_jsonl_gz(out_dir / name)
+            assert streamed[kind] == on_disk, name
+            assert rows[name.split(".")[0]] == len(on_disk)
+
+
+def _expected_selection(records, *, kinds, date_from, date_to, initial_patients):
+    def in_window(day: str) -> bool:
+        return date_from <= date.fromisoformat(day) <= date_to
+
+    out = []
+    for i, rec in enumerate(records):
+        if rec.kind not in kinds:
+            continue
+        if rec.kind == "inventory":
+            out.append(rec)
+        elif rec.kind == "patient":
+            # New patients are dated by the visit that introduces them (the next record).
+            n = int(rec.data["patient_ref"].split("_")[1])
+            if n < initial_patients or in_window(records[i + 1].data["occurred_at"]):
+                out.append(rec)
+        elif in_window(rec.data["occurred_at"]):
+            out.append(rec)
+    return out
+
+
+@pytest.mark.parametrize(
+    "rng_mode",
+    [
+        "v1",
+        "sharded",
+        "keyed",
+        pytest.param("np1", marks=pytest.mark.skipif(not numpy_available(), reason="needs NumPy")),
+    ],
+)
+@pytest.mark.parametrize(
+    "only,date_from,date_to",
+    [
+        (["events", "visits"], date(2025, 3, 14), date(2025, 5, 2)),
+        (["patients"], date(2025, 11, 20), date(2025, 12, 31)),
+        (None, date(2025, 1, 1), date(2025, 1, 31)),
+    ],
+)
+def test_selection_matches_the_same_records_of_a_full_run(rng_mode, only, date_from, date_to):
+    params = _small_params()
+    common = {"seed": 5, "pharmacy": "paris15", "year": 2025, "rng_mode": rng_mode}
+    full = list(iter_pharmacy_year(**common, params=params))
+    select = make_selection(only=only, date_from=date_from, date_to=date_to)
+    got = list(iter_pharmacy_year(**common, params=params, select=select))
+    expected = _expected_selection(
+        full,
+        kinds=select.kinds,
+        date_from=date_from,
+        date_to=date_to,
+        initial_patients=params.initial_patients,
+    )
+    assert got
+    assert got == expected
+
+
+def test_partial_generation_writes_only_the_selected_files(tmp_path: Path):
+    params = _small_params()
+    common = {"seed": 5, "pharmacy": "paris15", "year": 2025, "params": params}
+    generate_pharmacy_year(**common, out_dir=tmp_path / "full")
+    rows = generate_pharmacy_year(
+        **common,
+        out_dir=tmp_path / "part",
+        only=["events", "visits"],
+        date_from=date(2025, 6, 1),
+        date_to=date(2025, 6, 30),
+    )
+
+    assert sorted(p.name for p in (tmp_path / "part").iterdir()) == [
+        "events.jsonl.gz",
+        "visits.jsonl.gz",
+    ]
+    for name in ("events", "visits"):
+        full = _read_jsonl_gz(tmp_path / "full" / f"{name}.jsonl.gz")
+        part = _read_jsonl_gz(tmp_path / "part" / f"{name}.jsonl.gz")
+        assert part == [r for r in full if r["occurred_at"].startswith("2025-06-")]
+        assert rows[name] == len(part)
+    assert set(rows) == {"events", "visits"}
+
+    with pytest.raises(ValueError):
+        make_selection(only=["events", "bogus"])
+    with pytest.raises(ValueError):
+        make_selection(date_from=date(2025, 2, 1), date_to=date(2025, 1, 1))
+    with pytest.raises(ValueError):
+        generate_pharmacy_year(
+            **common, out_dir=tmp_path / "ckpt", checkpoint=True, only=["events"]
+        )
@@ -0,0 +1,75 @@
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+from pharmassist_synthdata.sim_year import default_params, iter_pharmacy_year
+from pharmassist_synthdata.sim_year_keyed import (
+    keyed_uniforms,
+    regenerate_day,
+    regenerate_visit,
+)
+
+
+def _small_params():
+    return replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+
+
+def test_regenerated_days_and_visits_match_the_full_stream():
+    params = _small_params()
+    initial = {f"pt_{i:06d}" for i in range(params.initial_patients)}
+    records = list(
+        iter_pharmacy_year(seed=9, pharmacy="paris15", year=2025, rng_mode="keyed", params=params)
+    )
+    # Drop inventory and the initial pool; the rest is the concatenation of all days.
+    body = [
+        r
+        for r in records
+        if r.kind != "inventory" and not (r.kind == "patient" and r.data["patient_ref"] in initial)
+    ]
+    for day in (date(2025, 1, 2), date(2025, 6, 30), date(2025, 12, 31)):
+        regenerated = regenerate_day(seed=9, pharmacy="paris15", day=day, params=params)
+        visits = [r for r in regenerated if r.kind == "visit"]
+        assert visits
+        start = body.index(regenerated[0])
+        assert body[start : start + len(regenerated)] == regenerated
+        assert all(v.data["occurred_at"] == day.isoformat() for v in visits)
+
+    visits = [r for r in records if r.kind == "visit"]
+    for n in (0, 17, len(visits) // 2, len(visits) - 1):
+        got = regenerate_visit(seed=9, pharmacy="paris15", year=2025, visit_index=n, params=params)
+        ref = f"visit_{n:09d}"
+        start = body.index(got[0])
+        assert body[start : start + len(got)] == got
+        assert [r.data["visit_ref"] for r in got if r.kind != "patient"][0] == ref
+
+    with pytest.raises(ValueError):
+        regenerate_visit(
+            seed=9, pharmacy="paris15", year=2025, visit_index=len(visits), params=params
+        )
+
+
+def test_keyed_stream_refs_are_contiguous_and_resolvable():
+    params = _small_params()
+    known = set()
+    visit_n = event_n = 0
+    for rec in iter_pharmacy_year(
+        seed=9, pharmacy="paris15", year=2025, rng_mode="keyed", params=params
+    ):
+        if rec.kind == "patient":
+            known.add(rec.data["patient_ref"])
+        elif rec.kind == "visit":
+            assert rec.data["visit_ref"] == f"visit_{visit_n:09d}"
+            assert rec.data["patient_ref"] in known
+            visit_n += 1
+        elif rec.kind == "event":
+            assert rec.data["event_ref"] == f"ev_{event_n:09d}"
+            event_n += 1
+    assert visit_n > 1000
+
+
+def test_keyed_uniforms_are_stable_and_purpose_separated():
+    a = keyed_uniforms(1, "2025-01-01", 3, "pick")
+    assert a == keyed_uniforms(1, "2025-01-01", 3, "pick")
+    assert a != keyed_uniforms(1, "2025-01-01", 3, "intake")
+    assert all(0.0 <= u < 1.0 for u in a)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.encoders import record_encoder
+from pharmassist_synthdata.sim_year import RECORD_FILES, iter_pharmacy_year
+
+np = pytest.importorskip("numpy")
+
+from pharmassist_synthdata.sim_year_np import _preferential_picks, _stream  # noqa: E402
+
+GOLDEN = Path(__file__).resolve().parents[1] / "fixtures" / "sim_year_np1"
+
+
+def _digests(*, seed: int, pharmacy: str, year: int) -> dict[str, dict[str, object]]:
+    """sha256 + row count of each output file's (uncompressed) JSONL content."""
+    encode = record_encoder("fast")
+    hashes = {kind: hashlib.sha256() for kind in RECORD_FILES}
+    rows = dict.fromkeys(RECORD_FILES, 0)
+    for rec in iter_pharmacy_year(seed=seed, pharmacy=pharmacy, year=year, rng_mode="np1"):
+        hashes[rec.kind].update((encode(rec.kind, rec.data) + "\n").encode("utf-8"))
+        rows[rec.kind] += 1
+    return {
+        name: {"rows": rows[kind], "sha256": hashes[kind].hexdigest()}
+        for kind, name in RECORD_FILES.items()
+    }
+
+
+def test_np1_matches_golden_digests():
+    golden = json.loads((GOLDEN / "paris15_2025_000042.json").read_text(encoding="utf-8"))
+    assert _digests(seed=42, pharmacy="paris15", year=2025) == golden["files"]
+
+
+def test_preferential_picks_match_sequential_urn():
+    rng = np.random.default_rng(0)
+    is_new = rng.random(5000) < 0.1
+    picks = _preferential_picks(7, is_new, 30)
+
+    # Reference: explicit weights, same uniforms, same "slot" rule.
+    u = iter(_stream(7, "patient_picks").random(int((~is_new).sum())).tolist())
+    weights = [1] * 30
+    history: list[int] = []
+    for new, got in zip(is_new.tolist(), picks.tolist(), strict=True):
+        if new:
+            assert got == len(weights)
+            weights.append(1)
+            continue
+        slot = int(next(u) * (len(weights) + len(history)))
+        want = slot if slot < len(weights) else history[slot - len(weights)]
+        assert got == want
+        weights[want] += 1
+        history.append(want)
+
+
+if __name__ == "__main__":
+    # Regenerate the golden file (only when the np1 draw layout is deliberately changed).
+    payload = {
+        "numpy": np.__version__,
+        "rng_mode": "np1",
+        "seed": 42,
+        "pharmacy": "paris15",
+        "year": 2025,
+        "files": _digests(seed=42, pharmacy="paris15", year=2025),
+    }
+    (GOLDEN / "paris15_2025_000042.json").write_text(
+        json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+    )
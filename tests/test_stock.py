@@ -0,0 +1,109 @@
+import gzip
+import json
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.gzip_blocks import load_block_index
+from pharmassist_synthdata.sim_year import default_params, generate_pharmacy_year
+from pharmassist_synthdata.stock import (
+    DEFAULT_KEYFRAME_DAYS,
+    STOCK_FILENAME,
+    RestockSchedule,
+    StockBook,
+    stock_on,
+)
+
+
+def _read(path: Path) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _brute_force(out_dir: Path) -> dict[str, dict[str, int]]:
+    """End-of-day stock per date, recomputed naively from inventory + events."""
+    inventory = _read(out_dir / "inventory.jsonl.gz")
+    min_par = RestockSchedule().min_par
+    par = {p["sku"]: max(p["stock_qty"], min_par) for p in inventory}
+    sales: dict[str, list[tuple[str, int]]] = {}
+    for e in _read(out_dir / "events.jsonl.gz"):
+        if e["event_type"] == "otc_purchase":
+            for item in e["payload"]["items"]:
+                sales.setdefault(e["occurred_at"], []).append((item["sku"], item["qty"]))
+    stock = {p["sku"]: p["stock_qty"] for p in inventory}
+    out = {}
+    day = date(2025, 1, 1)
+    while day.year == 2025:
+        if RestockSchedule().delivers_on(day):
+            stock = {sku: max(q, par[sku]) for sku, q in stock.items()}
+        for sku, qty in sales.get(day.isoformat(), []):
+            stock[sku] = max(0, stock[sku] - qty)
+        out[day.isoformat()] = dict(stock)
+        day += timedelta(days=1)
+    return out
+
+
+@pytest.mark.parametrize("rng_mode", ["v1", "sharded"])
+def test_stock_ledger_matches_a_naive_replay(tmp_path: Path, rng_mode):
+    params = replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=40)
+    rows = generate_pharmacy_year(
+        seed=4,
+        pharmacy="paris15",
+        year=2025,
+        out_dir=tmp_path,
+        params=params,
+        rng_mode=rng_mode,
+        stock=True,
+    )
+    path = tmp_path / STOCK_FILENAME
+    lines = _read(path)
+    assert rows["stock_daily"] == len(lines) == 365
+    # The snapshot has out-of-stock SKUs; they must be refilled like the others.
+    assert lines[0]["stock"]["SKU-0016"] == 0
+    assert all(qty > 0 for qty in lines[-1]["stock"].values())
+    expected = _brute_force(tmp_path)
+
+    stock: dict[str, int] = {}
+    previous: dict[str, int] = {}
+    for i, line in enumerate(lines):
+        assert line["kind"] == ("keyframe" if i % DEFAULT_KEYFRAME_DAYS == 0 else "delta")
+        if line["kind"] == "keyframe":
+            stock = dict(line["stock"])
+        else:
+            # Deltas hold exactly the SKUs whose level changed.
+            assert all(previous[sku] != qty for sku, qty in line["stock"].items())
+            stock.update(line["stock"])
+        assert stock == expected[line["date"]], line["date"]
+        previous = dict(stock)
+
+    assert len(load_block_index(path)) == -(-365 // DEFAULT_KEYFRAME_DAYS)
+    for day in (date(2025, 1, 1), date(2025, 2, 11), date(2025, 7, 14), date(2025, 12, 31)):
+        assert stock_on(path, day) == expected[day.isoformat()]
+    with pytest.raises(ValueError):
+        stock_on(path, date(2024, 12, 31))
+
+
+def test_stock_book_never_goes_negative_and_tracks_changes():
+    book = StockBook([("A", 3), ("B", 0), ("C", 5)])
+    assert book.sell("A", 2) == 0
+    assert book.sell("A", 4) == 3
+    assert book.sell("B", 1) == 1
+    assert book["A"] == 0
+    assert book.take_changes() == {"A": 0}
+    book.restock()
+    assert book.take_changes() == {"A": 3}
+    assert book.snapshot() == {"A": 3, "B": 0, "C": 5}
+    with pytest.raises(ValueError):
+        book.sell("Z", 1)
+
+
+def test_stock_book_refills_skus_that_start_out_of_stock():
+    book = StockBook([("A", 0), ("B", 2), ("C", 9)], min_par=5)
+    assert book.sell("A", 1) == 1
+    book.restock()
+    assert book.take_changes() == {"A": 5, "B": 5}
+    assert book.snapshot() == {"A": 5, "B": 5, "C": 9}
+    with pytest.raises(ValueError):
+        StockBook([("A", 0)], min_par=-1)
@@ -0,0 +1,158 @@
+import gzip
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from pharmassist_synthdata.cli import main
+from pharmassist_synthdata.sim_year import (
+    default_params,
+    generate_pharmacy_year,
+    generate_pharmacy_years,
+)
+from pharmassist_synthdata.validate_dataset import (
+    RefSet,
+    binomial_upper_bound,
+    ref_key,
+    validate_dataset,
+)
+
+SMALL = replace(default_params(pharmacy="paris15"), mu_base=6.0, initial_patients=30)
+
+
+def _read(path: Path) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _write(path: Path, rows: list[dict]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in rows)
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory) -> Path:
+    out = tmp_path_factory.mktemp("year")
+    generate_pharmacy_year(seed=4, pharmacy="paris15", year=2025, out_dir=out, params=SMALL)
+    return out
+
+
+def test_generated_dataset_is_valid_in_any_chunking(dataset: Path):
+    one = validate_dataset(dataset, chunk_rows=7)
+    assert one.ok, [str(i) for i in one.issues]
+    assert one.rows["visits.jsonl.gz"] == len(_read(dataset / "visits.jsonl.gz"))
+    pooled = validate_dataset(dataset, workers=2, chunk_rows=50)
+    assert pooled.to_json() == one.to_json()
+
+
+def test_schema_and_ref_problems_are_located(dataset: Path, tmp_path: Path):
+    for name in ("patients", "visits", "events", "inventory"):
+        (tmp_path / f"{name}.jsonl.gz").write_bytes((dataset / f"{name}.jsonl.gz").read_bytes())
+    patients = _read(tmp_path / "patients.jsonl.gz")
+    visits = _read(tmp_path / "visits.jsonl.gz")
+    events = _read(tmp_path / "events.jsonl.gz")
+
+    gone = patients.pop()["patient_ref"]  # the last new patient: visited at least once
+    _write(tmp_path / "patients.jsonl.gz", patients)
+    visits[0]["intake_extracted"]["symptoms"] = "cough"
+    _write(tmp_path / "visits.jsonl.gz", visits)
+    buy = next(k for k, e in enumerate(events) if e["event_type"] == "otc_purchase")
+    events[buy]["payload"]["items"][0]["sku"] = "SKU-9999"
+    _write(tmp_path / "events.jsonl.gz", events)
+
+    report = validate_dataset(tmp_path, chunk_rows=16)
+    found = {(i.file, i.check, i.json_path, i.message) for i in report.issues}
+    assert ("events.jsonl.gz", "ref", "$.payload.items[].sku", "Unknown sku: SKU-9999") in found
+    assert any(i.check == "intake_extracted" and i.line == 1 for i in report.issues)
+    missing = [i for i in report.issues if i.message == f"Unknown patient: {ref_key(gone, 'pt_')}"]
+    assert missing and all(visits[i.line - 1]["patient_ref"] == gone for i in missing)
+    assert report.n_issues == len(report.issues) == 2 + len(missing)
+
+    capped = validate_dataset(tmp_path, max_issues=1)
+    assert capped.n_issues == report.n_issues and len(capped.issues) == 1
+    assert main(["validate-dataset", "--in", str(tmp_path)]) == 1
+
+
+def test_malformed_event_payloads_are_reported(dataset: Path, tmp_path: Path):
+    for name in ("patients", "visits", "inventory"):
+        (tmp_path / f"{name}.jsonl.gz").write_bytes((dataset / f"{name}.jsonl.gz").read_bytes())
+    events = _read(dataset / "events.jsonl.gz")
+    intake = next(k for k, e in enumerate(events) if e["event_type"] == "symptom_intake")
+    buys = [k for k, e in enumerate(events) if e["event_type"] == "otc_purchase"]
+    events[intake]["payload"] = "x"
+    events[buys[0]]["payload"] = [1]
+    events[buys[1]]["payload"]["items"] = 5
+    _write(tmp_path / "events.jsonl.gz", events)
+
+    report = validate_dataset(tmp_path, chunk_rows=16)
+    assert sorted((i.line, i.check, i.json_path) for i in report.issues) == sorted(
+        [
+            (intake + 1, "json", "$.payload"),
+            (buys[0] + 1, "json", "$.payload"),
+            (buys[1] + 1, "json", "$.payload.items"),
+        ]
+    )
+
+
+def test_multi_year_patients_carry_over(tmp_path: Path):
+    generate_pharmacy_years(
+        seed=2, pharmacy="paris15", first_year=2025, n_years=2, out_dir=tmp_path, params=SMALL
+    )
+    report = validate_dataset(tmp_path)
+    assert report.ok, [str(i) for i in report.issues]
+    assert set(report.rows) >= {"2025/visits.jsonl.gz", "2026/events.jsonl.gz"}
+
+
+def test_ref_set_is_a_bitmap_for_numbered_refs():
+    refs = RefSet()
+    assert refs.add(ref_key("pt_000100", "pt_"))
+    assert not refs.add(100)
+    assert refs.add(ref_key("legacy-7", "pt_"))
+    # Non-ASCII digits are not ref numbers (int() rejects "²", and "١٢" is not a ref).
+    assert ref_key("pt_²", "pt_") == "pt_²" and ref_key("pt_١٢", "pt_") == "pt_١٢"
+    assert 100 in refs and "legacy-7" in refs and 99 not in refs and 10**9 not in refs
+    assert refs.count == 2 and refs.nbytes <= 32
+
+    # A corrupt huge ref number must not size the bitmap.
+    huge = ref_key("pt_99999999999999", "pt_")
+    assert refs.add(huge) and not refs.add(huge) and huge in refs
+    assert refs.nbytes <= 32 and refs.count == 3
+
+
+def test_sampling_checks_rare_rows_and_bounds_the_rest(tmp_path: Path):
+    generate_pharmacy_year(seed=4, pharmacy="paris15", year=2025, out_dir=tmp_path, mode="mini")
+    report = validate_dataset(tmp_path, sample=5, seed=1)
+    assert report.ok and report.to_json() == validate_dataset(tmp_path, sample=5, seed=1).to_json()
+    stats = {s.file: s for s in report.sample}
+    assert stats["visits.jsonl.gz"].rare == 2  # the `other` domain and the red-flag visit
+    assert stats["inventory.jsonl.gz"].rare == sum(
+        not p["in_stock"] for p in _read(tmp_path / "inventory.jsonl.gz")
+    )
+    assert all(s.sampled == 5 for s in report.sample)
+    assert 0.0 < report.rate_upper < 1.0
+
+    # A sample as large as the data is an exhaustive check: the bound is the exact rate.
+    assert validate_dataset(tmp_path, sample=10**6).rate_upper == 0.0
+
+    visits = _read(tmp_path / "visits.jsonl.gz")
+    other = next(k for k, v in enumerate(visits) if v["primary_domain"] == "other")
+    visits[other]["intake_extracted"]["symptoms"] = "unspecified"
+    _write(tmp_path / "visits.jsonl.gz", visits)
+    broken = validate_dataset(tmp_path, sample=1)
+    assert [(i.file, i.line) for i in broken.issues] == [("visits.jsonl.gz", other + 1)]
+    assert {s.file: s.invalid_rare for s in broken.sample}["visits.jsonl.gz"] == 1
+    assert main(["validate-dataset", "--in", str(tmp_path), "--sample", "1"]) == 1
+    assert (
+        main(
+            ["validate-dataset", "--in", str(tmp_path), "--sample", "1", "--max-invalid-rate", "1"]
+        )
+        == 0
+    )
+
+
+def test_binomial_upper_bound():
+    assert binomial_upper_bound(0, 100, 0.95) == pytest.approx(1 - 0.05 ** (1 / 100))
+    assert binomial_upper_bound(5, 100, 0.95) == pytest.approx(0.1023, abs=1e-3)
+    assert binomial_upper_bound(3, 3, 0.95) == 1.0
+    assert binomial_upper_bound(1, 1000, 0.99) > binomial_upper_bound(1, 1000, 0.9)
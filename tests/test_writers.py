@@ -0,0 +1,29 @@
+import gzip
+from pathlib import Path
+
+from pharmassist_synthdata.writers import ThreadedGzipWriter, open_jsonl_gz
+
+
+def _lines(n: int) -> list[str]:
+    return [f'{{"i":{i},"label":"ligne {i} é"}}\n' for i in range(n)]
+
+
+def test_threaded_gzip_writer_matches_inline_writer_bytes(tmp_path: Path):
+    # Enough data for several hand-offs to the compressor thread.
+    lines = _lines(40_000)
+    for level in (1, 6, 9):
+        # Same basename: gzip stores it in the header.
+        (tmp_path / f"inline_{level}").mkdir()
+        (tmp_path / f"threaded_{level}").mkdir()
+        inline = tmp_path / f"inline_{level}" / "events.jsonl.gz"
+        threaded = tmp_path / f"threaded_{level}" / "events.jsonl.gz"
+        with open_jsonl_gz(inline, compresslevel=level) as f:
+            for line in lines:
+                f.write(line)
+        with ThreadedGzipWriter(threaded, compresslevel=level, max_pending=2) as f:
+            for line in lines:
+                f.write(line)
+
+        assert threaded.read_bytes() == inline.read_bytes()
+        with gzip.open(threaded, "rt", encoding="utf-8") as f:
+            assert f.read() == "".join(lines)